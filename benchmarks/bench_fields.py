@@ -0,0 +1,62 @@
+"""
+Benchmarks every field type in flask_window_dressing.fields, one value at a
+time.
+"""
+import datetime
+import decimal
+
+import pyperf
+from flask import Flask
+
+from flask_window_dressing import fields
+from schemas import Record
+
+app = Flask(__name__)
+app.add_url_rule('/records/<int:id>', 'record', lambda id: '')
+
+
+def output(field, obj):
+    return field.output('value', obj, obj)
+
+
+def add_benchmarks(runner):
+    now = datetime.datetime(2013, 1, 1, 12, 30, 15)
+    outputs = [
+        ('raw', fields.Raw(), 'value'),
+        ('string', fields.String(), 'value'),
+        ('integer', fields.Integer(), '42'),
+        ('boolean', fields.Boolean(), 1),
+        ('float', fields.Float(), 3.14159),
+        ('arbitrary', fields.Arbitrary(), '634271127864378216478362784632784678324.23432'),
+        ('fixed', fields.Fixed(decimals=2), decimal.Decimal('3.14159')),
+        ('fixed_float', fields.Fixed(decimals=2), 3.14159),
+        ('datetime', fields.DateTime(), now),
+        ('capitalize', fields.Capitalize(), 'value'),
+        ('list', fields.List(fields.Integer), list(range(10))),
+        ('comma_separated_list', fields.CommaSeparatedList(fields.String), list('abcdefghij')),
+        ('nested', fields.Nested({'a': fields.Integer, 'b': fields.String}), {'a': 1, 'b': 'b'}),
+    ]
+    for name, field, value in outputs:
+        runner.bench_func('field_out_{0}'.format(name), output, field, {'value': value})
+
+    record = Record(7)
+    runner.bench_func('field_out_formatted_string', output,
+                      fields.FormattedString('{name} ({id})'), record)
+    # Url needs a request context to build urls in
+    with app.test_request_context():
+        runner.bench_func('field_out_url', output, fields.Url('record'), record)
+
+    inputs = [
+        ('datetime', fields.DateTime(), '2013-01-01T12:30:15+00:00'),
+        ('datetime_fuzzy', fields.DateTime(), 'Jan 1 2013 12:30:15 UTC'),
+        ('integer', fields.Integer(), '42'),
+        ('comma_separated_list', fields.CommaSeparatedList(fields.String), 'a,b,c,d,e,f,g,h,i,j'),
+    ]
+    for name, field, value in inputs:
+        runner.bench_func('field_in_{0}'.format(name), field.input, 'value', {'value': value}, None)
+
+
+if __name__ == '__main__':
+    runner = pyperf.Runner()
+    runner.metadata['description'] = ' '.join(__doc__.split())
+    add_benchmarks(runner)
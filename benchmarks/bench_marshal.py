@@ -0,0 +1,53 @@
+"""
+Benchmarks marshal() for flat, nested and List of Nested schemas, outbound and
+inbound, at 1, 100 and 10k records. Outbound, marshaling and dumping the records
+to JSON is compared with encoding them with the fused schema encoder. Records
+that share their nested owners are marshaled with and without the memo.
+"""
+import pyperf
+
+from flask_window_dressing import marshal
+from flask_window_dressing.encoder import compile_encoder
+from flask_window_dressing.representations.json_backends import json_backends
+from schemas import (SIZES, flat_fields, list_of_nested_fields, make_incoming,
+                     make_records, make_shared_records, nested_fields)
+
+inbound_fields = dict(flat_fields)
+del inbound_fields['created']
+
+stdlib_json = json_backends['json']
+
+
+def marshal_and_dump(records, schema):
+    return stdlib_json.dumps(marshal(records, records, schema))
+
+
+def add_benchmarks(runner):
+    for size in SIZES:
+        records = make_records(size)
+        for name, schema in (('flat', flat_fields), ('nested', nested_fields),
+                             ('list_of_nested', list_of_nested_fields)):
+            runner.bench_func('marshal_out_{0}_{1}'.format(name, size),
+                              marshal, records, records, schema)
+            runner.bench_func('marshal_out_{0}_{1}_batch'.format(name, size),
+                              marshal, records, records, schema, False, True)
+            runner.bench_func('dump_out_{0}_{1}'.format(name, size),
+                              marshal_and_dump, records, schema)
+            runner.bench_func('encode_out_{0}_{1}'.format(name, size),
+                              compile_encoder(schema).encode, records)
+
+        shared = make_shared_records(size)
+        runner.bench_func('marshal_out_shared_{0}'.format(size),
+                          marshal, shared, shared, nested_fields)
+        runner.bench_func('marshal_out_shared_{0}_memo'.format(size),
+                          marshal, shared, shared, nested_fields, False, False, None, True)
+
+        incoming = make_incoming(size)
+        runner.bench_func('marshal_in_flat_{0}'.format(size),
+                          marshal, incoming, incoming, inbound_fields, True)
+
+
+if __name__ == '__main__':
+    runner = pyperf.Runner()
+    runner.metadata['description'] = ' '.join(__doc__.split())
+    add_benchmarks(runner)
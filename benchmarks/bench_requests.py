@@ -0,0 +1,53 @@
+"""
+Benchmarks full request round trips through marshal_with and JsonResource with
+the Flask test client, for GET requests and for POST requests whose JSON body is
+decoded and marshaled on the way in.
+"""
+import json
+
+import pyperf
+from flask import Flask
+
+from flask_window_dressing import marshal, marshal_with
+from schemas import SIZES, flat_fields, list_of_nested_fields, make_records, nested_fields
+
+app = Flask(__name__)
+records = dict((size, make_records(size)) for size in SIZES)
+
+
+def add_view(name, schema, **options):
+    @marshal_with(schema, **options)
+    def view(size, fields=None):
+        return records[size]
+    app.add_url_rule('/{0}/<int:size>'.format(name), name, view, methods=['GET', 'POST'])
+
+
+add_view('flat', flat_fields)
+add_view('nested', nested_fields)
+add_view('list_of_nested', list_of_nested_fields)
+add_view('flat_etag', flat_fields, etag=True)
+
+
+def get(client, url):
+    return client.get(url).data
+
+
+def post(client, url, body):
+    return client.post(url, data=body, content_type='application/json').data
+
+
+def add_benchmarks(runner):
+    client = app.test_client()
+    for size in SIZES:
+        for name in ('flat', 'nested', 'list_of_nested', 'flat_etag'):
+            url = '/{0}/{1}'.format(name, size)
+            runner.bench_func('request_get_{0}_{1}'.format(name, size), get, client, url)
+        body = json.dumps(marshal(records[size][0], None, flat_fields))
+        runner.bench_func('request_post_flat_{0}'.format(size), post, client,
+                          '/flat/{0}'.format(size), body)
+
+
+if __name__ == '__main__':
+    runner = pyperf.Runner()
+    runner.metadata['description'] = ' '.join(__doc__.split())
+    add_benchmarks(runner)
@@ -0,0 +1,79 @@
+"""
+Schemas and data shared by the benchmarks.
+"""
+import datetime
+import decimal
+
+from flask_window_dressing import fields
+
+SIZES = (1, 100, 10000)
+
+flat_fields = {
+    'id': fields.Integer,
+    'name': fields.String,
+    'price': fields.Float,
+    'active': fields.Boolean,
+    'created': fields.DateTime,
+}
+
+nested_fields = {
+    'id': fields.Integer,
+    'name': fields.String,
+    'owner': fields.Nested({
+        'id': fields.Integer,
+        'name': fields.String,
+        'address': fields.Nested({
+            'street': fields.String,
+            'city': fields.String,
+        }),
+    }),
+}
+
+list_of_nested_fields = {
+    'id': fields.Integer,
+    'items': fields.List(fields.Nested({
+        'sku': fields.String,
+        'quantity': fields.Integer,
+        'price': fields.Fixed(decimals=2),
+    })),
+}
+
+
+class Record(object):
+    def __init__(self, i):
+        self.id = i
+        self.name = 'record {0}'.format(i)
+        self.price = i * 1.25
+        self.active = bool(i % 2)
+        self.created = datetime.datetime(2013, 1, 1, 12, 30, i % 60)
+        self.owner = {
+            'id': i % 50,
+            'name': 'owner {0}'.format(i % 50),
+            'address': {'street': '{0} Main St'.format(i), 'city': 'Springfield'},
+        }
+        self.items = [{'sku': 'sku-{0}'.format(j), 'quantity': j, 'price': decimal.Decimal(j) / 3}
+                      for j in range(5)]
+
+
+def make_records(size):
+    return [Record(i) for i in range(size)]
+
+
+def make_shared_records(size):
+    """
+    Records whose owners are 50 shared objects, as loaded by an ORM's identity map.
+    """
+    owners = [make_records(1)[0].owner for i in range(50)]
+    records = make_records(size)
+    for i, record in enumerate(records):
+        record.owner = owners[i % 50]
+    return records
+
+
+def make_incoming(size):
+    """
+    Records as they arrive in a request, after JSON decoding.
+    """
+    return [{'id': str(i), 'name': 'record {0}'.format(i), 'price': str(i * 1.25),
+             'active': i % 2, 'created': '2013-01-01T12:30:{0:02d}+00:00'.format(i % 60)}
+            for i in range(size)]
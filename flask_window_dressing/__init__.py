@@ -12,10 +12,27 @@
 
 __version__ = "0.1.0"
 
+import codecs
+import copy
 import functools
-from flask import request
+import sys
+import threading
+from collections import namedtuple
+from flask import current_app, request
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge, UnsupportedMediaType
+from werkzeug.http import parse_options_header
 from .utils import unpack
-from .representations.json_representation import JsonResource
+from .utils.compression import choose_encoding, compression_enabled
+from .utils.json_stream import BoundedReader
+from .utils.memo import memoize
+from .utils.parallel import ParallelMarshaler, get_parallel_marshaler
+from .utils.sparse_fields import select_fields
+from .utils.profiling import (profiling_enabled, server_timing, server_timing_enabled, stats,
+                              timed_field, timer)
+from .utils.cache_headers import add_cache_headers, is_not_modified, make_etag, not_modified_response
+from .representations import DEFAULT_PREFERENCES, negotiate_representation
+from .representations import representations as registered_representations
+from .representations.json_representation import JsonResource, StreamingJsonResource
 
 try:
     #noinspection PyUnresolvedReferences
@@ -51,7 +68,385 @@ except ImportError:
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-def marshal(data, full_data, fields, going_in=False):
+# The containers that outbound marshaling can build records in. Plain dicts keep
+# their insertion order from Python 3.7 on, so they are the default there.
+DICT = 'dict'
+ORDERED_DICT = 'ordered_dict'
+PAIRS = 'pairs'
+RECORD = 'record'
+DEFAULT_CONTAINER = DICT if sys.version_info >= (3, 7) else ORDERED_DICT
+
+
+def _make(cls):
+    if isinstance(cls, type):
+        return cls()
+    return cls
+
+
+class CompiledFields(object):
+    """
+    A fields dict that has been resolved ahead of time into a single specialized
+    marshaling function. Field classes are instantiated once, nested dicts are
+    compiled into their own marshalers and the per object code is generated so
+    that marshaling an object is one function call with no dispatch on the schema.
+
+    Instances are callable with the same ``data`` and ``full_data`` arguments as
+    :func:`marshal`. Use :func:`compile_fields` to get one, so that compiled
+    schemas are shared.
+    """
+    def __init__(self, fields, going_in=False, container=None, profile=None):
+        """
+        :param fields: a dict of whose keys will make up the final serialized
+                       response output or internal request representation
+        :param going_in: (optional, default:False) If True the schema marshals incoming
+            requests, otherwise it marshals responses.
+        :param container: (optional) The container outbound records are built in, see
+            :func:`compile_fields`. Incoming requests are always marshaled to dicts.
+        :param profile: (optional) The name the schema's stats are recorded under, see
+            :class:`ProfiledFields`.
+        """
+        self.fields = fields
+        self.going_in = going_in
+        self.container = DICT if going_in else container or DEFAULT_CONTAINER
+        self.profile = profile
+        compiling = _compiling.__dict__.setdefault('ids', set())
+        compiling.add(id(fields))
+        try:
+            self._compile_steps(fields, going_in, profile)
+        finally:
+            compiling.discard(id(fields))
+        # What the dict held when it was compiled, see :meth:`is_current`
+        self.snapshot = tuple(fields.items())
+        self.nested_schemas = [field for out_key, key, field in self.steps
+                               if isinstance(field, CompiledFields)] + self.field_schemas
+        self.keys = [out_key for out_key, key, field in self.steps]
+        costs = [getattr(field, 'cost', 1) for out_key, key, field in self.steps]
+        self.cost = max(costs) if costs else 1
+        # Fields are evaluated cheapest first, but records keep the schema's order
+        self.order = sorted(range(len(costs)), key=costs.__getitem__)
+        self.prefetches = not going_in and any(
+            getattr(field, 'prefetch', None) is not None or getattr(field, 'prefetches', False)
+            for out_key, key, field in self.steps)
+        self.record = None
+        if self.container == RECORD:
+            self.record = namedtuple('Record', [str(k) for k in self.keys], rename=True)
+        self.marshal_one = self._generate()
+        self.make_record = self._record_factory()
+        self.column_functions = [self.column_function(key, field)
+                                 for out_key, key, field in self.steps]
+
+    def _compile_steps(self, fields, going_in, profile):
+        """
+        Builds the ``(out_key, key, field)`` steps of the schema.
+        """
+        # The schemas of Nested fields that are compiled along with this one
+        self.field_schemas = []
+        self.steps = []
+        for k, v in fields.items():
+            if isinstance(v, dict):
+                nested_profile = '{0}.{1}'.format(profile, k) if profile else None
+                self.steps.append((k, k, compile_fields(v, going_in, self.container, nested_profile)))
+            elif going_in:
+                field = self.prepare_field(k, _make(v))
+                out_key = getattr(field, 'attribute', None) or k
+                self.steps.append((out_key, k, field))
+            else:
+                field = self.prepare_field(k, _make(v))
+                nested = self.compile_nested(field)
+                if nested is not None and nested not in self.field_schemas:
+                    self.field_schemas.append(nested)
+                self.steps.append((k, k, field))
+
+    def compile_nested(self, field):
+        """
+        Compiles the nested schema of a ``Nested`` or ``List(Nested)`` field, see
+        :meth:`fields.Nested.compile_nested`. Returns None for other fields and for
+        dicts that nest themselves, whose schema is compiled when it is first used.
+        """
+        from .fields import List, Nested
+        if isinstance(field, List):
+            field = field.container
+        if not isinstance(field, Nested) or id(field.nested) in _compiling.ids:
+            return None
+        return field.compile_nested()
+
+    def is_current(self):
+        """
+        Returns False if the fields dict, or a dict nested in it, has been changed
+        since it was compiled.
+        """
+        # Fields don't define __eq__, so the tuples compare them by identity
+        if tuple(self.fields.items()) != self.snapshot:
+            return False
+        for nested in self.nested_schemas:
+            if not nested.is_current():
+                return False
+        return True
+
+    def _generate(self):
+        namespace = {'OrderedDict': OrderedDict, 'Record': self.record}
+        values = []
+        for i, (out_key, key, field) in enumerate(self.steps):
+            namespace['_o%d' % i] = out_key
+            namespace['_k%d' % i] = key
+            namespace['_f%d' % i] = self.step_function(key, field)
+            values.append('_f%d(_k%d, data, full_data)' % (i, i))
+
+        body = ''
+        if self.order != sorted(self.order):
+            body = ''.join('    _v%d = %s\n' % (i, values[i]) for i in self.order)
+            values = ['_v%d' % i for i in range(len(values))]
+
+        pairs = ''.join('(_o%d, %s), ' % (i, value) for i, value in enumerate(values))
+        if self.container == DICT:
+            record = '{%s}' % ''.join('_o%d: %s, ' % (i, value) for i, value in enumerate(values))
+        elif self.container == ORDERED_DICT:
+            record = 'OrderedDict((%s))' % pairs
+        elif self.container == PAIRS:
+            record = '(%s)' % pairs
+        elif self.container == RECORD:
+            record = 'Record(%s)' % ', '.join(values)
+        else:
+            raise ValueError('Unknown container {0}'.format(self.container))
+
+        source = 'def marshal_one(data, full_data):\n%s    return %s\n' % (body, record)
+        exec(compile(source, '<compiled fields>', 'exec'), namespace)
+        return namespace['marshal_one']
+
+    def prepare_field(self, key, field):
+        """
+        Returns the field instance the schema marshals a key with.
+        """
+        return field
+
+    def step_function(self, key, field):
+        """
+        Returns the function the generated code calls for a field.
+        """
+        return field.input if self.going_in else field.output
+
+    def column_function(self, key, field):
+        """
+        Returns the function :meth:`batch` calls for a field's column.
+        """
+        if hasattr(field, 'output_column'):
+            return field.output_column
+        return lambda key, objs, full_data, values=None: [field.output(key, obj, full_data)
+                                                          for obj in objs]
+
+    def _record_factory(self):
+        """
+        Returns a function that builds a record from the list of its values in
+        field order.
+        """
+        keys = self.keys
+        if self.container == DICT:
+            return lambda values: dict(zip(keys, values))
+        if self.container == ORDERED_DICT:
+            return lambda values: OrderedDict(zip(keys, values))
+        if self.container == PAIRS:
+            return lambda values: tuple(zip(keys, values))
+        return self.record._make
+
+    def __call__(self, data, full_data):
+        if _is_list(data):
+            if self.prefetches:
+                # Prefetched values are loaded for the whole list, column by column
+                return self.batch(data, data)
+            marshal_one = self.marshal_one
+            return [marshal_one(d, data) for d in data]
+        return self.marshal_one(data, full_data)
+
+    def batch(self, data, full_data):
+        """
+        Marshals a list of homogeneous records one field at a time instead of one
+        record at a time. Each field pulls and formats its whole column in one go
+        and the columns are zipped back into records. Returns the same result as
+        calling the compiled schema with the list.
+
+        Besides lists, pandas-like frames (anything with ``columns`` that can be
+        indexed by column name) are accepted, in which case fields whose key or
+        attribute names a column format that column directly.
+
+        Fields with a ``prefetch`` function get their whole column from it. Lists
+        marshaled by a schema with such fields always go through this method.
+
+        :param data: the list of objects or frame from which the fields are taken
+        :param full_data: the full data in the request or the response
+        """
+        if self.going_in:
+            return self(data, full_data)
+
+        frame = None
+        if hasattr(data, 'columns'):
+            frame = data
+            objs = _FrameRows(data)
+        else:
+            objs = data
+            if any(_is_list(d) for d in data):
+                return [self(d, full_data) for d in data]
+
+        steps = self.steps
+        columns = [None] * len(steps)
+        for i in self.order:
+            out_key, key, field = steps[i]
+            prefetch = getattr(field, 'prefetch', None)
+            if prefetch is not None:
+                values = prefetch(list(objs))
+            elif frame is not None:
+                values = _frame_column(frame, field, key)
+            else:
+                values = None
+            columns[i] = self.column_functions[i](key, objs, full_data, values)
+
+        make_record = self.make_record
+        if not columns:
+            return [make_record(()) for i in range(len(objs))]
+        return [make_record(values) for values in zip(*columns)]
+
+    # A compiled nested dict is used like a field by the schema containing it.
+
+    def output(self, key, data, full_data):
+        return self(data, full_data)
+
+    def input(self, key, data, full_data):
+        return self(data, full_data)
+
+    def output_column(self, key, objs, full_data, values=None):
+        return self.batch(objs, full_data)
+
+
+def _frame_column(frame, field, key):
+    if isinstance(field, CompiledFields):
+        return None
+    name = getattr(field, 'attribute', None) or key
+    if name in frame.columns:
+        return frame[name]
+    return None
+
+
+class ProfiledFields(CompiledFields):
+    """
+    A compiled schema that records the call counts, cumulative time and exceptions
+    of the schema and of each of its fields in :data:`utils.profiling.stats`. Only
+    profiled schemas pay for the timing, plain :class:`CompiledFields` aren't
+    instrumented at all.
+
+    The schemas of nested dicts and of ``Nested`` and ``List(Nested)`` fields are
+    profiled as well, under ``<schema>.<key>``. The fields of the schema time the
+    nested schemas they contain.
+    """
+    def prepare_field(self, key, field):
+        from .fields import List, Nested
+        if isinstance(field, Nested):
+            field = copy.copy(field)
+            field.nested = self.profiled_schema(key, field.nested)
+        elif isinstance(field, List) and isinstance(field.container, Nested):
+            field = copy.copy(field)
+            field.container = copy.copy(field.container)
+            field.container.nested = self.profiled_schema(key, field.container.nested)
+        return field
+
+    def profiled_schema(self, key, nested):
+        schema = compile_fields(nested, self.going_in, profile='{0}.{1}'.format(self.profile, key))
+        self.field_schemas.append(schema)
+        return schema
+
+    def step_function(self, key, field):
+        return timed_field(self.profile, key, super(ProfiledFields, self).step_function(key, field))
+
+    def column_function(self, key, field):
+        return timed_field(self.profile, key, super(ProfiledFields, self).column_function(key, field))
+
+    def __call__(self, data, full_data):
+        return self._timed(super(ProfiledFields, self).__call__, data, full_data)
+
+    def batch(self, data, full_data):
+        return self._timed(super(ProfiledFields, self).batch, data, full_data)
+
+    def _timed(self, fn, data, full_data):
+        start = timer()
+        try:
+            value = fn(data, full_data)
+        except Exception as e:
+            stats.add_schema(self.profile, timer() - start, e)
+            raise
+        stats.add_schema(self.profile, timer() - start)
+        return value
+
+
+class _FrameRows(object):
+    """
+    The rows of a pandas-like frame as records, only built once a field that
+    can't work off a column iterates over them.
+    """
+    def __init__(self, frame):
+        self.frame = frame
+        self.rows = None
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __iter__(self):
+        if self.rows is None:
+            self.rows = self.frame.to_dict('records')
+        return iter(self.rows)
+
+
+def _is_list(data):
+    """
+    Returns True for the lists and tuples that are marshaled item by item.
+    Namedtuples are records, they are marshaled like any other object.
+    """
+    return isinstance(data, (list, tuple)) and not hasattr(data, '_fields')
+
+
+# Schemas can be built per request (e.g. sparse fieldsets), so the number of
+# compiled schemas that are kept is bounded.
+MAX_COMPILED_FIELDS = 1024
+
+_compiled_fields = {}
+
+# The ids of the fields dicts being compiled in each thread, see CompiledFields
+_compiling = threading.local()
+
+
+def compile_fields(fields, going_in=False, container=None, profile=None):
+    """
+    Compiles a dict of fields into a :class:`CompiledFields` marshaler. Compiled
+    schemas are cached by the identity of the fields dict, so compiling the same
+    dict again is a lookup and a check that the dict hasn't changed since. A
+    changed dict is compiled again.
+
+    :param fields: a dict of whose keys will make up the final serialized
+                   response output or internal request representation
+    :param going_in: (optional, default:False) If True the schema marshals incoming
+        requests, otherwise it marshals responses.
+    :param container: (optional) The container outbound records are built in. One of
+        ``DICT`` (the default on Python 3.7+), ``ORDERED_DICT`` (the default on older
+        interpreters), ``PAIRS`` for a tuple of key value pairs or ``RECORD`` for a
+        namedtuple with the schema's keys. The latter two are meant for internal
+        callers, not for serialization. Nested dicts in the schema use the same
+        container.
+    :param profile: (optional) If given, a :class:`ProfiledFields` is returned that
+        records its stats under this name.
+    """
+    if isinstance(fields, CompiledFields):
+        return fields
+
+    key = (id(fields), going_in, container, profile)
+    compiled = _compiled_fields.get(key)
+    # The cache holds on to the fields dict, so its id can't be reused while it is
+    # cached, but check anyway in case someone hands us a different dict.
+    if compiled is None or compiled.fields is not fields or not compiled.is_current():
+        compiled = (ProfiledFields if profile else CompiledFields)(fields, going_in, container, profile)
+        if len(_compiled_fields) >= MAX_COMPILED_FIELDS:
+            _compiled_fields.pop(next(iter(_compiled_fields)))
+        _compiled_fields[key] = compiled
+    return compiled
+
+
+def marshal(data, full_data, fields, going_in=False, batch=False, parallel=None, memo=False):
     """
     Takes raw data (in the form of a dict, list, object) and a dict of
     fields that defines the representation of the data. It transforms an internal
@@ -60,34 +455,120 @@ def marshal(data, full_data, fields, going_in=False):
     (external to internal representation) or a response (internal to external).
 
     :param fields: a dict of whose keys will make up the final serialized
-                   response output or internal request representation
+                   response output or internal request representation. A schema
+                   returned by :func:`compile_fields` is accepted as well.
     :param data: the actual object(s) from which the fields are taken from
     :param full_data: the full data in the request or the response
     :param going_in: (optional, default:False) If True we are marshaling an incoming request
         to the internal representation. If False we are marshaling a response to the external
         representation.
+    :param batch: (optional, default:False) If True a list of records (or a pandas-like
+        frame) is marshaled one field at a time, see :meth:`CompiledFields.batch`.
+    :param parallel: (optional) If True very large lists are marshaled in a pool of
+        worker processes shared by all calls with the same fields, see
+        :class:`utils.parallel.ParallelMarshaler`. A configured ``ParallelMarshaler``
+        for the fields can be passed instead.
+    :param memo: (optional, default:False) If True nested objects that appear more than
+        once in the data (by identity) are marshaled once and their record is reused,
+        see :class:`utils.memo.MarshalMemo`. Only safe for data that isn't modified
+        while it is marshaled. Doesn't apply in parallel workers.
+    """
+    if memo and not going_in:
+        with memoize():
+            return marshal(data, full_data, fields, going_in, batch, parallel)
+
+    if parallel and _is_list(data):
+        if parallel is True:
+            parallel = get_parallel_marshaler(fields, going_in, batch)
+        return parallel.marshal(data)
+
+    compiled = compile_fields(fields, going_in)
+    if batch and (_is_list(data) or hasattr(data, 'columns')):
+        return compiled.batch(data, data)
+    return compiled(data, full_data)
+
+
+def _add_server_timing(headers, elapsed):
+    headers = dict(headers or {})
+    headers['Server-Timing'] = server_timing('marshal', elapsed)
+    return headers
+
+
+# Bodies that Flask parses into request.form itself
+_FORM_MIMETYPES = ('application/x-www-form-urlencoded', 'multipart/form-data')
+
+
+def read_body(max_size=None):
+    """
+    Reads the request body without caching it on the request.
+
+    :param max_size: (optional) The maximum number of bytes to read
+    :exception RequestEntityTooLarge: If the body is longer than ``max_size``
     """
-    def make(cls):
-        if isinstance(cls, type):
-            return cls()
-        return cls
+    length = request.content_length
+    if max_size is not None and length is not None and length > max_size:
+        raise RequestEntityTooLarge()
+    if max_size is None or length is not None:
+        return request.get_data(cache=False)
+    # The length of a chunked body is only known once it has been read
+    data = request.stream.read(max_size + 1)
+    if len(data) > max_size:
+        raise RequestEntityTooLarge()
+    return data
+
+
+def _max_body_size():
+    return current_app.config.get('WINDOW_DRESSING_MAX_BODY_SIZE',
+                                  current_app.config.get('MAX_CONTENT_LENGTH'))
+
+
+def _iter_marshal_stream(compiled, records):
+    records = iter(records)
+    while True:
+        try:
+            record = next(records)
+        except StopIteration:
+            return
+        except (ValueError, UnicodeDecodeError, LookupError) as e:
+            raise BadRequest('The request body can not be parsed: {0}'.format(e))
+        yield compiled(record, record)
 
-    if isinstance(data, (list, tuple)):
-        return [marshal(d, data, fields, going_in) for d in data]
 
-    if going_in:
-        items = ((k, marshal(data, full_data, v, True)) if isinstance(v, dict)
-                                  else (k if not hasattr(v, 'attribute') else v.attribute 
-                                  if v.attribute else k, make(v).input(k, data, full_data))
-                                  for k, v in fields.items())
-        resp = dict(items)
-    else:
-        items = ((k, marshal(data, full_data, v, False) if isinstance(v, dict)
-                                  else make(v).output(k, data, full_data))
-                                  for k, v in fields.items())
-        resp = OrderedDict(items)
+def _add_vary(headers):
+    headers = dict(headers or {})
+    headers['Vary'] = 'Accept'
+    return headers
 
-    return resp
+
+def _iter_marshal(compiled, data):
+    for d in data:
+        yield compiled(d, data)
+
+
+def _iscoroutinefunction(f):
+    if sys.version_info < (3, 5):
+        return False
+    import inspect
+    return inspect.iscoroutinefunction(f)
+
+
+class ViewState(object):
+    """
+    What :class:`marshal_with` works out for a request before the view is called
+    and needs again once it returns.
+    """
+    def __init__(self):
+        self.response = None
+        self.etag = None
+        self.last_modified = None
+        self.cache_key = None
+        self.profile = False
+        self.marshal_time = 0.0
+        self.output_fields = None
+        self.output_marshaller = None
+        self.representation = None
+        self.vary = False
+        self.variant = None
 
 
 class validate_params(object):
@@ -99,16 +580,25 @@ class validate_params(object):
         self.fields = fields
 
     def __call__(self, f):
+        if _iscoroutinefunction(f):
+            from .async_support import async_validate_params
+            return async_validate_params(self, f)
+
         @functools.wraps(f)
         def wrapper(*args, **kwargs):
-            params = request.args
-            if params:
-                query_args = marshal(params, params, self.fields, going_in=True)
-                kwargs.update(query_args)
-
+            self.before(kwargs)
             return f(*args, **kwargs)
         return wrapper
 
+    def before(self, kwargs):
+        """
+        Marshals the query arguments into ``kwargs``.
+        """
+        params = request.args
+        if params:
+            query_args = compile_fields(self.fields, going_in=True)(params, params)
+            kwargs.update(query_args)
+
 
 class marshal_with(object):
     """
@@ -119,38 +609,351 @@ class marshal_with(object):
     NOTE: Because this decorator is applied on the way in an out, it needs to be the
     last in the list of all decorators applied to your function, unless you want to 
     manipulate the marshaled response emitted by this function.
+
+    Setting the app's ``WINDOW_DRESSING_PROFILE`` config value profiles the marshaling
+    of the view, see :mod:`utils.profiling`, and setting ``WINDOW_DRESSING_SERVER_TIMING``
+    as well adds the time spent marshaling as a Server-Timing header. The request and
+    response schemas are recorded as ``<module>.<view>.in`` and ``<module>.<view>.out``.
+
+    Responses are sent in the representation the client's Accept header asks
+    for, out of the app's ``WINDOW_DRESSING_REPRESENTATIONS`` (a list of
+    mimetypes in order of preference, only JSON by default), see
+    :func:`representations.negotiate_representation`. Setting ``WINDOW_DRESSING_COMPRESS``
+    compresses them for the client's Accept-Encoding, see :mod:`utils.compression`.
+
+    ``async def`` views are awaited, see :mod:`async_support`.
     """
-    def __init__(self, fields, representations=[]):
+    def __init__(self, fields, representations=None, batch=False, stream=False, etag=False,
+                 version=None, last_modified=None, cache_control=None, cache=None, sparse=False,
+                 await_values=False, parallel=None, input_fields=None, fused=False,
+                 stream_input=False, memo=False):
         """
         :param fields: A dict of whose keys will make up the final
             deserialization request input or serialized response output.
-        :param representations: (optional) A list of resource representations
-            that specify how the incoming request should be deserialization. If no 
-            representations are provided the default is to apply json deserialization.
+        :param representations: (optional) A dict of mimetypes to the resource
+            representations that deserialize request bodies of that Content-Type, or a
+            list of representations to register by their content types. They are looked
+            up in addition to the registered representations (JSON, and MessagePack or
+            CBOR if installed). Bodies without a Content-Type are decoded as JSON.
+        :param batch: (optional, default:False) If True list responses are marshaled
+            one field at a time, see :meth:`CompiledFields.batch`.
+        :param stream: (optional, default:False) If True the view returns an iterable of
+            records (e.g. a generator) that is marshaled lazily and streamed as a JSON
+            array. A streaming representation, like a :class:`StreamingJsonResource`
+            with a custom chunk size, a :class:`CsvResource` or an :class:`NdjsonResource`,
+            can be passed instead of True.
+        :param etag: (optional, default:False) If True a strong ETag is computed from the
+            serialized response and its content type and coding, and If-None-Match
+            requests that match it are answered with a 304 Not Modified.
+        :param version: (optional) A function called with the view's arguments that returns
+            a cheap version key for the resource (e.g. an updated_at timestamp). The ETag
+            is derived from it and the negotiated content type and coding before the view
+            runs, so a matching If-None-Match request skips the view, marshaling and
+            serialization altogether.
+        :param last_modified: (optional) A function called with the view's arguments that
+            returns the resource's last modification datetime, checked against
+            If-Modified-Since before the view runs.
+        :param cache_control: (optional) The Cache-Control header value sent with
+            successful responses.
+        :param cache: (optional) A :class:`~flask_window_dressing.utils.response_cache.ResponseCache`
+            that keeps the serialized responses of GET requests, so repeated requests with
+            the same arguments skip the view altogether.
+        :param sparse: (optional, default:False) If True clients can select the fields of
+            the response with the ``fields`` and ``exclude`` query parameters, which take
+            comma separated, possibly dotted, field names (``?fields=id,owner.name``).
+            Unselected fields are never evaluated.
+        :param await_values: (optional, default:False) For ``async def`` views, await the
+            awaitable values the fields pull off the response (e.g. async loaders)
+            concurrently before marshaling it, see :func:`async_support.resolve`.
+        :param parallel: (optional) If True very large list responses are marshaled in a
+            pool of worker processes, see :class:`utils.parallel.ParallelMarshaler`. A
+            configured ``ParallelMarshaler`` for the fields can be passed instead, with
+            ``serialize=True`` the workers serialize the JSON of responses with etag,
+            version, last_modified, cache_control or cache set as well. Sparse and
+            profiled responses are always marshaled in the view's process.
+        :param input_fields: (optional) The fields dict request bodies are marshaled
+            with, if it differs from ``fields``. The body isn't read at all if it is
+            empty, e.g. for views that only send data.
+        :param fused: (optional, default:False) If True responses are encoded to JSON
+            straight from the view's data with a :class:`encoder.SchemaEncoder`, without
+            building the marshaled records, and are always sent as a :class:`JsonResource`
+            response. Only applies with the standard library JSON backend outside of
+            debug mode, and to responses that aren't profiled.
+        :param stream_input: (optional, default:False) If True the request body is parsed
+            incrementally, one item of a JSON array or one line of an NDJSON body at a
+            time, and the view gets a generator of the marshaled records as ``fields``.
+            The view has to consume it before it returns.
+        :param memo: (optional, default:False) If True nested objects shared by the
+            records of a response are marshaled (or encoded) once, see
+            :func:`marshal`. Streamed responses aren't memoized.
         """
         self.fields = fields
-        self.representations = representations
+        if isinstance(representations, (list, tuple)):
+            representations = dict((representation.content_type, representation)
+                                   for representation in representations)
+        self.representations = dict((mimetype.lower(), representation) for mimetype, representation
+                                    in (representations or {}).items())
+        self.input_fields = fields if input_fields is None else input_fields
+        self.fused = fused
+        self.stream_input = stream_input
+        self.memo = memo
+        self.batch = batch
+        if stream is True:
+            stream = StreamingJsonResource()
+        self.stream = stream
+        self.etag = etag
+        self.version = version
+        self.last_modified = last_modified
+        self.cache_control = cache_control
+        self.cache = cache
+        self.sparse = sparse
+        self.await_values = await_values
+        if parallel is True:
+            parallel = ParallelMarshaler(fields, batch=batch)
+        self.parallel = parallel
+        self.conditional = bool(etag or version or last_modified or cache_control or cache)
 
     def __call__(self, f):
+        profile_name = '{0}.{1}'.format(f.__module__, f.__name__)
+        if _iscoroutinefunction(f):
+            from .async_support import async_marshal_with
+            return async_marshal_with(self, f, profile_name)
+
         @functools.wraps(f)
         def wrapper(*args, **kwargs):
-            data = request.data
-            if data:
-                if not isinstance(data, dict):
-                    if request.headers.has_key('Content-Type'):
-                        request_representation = request.headers['Content-Type']
-                        if request_representation == '' or 'application/json':
-                            default_representation = JsonResource()
-                            data = default_representation.input(data)
-                        elif request_representation in self.representations.keys():
-                            data = self.representations[request_representation].input(data)
-                fields = marshal(data, data, self.fields, going_in=True)
+            state = self.before(args, kwargs, profile_name)
+            if state.response is not None:
+                return state.response
+            return self.after(f(*args, **kwargs), state)
+        return wrapper
+
+    def before(self, args, kwargs, profile_name):
+        """
+        Runs everything that happens before the view is called: conditional and
+        cached responses, decoding and marshaling the request body (which is
+        added to ``kwargs`` as ``fields``) and picking the output schema.
+
+        Returns a :class:`ViewState`, whose ``response`` is set if the view
+        should not be called at all.
+        """
+        state = ViewState()
+        if not self.stream:
+            state.representation = negotiate_representation(request.accept_mimetypes)
+            state.vary = len(current_app.config.get('WINDOW_DRESSING_REPRESENTATIONS',
+                                                    DEFAULT_PREFERENCES)) > 1
+        encoding = choose_encoding()
+        # The content type and coding set the response's bytes apart as much as
+        # the resource's version does
+        content_type = (state.representation or self.stream).content_type
+        state.variant = content_type if encoding is None else '{0}; {1}'.format(content_type,
+                                                                                encoding)
+        if self.version is not None:
+            state.etag = make_etag(self.version(*args, **kwargs), state.variant)
+        if self.last_modified is not None:
+            state.last_modified = self.last_modified(*args, **kwargs)
+        if is_not_modified(state.etag, state.last_modified):
+            state.response = not_modified_response(state.etag, state.last_modified,
+                                                   self.cache_control)
+            return state
+
+        if self.cache is not None and request.method in ('GET', 'HEAD') and not self.stream:
+            state.cache_key = self.cache.make_key(state.representation.content_type, encoding)
+            response = self.cache.get(state.cache_key)
+            if response is not None:
+                state.response = response.make_conditional(request)
+                return state
+
+        state.profile = profiling_enabled()
+        # Looked up again, in case the fields dicts changed since the view was decorated
+        input_marshaller = compile_fields(self.input_fields, going_in=True)
+        if state.profile:
+            input_marshaller = compile_fields(self.input_fields, True, profile=profile_name + '.in')
+
+        if self.input_fields and self.stream_input:
+            records = self.stream_body(input_marshaller)
+            if records is not None:
+                kwargs.update({'fields': records})
+        elif self.input_fields:
+            data = self.decode_body()
+            if data is not None:
+                start = timer()
+                fields = input_marshaller(data, data)
+                state.marshal_time += timer() - start
                 kwargs.update({'fields': fields})
 
-            response = f(*args, **kwargs)
-            if isinstance(response, tuple):
-                data, code, headers = unpack(response)
-                return marshal(data, data, self.fields), code, headers
+        state.output_fields = self.fields
+        state.output_marshaller = compile_fields(self.fields)
+        if self.sparse:
+            state.output_fields = select_fields(self.fields, request.args.get('fields'),
+                                                request.args.get('exclude'))
+            state.output_marshaller = compile_fields(state.output_fields)
+        if state.profile:
+            state.output_marshaller = compile_fields(state.output_fields,
+                                                     profile=profile_name + '.out')
+        return state
+
+    def body_representation(self):
+        """
+        Returns the representation registered for the request body's Content-Type
+        (JSON if there is none) and the Content-Type's charset, or None if there
+        is no body, or if it is a form that Flask parses itself.
+
+        :exception UnsupportedMediaType: If no representation is registered for
+            the Content-Type
+        """
+        if request.content_length == 0:
+            return None
+        content_type = request.headers.get('Content-Type')
+        if not content_type:
+            representation = self.representations.get(JsonResource.content_type) \
+                or registered_representations[JsonResource.content_type]
+            return representation, None
+
+        mimetype, options = parse_options_header(content_type)
+        if mimetype in _FORM_MIMETYPES:
+            return None
+        mimetype = mimetype.lower()
+        representation = self.representations.get(mimetype) \
+            or registered_representations.get(mimetype)
+        if representation is None:
+            raise UnsupportedMediaType()
+        return representation, options.get('charset')
+
+    def decode_body(self):
+        """
+        Decodes the request body with the representation registered for its
+        Content-Type, see :meth:`body_representation`. Returns None if there is
+        no body to decode.
+
+        The body is read straight off the request stream without being cached
+        on the request. It may be at most ``WINDOW_DRESSING_MAX_BODY_SIZE``
+        bytes, which defaults to the app's ``MAX_CONTENT_LENGTH``.
+
+        :exception RequestEntityTooLarge: If the body is too large
+        :exception BadRequest: If the body can't be parsed
+        """
+        body = self.body_representation()
+        if body is None:
+            return None
+        representation, charset = body
+        data = read_body(_max_body_size())
+        if not data:
+            return None
+        try:
+            return representation.input_bytes(data, charset)
+        except (ValueError, LookupError) as e:
+            raise BadRequest('The request body can not be parsed: {0}'.format(e))
+
+    def stream_body(self, input_marshaller):
+        """
+        Returns a generator of the marshaled records of the request body, which
+        is parsed incrementally off the request stream (the items of a JSON
+        array, or the lines of an NDJSON body), or None if there is no body.
+        Every record is marshaled as its own ``full_data``.
+
+        :param input_marshaller: The compiled schema records are marshaled with
+        :exception RequestEntityTooLarge: If the body is too large, raised while
+            the records are iterated.
+        :exception BadRequest: If the body can't be parsed, raised while the
+            records are iterated.
+        """
+        body = self.body_representation()
+        if body is None:
+            return None
+        representation, charset = body
+        if charset is not None:
+            # The stream is only decoded once the records are iterated
+            try:
+                codecs.lookup(charset)
+            except LookupError as e:
+                raise BadRequest('The request body can not be parsed: {0}'.format(e))
+        max_size = _max_body_size()
+        if max_size is not None and (request.content_length or 0) > max_size:
+            raise RequestEntityTooLarge()
+        stream = BoundedReader(request.stream, max_size)
+        return _iter_marshal_stream(input_marshaller, representation.input_stream(stream, charset))
+
+    def after(self, response, state):
+        """
+        Marshals (and, depending on the options, serializes) what the view
+        returned.
+
+        :param response: The view's return value
+        :param state: The :class:`ViewState` returned by :meth:`before`
+        """
+        etag, last_modified = state.etag, state.last_modified
+        output_marshaller = state.output_marshaller
+        if self.stream:
+            data, code, headers = unpack(response)
+            records = _iter_marshal(output_marshaller, data)
+            response = self.stream.output_marshalled(records, code, headers, state.output_fields)
+            return self.add_cache_headers(response, etag, last_modified)
+        timing = state.profile and server_timing_enabled()
+        parallel = None
+        if self.parallel is not None and not state.profile \
+                and state.output_fields is self.fields:
+            parallel = self.parallel
+        representation = state.representation
+        fused = self.fused and not state.profile and isinstance(representation, JsonResource) \
+            and not current_app.debug and representation.get_backend().name == 'json'
+        serialize = parallel is not None and parallel.serialize \
+            and isinstance(representation, JsonResource) and not current_app.debug
+        if self.conditional or fused or serialize:
+            data, code, headers = unpack(response)
+            if state.vary:
+                headers = _add_vary(headers)
+            if serialize and parallel.accepts(data):
+                dumped = parallel.dumps(data, representation.get_backend())
+                response = representation.output_dumped(dumped, code, headers)
+            elif fused:
+                from .encoder import compile_encoder
+                dumped = compile_encoder(state.output_fields).encode(data, self.memo)
+                response = representation.output_dumped(dumped, code, headers)
             else:
-                return marshal(response, response, self.fields)
-        return wrapper
+                start = timer()
+                marshalled = marshal(data, data, output_marshaller, batch=self.batch,
+                                     parallel=parallel, memo=self.memo)
+                state.marshal_time += timer() - start
+                if timing:
+                    headers = _add_server_timing(headers, state.marshal_time)
+                response = representation.output_marshalled(marshalled, code, headers,
+                                                            state.output_fields)
+            if self.etag and etag is None and response.status_code == 200:
+                etag = make_etag(response.get_data(), state.variant)
+            response = self.add_cache_headers(response, etag, last_modified)
+            # HEAD responses are never compressed, so they can't be cached under
+            # the key of the content coding the client accepts
+            if state.cache_key is not None and response.status_code == 200 \
+                    and request.method == 'GET':
+                self.cache.set(state.cache_key, response)
+            if is_not_modified(etag, last_modified):
+                return not_modified_response(etag, last_modified, self.cache_control)
+            return response
+        # Plain JSON data is handed back to Flask, unless the response has to be
+        # built by the representation, e.g. to be compressed
+        negotiated = not isinstance(state.representation, JsonResource) or compression_enabled()
+        if isinstance(response, tuple) or timing or negotiated or state.vary:
+            data, code, headers = unpack(response)
+            start = timer()
+            marshalled = marshal(data, data, output_marshaller, batch=self.batch,
+                                 parallel=parallel, memo=self.memo)
+            state.marshal_time += timer() - start
+            if timing:
+                headers = _add_server_timing(headers, state.marshal_time)
+            if state.vary:
+                headers = _add_vary(headers)
+            if negotiated:
+                return state.representation.output_marshalled(marshalled, code, headers,
+                                                              state.output_fields)
+            return marshalled, code, headers
+        else:
+            return marshal(response, response, output_marshaller, batch=self.batch,
+                           parallel=parallel, memo=self.memo)
+
+    def add_cache_headers(self, response, etag=None, last_modified=None):
+        """
+        Adds the caching policy's headers to successful responses.
+        """
+        if 200 <= response.status_code < 300:
+            add_cache_headers(response, etag, last_modified, self.cache_control)
+        return response
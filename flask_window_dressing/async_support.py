@@ -0,0 +1,210 @@
+"""
+    Support for ``async def`` views (Flask 2+, Python 3.5+).
+
+    :func:`marshal_with` and :func:`validate_params` wrap coroutine views with the
+    wrappers in this module, which await the view instead of marshaling the
+    coroutine it returns. With ``await_values`` set, awaitable field values (e.g.
+    async loaders) are awaited concurrently across the fields and rows of the
+    response before it is marshaled. Large list responses are marshaled in a
+    thread, so that the event loop isn't blocked by the CPU bound work.
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+
+from flask import current_app
+
+from . import _is_list
+from .fields import get_value, is_indexable_but_not_string
+from .utils import unpack
+
+# List responses with at least this many rows are marshaled in a thread, unless
+# the app sets ``WINDOW_DRESSING_ASYNC_OFFLOAD_SIZE``. Set it to None to never
+# offload.
+DEFAULT_OFFLOAD_SIZE = 1000
+
+
+def async_marshal_with(decorator, f, profile_name):
+    """
+    Wraps a coroutine view with a :class:`marshal_with` decorator.
+    """
+    @functools.wraps(f)
+    async def wrapper(*args, **kwargs):
+        state = decorator.before(args, kwargs, profile_name)
+        if state.response is not None:
+            return state.response
+        response = await f(*args, **kwargs)
+        if decorator.await_values and not decorator.stream:
+            response = await resolve_response(response, state.output_fields)
+        if not decorator.stream and _should_offload(response):
+            return await run_in_thread(decorator.after, response, state)
+        return decorator.after(response, state)
+    return wrapper
+
+
+def async_validate_params(decorator, f):
+    """
+    Wraps a coroutine view with a :class:`validate_params` decorator.
+    """
+    @functools.wraps(f)
+    async def wrapper(*args, **kwargs):
+        decorator.before(kwargs)
+        return await f(*args, **kwargs)
+    return wrapper
+
+
+def _should_offload(response):
+    size = current_app.config.get('WINDOW_DRESSING_ASYNC_OFFLOAD_SIZE', DEFAULT_OFFLOAD_SIZE)
+    if size is None:
+        return False
+    data = unpack(response)[0]
+    return _is_list(data) and len(data) >= size
+
+
+async def run_in_thread(fn, *args):
+    """
+    Runs ``fn(*args)`` in the event loop's default executor. The app and request
+    contexts are carried over to the thread.
+    """
+    context = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(context.run, fn, *args))
+
+
+async def resolve_response(response, fields):
+    """
+    Resolves the awaitable values in the data of a view's return value, see
+    :func:`resolve`.
+    """
+    if isinstance(response, tuple):
+        data, code, headers = unpack(response)
+        return await resolve(data, fields), code, headers
+    return await resolve(response, fields)
+
+
+async def resolve(data, fields):
+    """
+    Returns the data with the awaitable values that the fields would pull awaited.
+    Values are looked up by each field's attribute (or key). For dotted names the
+    first part is looked up. Nested schemas are resolved as well. All
+    awaitables are awaited concurrently.
+
+    The data is never modified. Dicts that held awaitables are copied and other
+    objects are wrapped in a proxy that holds the awaited values.
+
+    :param data: An object, or a list of objects
+    :param fields: The fields dict the data will be marshaled with
+    """
+    if inspect.isawaitable(data):
+        data = await data
+    if data is None:
+        return None
+    if _is_list(data):
+        return list(await asyncio.gather(*[resolve(d, fields) for d in data]))
+
+    names = []
+    originals = []
+    pending = []
+    for name, nested, checks in _sources(fields):
+        if checks is not None and not any(check(data) for check in checks):
+            continue
+        value = get_value(name, data)
+        if value is None:
+            continue
+        if inspect.isawaitable(value) or nested is not None:
+            names.append(name)
+            originals.append(value)
+            pending.append(_resolve_value(value, nested))
+    if not pending:
+        return data
+
+    values = await asyncio.gather(*pending)
+    resolved = dict((name, value) for name, original, value in zip(names, originals, values)
+                    if value is not original)
+    if not resolved:
+        return data
+    if isinstance(data, dict):
+        copy = dict(data)
+        copy.update(resolved)
+        return copy
+    if is_indexable_but_not_string(data):
+        if not hasattr(data, 'items'):
+            return data
+        copy = dict(data.items())
+        copy.update(resolved)
+        return copy
+    return ResolvedObject(data, resolved)
+
+
+async def _resolve_value(value, nested):
+    if inspect.isawaitable(value):
+        value = await value
+    if nested is not None:
+        value = await resolve(value, nested)
+    return value
+
+
+def _sources(fields):
+    """
+    Returns the ``(name, nested fields, present checks)`` of the values the fields
+    pull off an object. Nested dicts pull off the same object. The checks are None
+    if a field always pulls the value, otherwise it is only pulled if one of the
+    fields' ``present`` checks passes.
+    """
+    sources = {}
+    for key, field in fields.items():
+        if isinstance(field, dict):
+            for name, nested, checks in _sources(field):
+                _add_source(sources, name, nested, checks)
+            continue
+        checks = None
+        if isinstance(field, type):
+            name, nested = key, None
+        elif getattr(field, 'prefetch', None) is not None:
+            continue
+        else:
+            name = getattr(field, 'attribute', None) or key
+            nested = getattr(field, 'nested', None)
+            if nested is None:
+                nested = getattr(getattr(field, 'container', None), 'nested', None)
+            present = getattr(field, '_present_check', None)
+            if present is not None:
+                checks = [present]
+        if not isinstance(name, str):
+            continue
+        if '.' in name:
+            name, nested = name.split('.')[0], None
+        _add_source(sources, name, nested, checks)
+    return [(name, nested, checks) for name, (nested, checks) in sources.items()]
+
+
+def _add_source(sources, name, nested, checks):
+    if name not in sources:
+        sources[name] = (nested, checks)
+        return
+    first, first_checks = sources[name]
+    if first_checks is not None and checks is not None:
+        checks = first_checks + checks
+    else:
+        checks = None
+    sources[name] = (first, checks)
+
+
+class ResolvedObject(object):
+    """
+    A proxy of an object whose awaitable attributes have been awaited. The
+    awaited values are its own attributes, everything else is looked up on the
+    wrapped object.
+    """
+    def __init__(self, obj, values):
+        self.__dict__.update(values)
+        self.__dict__['_resolved_obj'] = obj
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__['_resolved_obj'], name)
+
+    def __marshallable__(self):
+        data = dict(getattr(self._resolved_obj, '__dict__', {}))
+        data.update((k, v) for k, v in self.__dict__.items() if k != '_resolved_obj')
+        return data
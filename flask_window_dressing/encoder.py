@@ -0,0 +1,213 @@
+"""
+    A JSON encoder that writes a response straight from the source objects.
+
+    Marshaling a response and then serializing it walks the data twice and
+    builds the whole marshaled tree in between. A :class:`SchemaEncoder`
+    runs each field and encodes its value right away, with the keys of the
+    schema encoded once up front, so nested records are never built as dicts.
+    The output is byte for byte the same as marshaling the data and dumping it
+    with the standard library backend of :class:`JsonResource` (outside of
+    debug mode).
+"""
+import json
+try:
+    from json.encoder import encode_basestring_ascii
+except ImportError:
+    encode_basestring_ascii = json.dumps
+
+import six
+
+from . import CompiledFields, _is_list, compile_fields
+from .fields import List, Nested, Raw, is_indexable_but_not_string
+from .representations.json_backends import _default
+from .utils.memo import current_memo, memoize
+
+_encode = json.JSONEncoder(default=_default).encode
+
+_INFINITY = float('inf')
+
+
+def _encode_float(value):
+    if value != value:
+        return 'NaN'
+    if value == _INFINITY:
+        return 'Infinity'
+    if value == -_INFINITY:
+        return '-Infinity'
+    return float.__repr__(value)
+
+
+def encode_value(value):
+    """
+    Encodes a marshaled value to JSON text the way ``json.dumps`` does.
+    """
+    cls = type(value)
+    if cls is six.text_type or cls is str:
+        return encode_basestring_ascii(value)
+    if value is None:
+        return 'null'
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if cls is int:
+        return int.__repr__(value)
+    if cls is float:
+        return _encode_float(value)
+    return _encode(value)
+
+
+def _encode_key(key):
+    # Lets json render the key, which also covers int, float and bool keys
+    return json.dumps({key: None})[1:-len('null}')]
+
+
+def _plain_output(field):
+    return type(field).output is Raw.output and field._accessor is None \
+        and field._present_check is None and field.prefetch is None
+
+
+class SchemaEncoder(object):
+    """
+    Encodes data to JSON with a fields dict, without building the marshaled
+    records. Use :func:`compile_encoder` to get one, so that encoders are
+    shared.
+    """
+    def __init__(self, fields):
+        """
+        :param fields: The fields dict, or a schema compiled by :func:`compile_fields`
+        """
+        self.compiled = compile_fields(fields)
+        # Prefetched values are loaded for whole lists by CompiledFields.batch
+        self.fused = not self.compiled.prefetches
+        self.encode_one = self._generate()
+
+    def _generate(self):
+        namespace = {}
+        pieces = []
+        for i, (out_key, key, field) in enumerate(self.compiled.steps):
+            prefix = _encode_key(out_key)
+            pieces.append(repr(('{' if i == 0 else ', ') + prefix))
+            namespace['_k%d' % i] = key
+            namespace['_e%d' % i] = self.step_encoder(key, field)
+            pieces.append('_e%d(_k%d, data, full_data)' % (i, i))
+        if pieces:
+            pieces.append("'}'")
+        else:
+            pieces.append("'{}'")
+        source = 'def encode_one(data, full_data):\n    return \'\'.join((%s,))\n' % \
+            ', '.join(pieces)
+        exec(compile(source, '<schema encoder>', 'exec'), namespace)
+        return namespace['encode_one']
+
+    def step_encoder(self, key, field):
+        """
+        Returns the function that marshals and encodes one field of a record.
+        """
+        if isinstance(field, CompiledFields):
+            encode = compile_encoder(field).encode_one
+            return lambda key, data, full_data: encode(data, full_data)
+
+        if isinstance(field, Nested) and _plain_output(field) \
+                and type(field).output_value is Nested.output_value:
+            nested = compile_encoder(field.nested)
+            if nested.fused:
+                return self._nested_encoder(field, nested)
+
+        if isinstance(field, List) and _plain_output(field) \
+                and type(field).output_value is List.output_value:
+            container = field.container
+            if isinstance(container, Nested) and _plain_output(container) \
+                    and type(container).output_value is Nested.output_value:
+                nested = compile_encoder(container.nested)
+                if nested.fused:
+                    return self._list_encoder(field, nested)
+
+        output = field.output
+        return lambda key, data, full_data: encode_value(output(key, data, full_data))
+
+    @staticmethod
+    def _nested_encoder(field, nested):
+        get_output_value = field.get_output_value
+        output_value = field.output_value
+
+        def encode_nested(key, data, full_data):
+            value = get_output_value(key, data)
+            if value is None:
+                return encode_value(output_value(key, value, data, full_data))
+            memo = current_memo()
+            if memo is not None:
+                return memo.encode(value, full_data, nested)
+            return nested.encode_data(value, full_data)
+        return encode_nested
+
+    @staticmethod
+    def _list_encoder(field, nested):
+        get_output_value = field.get_output_value
+        output = field.output
+        container_output_value = field.container.output_value
+
+        def encode_list(key, data, full_data):
+            value = get_output_value(key, data)
+            if value is None or not is_indexable_but_not_string(value) or isinstance(value, dict):
+                return encode_value(output(key, data, full_data))
+            memo = current_memo()
+            encode_data = nested.encode_data if memo is None else \
+                lambda item, full_data: memo.encode(item, full_data, nested)
+            items = []
+            for idx, item in enumerate(value):
+                if item is None:
+                    items.append(encode_value(container_output_value(idx, item, value, full_data)))
+                else:
+                    items.append(encode_data(item, full_data))
+            return '[' + ', '.join(items) + ']'
+        return encode_list
+
+    def encode_data(self, data, full_data):
+        """
+        Encodes data the way marshaling it with the schema would, to JSON text.
+
+        :param data: The object or list of objects to encode
+        :param full_data: The full data in the response
+        """
+        if not self.fused:
+            return encode_value(self.compiled(data, full_data))
+        if _is_list(data):
+            encode_one = self.encode_one
+            return '[' + ', '.join([encode_one(d, data) for d in data]) + ']'
+        return self.encode_one(data, full_data)
+
+    def encode(self, data, memo=False):
+        """
+        Encodes a view's data to JSON. Returns bytes.
+
+        :param data: The object or list of objects to encode
+        :param memo: (optional, default:False) If True nested objects that appear
+            more than once are encoded once, see :class:`utils.memo.MarshalMemo`.
+        """
+        if memo:
+            with memoize():
+                return self.encode_data(data, data).encode('utf-8')
+        return self.encode_data(data, data).encode('utf-8')
+
+
+# Schemas can be built per request (e.g. sparse fieldsets), so the number of
+# encoders that are kept is bounded.
+MAX_ENCODERS = 1024
+
+_encoders = {}
+
+
+def compile_encoder(fields):
+    """
+    Returns the :class:`SchemaEncoder` for a fields dict (or compiled schema).
+    Encoders are cached by the identity of the fields, like :func:`compile_fields`.
+    """
+    key = id(fields)
+    encoder = _encoders.get(key)
+    if encoder is None or encoder.compiled is not compile_fields(fields):
+        encoder = SchemaEncoder(fields)
+        if len(_encoders) >= MAX_ENCODERS:
+            _encoders.pop(next(iter(_encoders)))
+        _encoders[key] = encoder
+    return encoder
@@ -1,4 +1,7 @@
-from decimal import Decimal as MyDecimal, ROUND_HALF_EVEN
+from datetime import datetime as _datetime
+from decimal import Context, Decimal as MyDecimal, ROUND_HALF_EVEN
+from operator import attrgetter, itemgetter
+from string import Formatter
 from dateutil import parser
 import pytz
 import six
@@ -7,9 +10,19 @@ try:
 except ImportError:
     # python3
     from urllib.parse import urlparse, urlunparse
-from flask import url_for
+from flask import current_app, has_request_context, request, url_for
 
-from . import marshal
+from . import marshal, compile_fields
+from .utils.memo import current_memo
+
+try:
+    #noinspection PyUnresolvedReferences
+    from collections import OrderedDict
+except ImportError:
+    from .utils.ordereddict import OrderedDict
+
+# datetime.fromisoformat is only available from Python 3.7 on
+_fromisoformat = getattr(_datetime, 'fromisoformat', None)
 
 ##
 # This source is based off of flask-restful
@@ -54,20 +67,72 @@ def is_indexable_but_not_string(obj):
     return not hasattr(obj, "strip") and hasattr(obj, "__getitem__")
 
 
+class _KeyGetter(object):
+    """
+    Pulls a single key off an object. Whether an object is read by item or by
+    attribute is decided once per type and cached, so after the first object of a
+    type the getter goes straight to ``operator.itemgetter``/``attrgetter``.
+    """
+    def __init__(self, key):
+        self.key = key
+        self.item = itemgetter(key)
+        self.attr = attrgetter(key) if isinstance(key, six.string_types) else None
+        self.strategies = {}
+
+    def __call__(self, obj, default=None):
+        try:
+            by_item = self.strategies[type(obj)]
+        except KeyError:
+            # Namedtuples are indexable, but their fields are read by name
+            by_item = self.strategies[type(obj)] = is_indexable_but_not_string(obj) and not (
+                self.attr is not None and hasattr(obj, '_fields'))
+
+        if by_item:
+            try:
+                return self.item(obj)
+            except KeyError:
+                return default
+        if self.attr is None:
+            return default
+        try:
+            return self.attr(obj)
+        except AttributeError:
+            return default
+
+
+def make_accessor(key):
+    """
+    Builds a callable that pulls the value for ``key`` off an object. Dotted keys
+    (``owner.address.city``) are split once into a chain of getters. The callable
+    takes the object and an optional default, like :func:`get_value`.
+    """
+    if type(key) == int:
+        return _KeyGetter(key)
+
+    getters = [_KeyGetter(k) for k in key.split('.')]
+    if len(getters) == 1:
+        return getters[0]
+
+    def accessor(obj, default=None):
+        for getter in getters:
+            obj = getter(obj, default)
+        return obj
+    return accessor
+
+
+_accessors = {}
+
+
 def get_value(key, obj, default=None):
     """Helper for pulling a keyed value off various types of objects"""
     if type(key) == int:
         return _get_value_for_key(key, obj, default)
-    else:
-        return _get_value_for_keys(key.split('.'), obj, default)
-
 
-def _get_value_for_keys(keys, obj, default):
-    if len(keys) == 1:
-        return _get_value_for_key(keys[0], obj, default)
-    else:
-        return _get_value_for_keys(
-            keys[1:], _get_value_for_key(keys[0], obj, default), default)
+    try:
+        accessor = _accessors[key]
+    except KeyError:
+        accessor = _accessors[key] = make_accessor(key)
+    return accessor(obj, default)
 
 
 def _get_value_for_key(key, obj, default):
@@ -105,7 +170,13 @@ class Raw(object):
     data does not need to be formatted before being serialized. Fields should
     throw a MarshallingException in case of parsing problem.
     """
-    def __init__(self, default=None, attribute=None, input_required=False, validate=None):
+    # How expensive pulling the field's value is. Within a record cheaper fields are
+    # evaluated first, so that a marshaling error in a cheap field is raised before
+    # expensive values (e.g. lazy loaded relationships) are loaded.
+    cost = 1
+
+    def __init__(self, default=None, attribute=None, input_required=False, validate=None,
+                 cost=None, present=None, prefetch=None):
         """
         :param default: (optional) A static default value or function that creates a default
             value based off of passed in values. The default function is called with the specific
@@ -118,11 +189,65 @@ class Raw(object):
         :param validate: (optional) A function that validates the data provided. The default function 
             is called with the specific field key and the local field object as well as the full data of 
             all the fields currently being marshaled. The function needs to return True or False.
+        :param cost: (optional) Overrides the class' ``cost`` of the field.
+        :param present: (optional) A cheap check of whether the field has a value, as a
+            (dotted) key or a function called with the object. If the check is falsy the
+            field is marshaled as if its value was None, without pulling the value. E.g.
+            ``Nested(owner_fields, allow_null=True, present='owner_id')`` doesn't load an
+            ORM relationship when the foreign key is null.
+        :param prefetch: (optional) A function that bulk loads the field's values for a
+            list of objects, returning a list of values in the same order. When a list is
+            marshaled it is called once for the whole list instead of pulling the value
+            from every object, so marshaling N objects doesn't fan out into N loads. It
+            takes precedence over ``present``.
         """
         self.attribute = attribute
         self.default = default
         self.input_required = input_required
         self.validate = validate
+        if cost is not None:
+            self.cost = cost
+        self.present = present
+        self.prefetch = prefetch
+
+    @property
+    def attribute(self):
+        return self._attribute
+
+    @attribute.setter
+    def attribute(self, attribute):
+        self._attribute = attribute
+        self._accessor = make_accessor(attribute) if attribute is not None else None
+
+    @property
+    def present(self):
+        return self._present
+
+    @present.setter
+    def present(self, present):
+        self._present = present
+        if present is None or hasattr(present, '__call__'):
+            self._present_check = present
+        else:
+            self._present_check = make_accessor(present)
+
+    def get_output_value(self, key, obj):
+        """
+        Pulls the value to marshal out for the given key from the object, reading
+        the field's attribute instead of the key if one was set. Uses the field's
+        ``prefetch`` function if it has one and returns None without pulling the
+        value if the field's ``present`` check fails.
+
+        :param key: The field representation key
+        :param obj: The local data object to pull the value from
+        """
+        if self.prefetch is not None:
+            return self.prefetch([obj])[0]
+        if self._present_check is not None and not self._present_check(obj):
+            return None
+        if self._accessor is None:
+            return get_value(key, obj)
+        return self._accessor(obj)
 
     def format(self, value):
         """
@@ -154,8 +279,19 @@ class Raw(object):
         :param full_data: The full data object with all fields
         :exception MarshallingException: In case of formatting problem
         """
-        value = get_value(key if self.attribute is None else self.attribute, obj)
+        return self.output_value(key, self.get_output_value(key, obj), obj, full_data)
 
+    def output_value(self, key, value, obj, full_data):
+        """
+        Applies the marshaling rules of :meth:`output` to a value that has
+        already been pulled from the object.
+
+        :param key: The field representation key
+        :param value: The value pulled from the object
+        :param obj: The local data object the value was pulled from
+        :param full_data: The full data object with all fields
+        :exception MarshallingException: In case of formatting problem
+        """
         if value is None:
             if hasattr(self.default, '__call__'):
                 return self.default(key, obj, full_data)
@@ -168,6 +304,81 @@ class Raw(object):
 
         return self.format(value)
 
+    def output_column(self, key, objs, full_data, values=None):
+        """
+        Marshals this field for a whole list of objects at once and returns the
+        list of external values. The column of values is pulled in one pass and
+        formatted in a tight loop. Fields that override :meth:`output` are
+        marshaled object by object.
+
+        :param key: The field representation key
+        :param objs: The local data objects to pull the values from
+        :param full_data: The full data object with all fields
+        :param values: (optional) The column of values, if it was already pulled
+            from the objects or prefetched. NumPy arrays and pandas-like columns of
+            numbers are handed to :meth:`format_column` as is.
+        :exception MarshallingException: In case of formatting problem
+        """
+        if type(self).output is not Raw.output:
+            output = self.output
+            return [output(key, obj, full_data) for obj in objs]
+
+        if values is None:
+            accessor = self._accessor
+            if accessor is None or self._present_check is not None:
+                values = [self.get_output_value(key, obj) for obj in objs]
+            else:
+                values = [accessor(obj) for obj in objs]
+
+        if not self.formats_values:
+            output_value = self.output_value
+            return [output_value(key, value, obj, full_data)
+                    for value, obj in zip(values, objs)]
+
+        return self.format_values(values)
+
+    @property
+    def formats_values(self):
+        """
+        True if this field's output only depends on the value it pulled, so that
+        a whole column of values can be handed to :meth:`format_values`.
+        """
+        cls = type(self)
+        return cls.output is Raw.output and cls.output_value is Raw.output_value \
+            and not self.validate and not hasattr(self.default, '__call__')
+
+    def format_values(self, values):
+        """
+        Formats a column of pulled values, any of which may be None and get the
+        default.
+
+        :param values: A list, NumPy array or pandas-like column of values
+        :exception MarshallingException: In case of formatting problem
+        """
+        # Numeric arrays can't hold None, so the whole column can be formatted
+        if getattr(getattr(values, 'dtype', None), 'kind', None) in ('b', 'i', 'u', 'f'):
+            return self.format_column(values)
+
+        if hasattr(values, 'tolist'):
+            values = values.tolist()
+        default = self.default
+        format_value = self.format
+        return [default if value is None else format_value(value) for value in values]
+
+    def format_column(self, values):
+        """
+        Formats a column of values, none of which are None. Formats every value
+        with :meth:`format` by default, fields that can convert a whole NumPy
+        array at once override this.
+
+        :param values: A list, NumPy array or pandas-like column of values
+        :exception MarshallingException: In case of formatting problem
+        """
+        if hasattr(values, 'tolist'):
+            values = values.tolist()
+        format_value = self.format
+        return [format_value(value) for value in values]
+
     def input(self, key, obj, full_data):
         """
         This function takes an external representation and applies the marshaling
@@ -208,27 +419,77 @@ class Nested(Raw):
         with null keys, if a nested dictionary has all-null keys
     """
 
+    cost = 10
+
     def __init__(self, nested, allow_null=False, **kwargs):
         self.nested = nested
         self.allow_null = allow_null
         super(Nested, self).__init__(**kwargs)
 
-    def output(self, key, obj):
-        value = get_value(key if self.attribute is None else self.attribute, obj)
+    @property
+    def nested(self):
+        return self._nested
+
+    @nested.setter
+    def nested(self, nested):
+        self._nested = nested
+        self._compiled = None
+
+    def compile_nested(self):
+        """
+        Compiles the nested fields and keeps the schema on the field, so rows are
+        marshaled without looking it up again. Schemas containing the field call
+        this once per marshal call to pick up changes to the nested dict.
+        """
+        self._compiled = compile_fields(self._nested)
+        return self._compiled
+
+    @property
+    def prefetches(self):
+        """
+        True if the nested schema has fields with a ``prefetch`` function, in which
+        case lists containing the field are marshaled a column at a time.
+        """
+        return self._compiled is not None and self._compiled.prefetches
+
+    def output_value(self, key, value, obj, full_data):
         if self.allow_null and value is None:
             return None
 
-        return marshal(value, self.nested)
+        compiled = self._compiled or self.compile_nested()
+        memo = current_memo()
+        if memo is not None and value is not None:
+            return memo.marshal(value, full_data, compiled)
+        return compiled(value, full_data)
+
+    def output_column(self, key, objs, full_data, values=None):
+        if values is None:
+            values = [self.get_output_value(key, obj) for obj in objs]
+        elif hasattr(values, 'tolist'):
+            values = values.tolist()
+
+        compiled = self._compiled or self.compile_nested()
+        memo = current_memo()
+        batch = compiled.batch if memo is None else \
+            lambda values, full_data: memo.batch(values, full_data, compiled)
+        if not self.allow_null:
+            return batch(values, full_data)
+
+        present = batch([value for value in values if value is not None], full_data)
+        present = iter(present)
+        return [None if value is None else next(present) for value in values]
 
-    def input(self, key, obj):
+    def input(self, key, obj, full_data):
         value = get_value(key, obj)
         if self.allow_null and value is None:
             return None
 
-        return marshal(value, self.nested, True)
+        return marshal(value, full_data, self.nested, True)
 
 
 class List(Raw):
+    cost = 10
+
     def __init__(self, cls_or_instance, **kwargs):
         super(List, self).__init__(**kwargs)
         if isinstance(cls_or_instance, type):
@@ -244,8 +505,7 @@ class List(Raw):
                                            "flask_restful.fields.Raw")
             self.container = cls_or_instance
 
-    def output(self, key, data, full_data):
-        value = get_value(key if self.attribute is None else self.attribute, data)
+    def output_value(self, key, value, data, full_data):
         if value is None:
             if hasattr(self.default, '__call__'):
                 return self.default(key, data, full_data)
@@ -254,10 +514,74 @@ class List(Raw):
         # we cannot really test for external dict behavior
         if is_indexable_but_not_string(value) and not isinstance(value, dict):
             # Convert all instances in typed list to container type
-            return [self.container.output(idx, value, full_data) for idx, val
-                    in enumerate(value)]
+            return self.output_items(value, full_data)
 
-        return [marshal(value, self.container.nested)]
+        return [marshal(value, full_data, self.container.nested)]
+
+    @property
+    def prefetches(self):
+        return getattr(self.container, 'prefetches', False)
+
+    def _marshals_items(self):
+        """
+        True if the container marshals the items themselves, so that all items can
+        be handed to it at once.
+        """
+        container = self.container
+        return container._accessor is None and container._present_check is None \
+            and container.prefetch is None
+
+    def output_items(self, items, full_data):
+        """
+        Converts the outgoing items with the container field. Containers whose
+        output only depends on the item are formatted as one column, and the items
+        of a ``Nested`` container are marshaled in one batch of the nested schema.
+        """
+        container = self.container
+        if self._marshals_items():
+            if container.formats_values:
+                return container.format_values(items)
+            if isinstance(container, Nested) and type(container).output is Raw.output:
+                if len(items) == 0:
+                    return []
+                return container.output_column(None, items, full_data, values=items)
+        return [container.output(idx, items, full_data) for idx, val
+                in enumerate(items)]
+
+    def output_column(self, key, objs, full_data, values=None):
+        """
+        Marshals the lists of a whole column of objects. The items of all the lists
+        of a ``List(Nested)`` column are marshaled in one batch of the nested schema,
+        so its prefetched fields are loaded once for the column.
+        """
+        container = self.container
+        if not (isinstance(container, Nested) and type(container).output is Raw.output
+                and self._marshals_items()):
+            return super(List, self).output_column(key, objs, full_data, values)
+
+        if values is None:
+            values = [self.get_output_value(key, obj) for obj in objs]
+        elif hasattr(values, 'tolist'):
+            values = values.tolist()
+
+        lists = [value is not None and is_indexable_but_not_string(value)
+                 and not isinstance(value, dict) for value in values]
+        items = [item for value, is_list in zip(values, lists) if is_list for item in value]
+        records = iter(container.output_column(None, items, full_data, values=items)
+                       if items else ())
+        return [[next(records) for item in value] if is_list
+                else self.output_value(key, value, obj, full_data)
+                for value, obj, is_list in zip(values, objs, lists)]
+
+    def input_items(self, items, full_data):
+        """
+        Converts the incoming items to the container type. Containers that can
+        parse a whole column at once (``input_values``) get all items in one call.
+        """
+        if hasattr(self.container, 'input_values'):
+            return self.container.input_values(items)
+        return [self.container.input(idx, items, full_data) for idx, val
+                in enumerate(items)]
 
     def input(self, key, data, full_data):
         value = get_value(key, data)
@@ -269,10 +593,9 @@ class List(Raw):
         # we cannot really test for external dict behavior
         if is_indexable_but_not_string(value) and not isinstance(value, dict):
             # Convert all instances in typed list to container type
-            return [self.container.input(idx, value, full_data) for idx, val
-                    in enumerate(value)]
+            return self.input_items(value, full_data)
 
-        return [marshal(value, self.container.nested)]
+        return [marshal(value, full_data, self.container.nested, True)]
 
 
 class String(Raw):
@@ -295,21 +618,80 @@ class Integer(Raw):
         except ValueError as ve:
             raise MarshallingException(ve)
 
+    def format_column(self, values):
+        if values.dtype.kind in ('b', 'i', 'u'):
+            return values.astype('int64').tolist()
+        return super(Integer, self).format_column(values)
+
 
 class Boolean(Raw):
     def format(self, value):
         return bool(value)
 
+    def format_column(self, values):
+        return values.astype(bool).tolist()
+
+
+_MISSING = object()
+
 
 class FormattedString(Raw):
+    """
+    Formats a string with values of the object, like ``"{name} <{email}>"``.
+
+    The string is parsed once into literal and field segments, fields are
+    pulled off the object with the same accessors as :func:`get_value` and
+    (dotted) field names are followed through items and attributes. Strings
+    with positional, indexed or nested fields are formatted with
+    ``str.format`` as a whole.
+    """
+    cost = 5
+
     def __init__(self, src_str):
         super(FormattedString, self).__init__()
         self.src_str = six.text_type(src_str)
+        self.segments = self._parse(self.src_str)
+
+    @staticmethod
+    def _parse(src_str):
+        """
+        Returns the ``(literal, field_name, accessor, conversion, format_spec)``
+        segments of the string, or None if it can't be formatted segment by segment.
+        """
+        segments = []
+        for literal, field_name, format_spec, conversion in Formatter().parse(src_str):
+            if field_name is None:
+                segments.append((literal, None, None, None, None))
+                continue
+            if not field_name or field_name[0].isdigit() or '[' in field_name \
+                    or '{' in format_spec or conversion not in (None, 'r', 's'):
+                return None
+            segments.append((literal, field_name, make_accessor(field_name), conversion, format_spec))
+        return segments
 
     def output(self, key, obj, full_data):
         try:
-            data = to_marshallable_type(obj)
-            return self.src_str.format(**data)
+            if self.segments is None:
+                data = to_marshallable_type(obj)
+                return self.src_str.format(**data)
+
+            if hasattr(obj, '__marshallable__'):
+                obj = to_marshallable_type(obj)
+            parts = []
+            for literal, field_name, accessor, conversion, format_spec in self.segments:
+                if literal:
+                    parts.append(literal)
+                if accessor is None:
+                    continue
+                value = accessor(obj, _MISSING)
+                if value is _MISSING:
+                    raise KeyError(field_name)
+                if conversion == 'r':
+                    value = repr(value)
+                elif conversion == 's':
+                    value = six.text_type(value)
+                parts.append(format(value, format_spec))
+            return u''.join(parts)
         except (TypeError, IndexError) as error:
             raise MarshallingException(error)
 
@@ -317,19 +699,99 @@ class FormattedString(Raw):
 class Url(Raw):
     """
     A string representation of a Url
+
+    The endpoint's rule is looked up once per app, only the arguments it needs
+    are pulled from the object and the generated paths are cached by argument
+    values. Endpoints that ``url_for`` has to treat specially (relative, with
+    defaults, several rules, subdomains or hosts, URL default functions) are
+    always built with ``url_for``.
     """
-    def __init__(self, endpoint):
+    cost = 5
+
+    def __init__(self, endpoint, cache_size=1024):
+        """
+        :param endpoint: The endpoint to build the URL for
+        :param cache_size: (optional, default:1024) The number of generated paths
+            to keep per app, least recently used paths are dropped first.
+        """
         super(Url, self).__init__()
         self.endpoint = endpoint
+        self.cache_size = cache_size
+        self._rules = {}
 
     def output(self, key, obj, full_data):
+        if not has_request_context():
+            return self.build_url(to_marshallable_type(obj))
+
+        app = current_app._get_current_object()
+        try:
+            url_rule = self._rules[app]
+        except KeyError:
+            url_rule = self._rules[app] = self._resolve_rule(app)
+        if url_rule is None:
+            return self.build_url(to_marshallable_type(obj))
+
+        rule, arguments, paths = url_rule
+        if hasattr(obj, '__marshallable__'):
+            obj = to_marshallable_type(obj)
+        values = tuple(get_value(argument, obj) for argument in arguments)
+        cache_key = (request.script_root, values)
+        try:
+            path = paths.pop(cache_key)
+        except KeyError:
+            path = None
+        except TypeError:
+            # Unhashable argument values can't be cached
+            return self.build_url(dict(zip(arguments, values)))
+
+        if path is None:
+            if None in values:
+                # Let url_for raise its usual BuildError
+                return self.build_url(dict(zip(arguments, values)))
+            built = rule.build(dict(zip(arguments, values)), False)
+            if built is None:
+                return self.build_url(dict(zip(arguments, values)))
+            path = urlunparse(("", "", urlparse(
+                '{0}/{1}'.format(request.script_root.rstrip('/'), built[1].lstrip('/'))).path,
+                "", "", ""))
+            if len(paths) >= self.cache_size:
+                try:
+                    paths.popitem(last=False)
+                except KeyError:
+                    pass
+        # Re-inserting moves the path to the most recently used end
+        paths[cache_key] = path
+        return path
+
+    def build_url(self, data):
+        """
+        Builds the path with ``url_for``.
+
+        :param data: The values to build the URL from
+        """
         try:
-            data = to_marshallable_type(obj)
             o = urlparse(url_for(self.endpoint, **data))
             return urlunparse(("", "", o.path, "", "", ""))
         except TypeError as te:
             raise MarshallingException(te)
 
+    def _resolve_rule(self, app):
+        """
+        Returns the rule, the arguments it takes and the path cache of the
+        endpoint, or None if the URLs have to be built with ``url_for``.
+        """
+        if self.endpoint.startswith('.') or app.config.get('SERVER_NAME') \
+                or app.url_map.host_matching or any(app.url_default_functions.values()):
+            return None
+        rules = list(app.url_map.iter_rules(self.endpoint))
+        if len(rules) != 1:
+            return None
+        rule = rules[0]
+        if rule.defaults or rule.subdomain or getattr(rule, 'host', None) \
+                or getattr(rule, 'websocket', False):
+            return None
+        return rule, tuple(sorted(rule.arguments)), OrderedDict()
+
 
 class Float(Raw):
     """
@@ -343,6 +805,9 @@ class Float(Raw):
         except ValueError as ve:
             raise MarshallingException(ve)
 
+    def format_column(self, values):
+        return [repr(value) for value in values.astype('float64').tolist()]
+
 
 class Arbitrary(Raw):
     """
@@ -350,40 +815,173 @@ class Arbitrary(Raw):
           ex: 634271127864378216478362784632784678324.23432
     """
 
+    def __init__(self, as_number=False, **kwargs):
+        """
+        :param as_number: (optional, default:False) Return Decimal values instead of
+            strings, which JSON backends that support Decimal natively (rapidjson)
+            write out as numbers. The other backends write them as strings.
+        """
+        super(Arbitrary, self).__init__(**kwargs)
+        self.as_number = as_number
+
     def format(self, value):
-        return six.text_type(MyDecimal(value))
+        dvalue = value if type(value) is MyDecimal else MyDecimal(value)
+        return dvalue if self.as_number else six.text_type(dvalue)
 
 
 class DateTime(Raw):
     """
     Return a ISO-formatted datetime string in UTC
+
+    Incoming values are parsed as ISO-8601/RFC-3339 timestamps (or with the
+    ``input_format`` hint) first and only handed to dateutil's much slower
+    generic parser if that fails. Parsed timestamps are memoized.
     """
+    def __init__(self, input_format=None, cache_size=1024, **kwargs):
+        """
+        :param input_format: (optional) A ``strptime`` format incoming values are
+            expected in, tried before the ISO-8601 and dateutil parsers.
+        :param cache_size: (optional, default:1024) The number of parsed timestamps
+            to memoize, 0 disables the memo.
+        """
+        super(DateTime, self).__init__(**kwargs)
+        self.input_format = input_format
+        self.cache_size = cache_size
+        self._parsed = {}
+
     def format(self, value):
         try:
             return value.isoformat()
         except AttributeError as ae:
             raise MarshallingException(ae)
 
-    def input(self, key, obj):
+    def input(self, key, obj, full_data=None):
         value = get_value(key, obj)
         if value:
-            datetime = parser.parse(value).astimezone(pytz.utc)
+            return self.parse(value)
+
+        return None
 
-        return datetime if value else None
+    def input_values(self, values):
+        """
+        Parses a whole column of incoming values, e.g. the items of a
+        ``List(DateTime)``, in one pass. Repeated values are parsed once.
+        """
+        parse = self.parse
+        parsed = {}
+        results = []
+        for value in values:
+            if not value:
+                results.append(None)
+                continue
+            try:
+                results.append(parsed[value])
+            except KeyError:
+                parsed[value] = datetime = parse(value)
+                results.append(datetime)
+        return results
+
+    def parse(self, value):
+        """
+        Parses an incoming timestamp to a datetime in UTC.
+        """
+        try:
+            return self._parsed[value]
+        except (KeyError, TypeError):
+            pass
+
+        datetime = self._parse(value).astimezone(pytz.utc)
+        if self.cache_size:
+            if len(self._parsed) >= self.cache_size:
+                self._parsed.clear()
+            try:
+                self._parsed[value] = datetime
+            except TypeError:
+                pass
+        return datetime
+
+    def _parse(self, value):
+        if self.input_format is not None:
+            try:
+                return _datetime.strptime(value, self.input_format)
+            except (TypeError, ValueError):
+                pass
+        if _fromisoformat is not None:
+            try:
+                if value[-1:] in ('Z', 'z'):
+                    # fromisoformat only accepts a Z suffix from Python 3.11 on
+                    value = value[:-1] + '+00:00'
+                return _fromisoformat(value)
+            except (TypeError, ValueError):
+                pass
+        return parser.parse(value)
 
 ZERO = MyDecimal()
 
 
+_INFINITIES = (float('inf'), float('-inf'))
+
+
 class Fixed(Raw):
-    def __init__(self, decimals=5, **kwargs):
+    """
+    A fixed point number, rounded half even to the given number of decimals.
+
+    Values are rounded in a decimal context of the field's own instead of the
+    thread's current one, and ints and floats are checked without the generic
+    Decimal validation.
+    """
+    def __init__(self, decimals=5, as_number=False, **kwargs):
+        """
+        :param decimals: (optional, default:5) The number of decimals
+        :param as_number: (optional, default:False) Return Decimal values instead of
+            strings, which JSON backends that support Decimal natively (rapidjson)
+            write out as numbers. The other backends write them as strings.
+        """
         super(Fixed, self).__init__(**kwargs)
         self.precision = MyDecimal('0.' + '0' * (decimals - 1) + '1')
+        self.as_number = as_number
+        self.context = Context(rounding=ROUND_HALF_EVEN)
 
     def format(self, value):
-        dvalue = MyDecimal(value)
-        if not dvalue.is_normal() and dvalue != ZERO:
+        dvalue = _to_fixed_decimal(value).quantize(self.precision, context=self.context)
+        return dvalue if self.as_number else six.text_type(dvalue)
+
+    def format_column(self, values):
+        if hasattr(values, 'tolist'):
+            values = values.tolist()
+        precision = self.precision
+        context = self.context
+        to_decimal = _to_fixed_decimal
+        dvalues = [to_decimal(value).quantize(precision, context=context) for value in values]
+        if self.as_number:
+            return dvalues
+        text_type = six.text_type
+        return [text_type(dvalue) for dvalue in dvalues]
+
+    def format_values(self, values):
+        if hasattr(values, 'tolist'):
+            values = values.tolist()
+        if None in values:
+            return super(Fixed, self).format_values(values)
+        return self.format_column(values)
+
+
+def _to_fixed_decimal(value):
+    """
+    Converts a value to a Decimal, raising a MarshallingException for values
+    that aren't finite numbers.
+    """
+    cls = type(value)
+    if cls in six.integer_types:
+        return MyDecimal(value)
+    if cls is float:
+        if value != value or value in _INFINITIES:
             raise MarshallingException('Invalid Fixed precision number.')
-        return six.text_type(dvalue.quantize(self.precision, rounding=ROUND_HALF_EVEN))
+        return MyDecimal(value)
+    dvalue = value if cls is MyDecimal else MyDecimal(value)
+    if not dvalue.is_normal() and dvalue != ZERO:
+        raise MarshallingException('Invalid Fixed precision number.')
+    return dvalue
 
 Price = Fixed
 
@@ -399,8 +997,7 @@ class CommaSeparatedList(List):
     Takes a comma separated string in the request and transforms it to a list.
     A list in the response is converted to a comma separated string.
     """
-    def output(self, key, data, full_data):
-        value = get_value(key if self.attribute is None else self.attribute, data)
+    def output_value(self, key, value, data, full_data):
         if value is None:
             if hasattr(self.default, '__call__'):
                 return self.default(key, data, full_data)
@@ -408,15 +1005,15 @@ class CommaSeparatedList(List):
 
         if is_indexable_but_not_string(value) and not isinstance(value, dict):
             # Convert all instances in typed list to container type
-            return ','.join(self.container.output(idx, value, full_data) for idx, val
-                            in enumerate(value))
+            text_type = six.text_type
+            return ','.join([text_type(item) for item in self.output_items(value, full_data)])
 
         if self.validate:
             if not hasattr(self.validate, '__call__'):
                 raise MarshallingException('validate for field {} is not a function'.format(key))
             value = self.validate(key, data, full_data)
 
-        return ','.join(marshal(value, self.container.nested))
+        return ','.join(marshal(value, full_data, self.container.nested))
 
     def input(self, key, data, full_data):
         value = get_value(key, data)
@@ -429,12 +1026,11 @@ class CommaSeparatedList(List):
         value = value.split(',')
         if is_indexable_but_not_string(value) and not isinstance(value, dict):
             # Convert all instances in typed list to container type
-            return [self.container.input(idx, value, full_data) for idx, val
-                    in enumerate(value)]
+            return self.input_items(value, full_data)
 
         if self.validate:
             if not hasattr(self.validate, '__call__'):
                 raise MarshallingException('validate for field {} is not a function'.format(key))
             value = self.validate(key, data, full_data)
 
-        return [marshal(value, self.container.nested)]
+        return [marshal(value, full_data, self.container.nested, True)]
@@ -1,17 +1,160 @@
-from flask import make_response
+from flask import current_app, make_response
+from werkzeug.http import parse_options_header
+
+from ..utils.compression import compress_response
 
 class ResourceRepresentation(object):
     content_type = 'text/html'
 
     def output(self, data, code, headers=None):
         response = make_response(data, code)
+        self.add_headers(response, headers)
+
+        return self.compress(response)
+
+    def add_headers(self, response, headers=None):
+        """
+        Adds the headers returned by the view to the response and sets the
+        Content-Type of the representation.
+        """
         if headers:
-            headers.extend({'Content-Type': self.content_type})
-        else:
-            headers = {'Content-Type': self.content_type}
-        response.headers.extend(headers)
+            response.headers.extend(headers)
+        response.headers['Content-Type'] = self.content_type
+
+    def compress(self, response):
+        """
+        Compresses the response for the client's Accept-Encoding, if the app
+        has compression enabled, see :func:`utils.compression.compress_response`.
+        """
+        return compress_response(response)
 
-        return response
+    def output_marshalled(self, data, code, headers=None, fields=None):
+        """
+        Builds the response for data marshaled by :class:`marshal_with`.
+        Representations that lay out records by their schema (e.g. CSV columns)
+        override this, by default it is the same as :meth:`output`.
+
+        :param fields: (optional) The fields dict the data was marshaled with
+        """
+        return self.output(data, code, headers)
 
     def input(self, data):
         return data
+
+    def input_bytes(self, data, charset=None):
+        """
+        Deserializes a request body given as bytes.
+
+        :param data: The body
+        :param charset: (optional) The charset parameter of the Content-Type
+        :exception ValueError: If the body can't be parsed
+        """
+        return self.input(data)
+
+    def input_stream(self, stream, charset=None):
+        """
+        Iterates over the records of a request body read from a stream. A body
+        that deserializes to a list yields its items, anything else is yielded
+        as one record. Representations that can parse records incrementally
+        override this, by default the whole body is read first.
+
+        :param stream: The file-like object to read the body from
+        :param charset: (optional) The charset parameter of the Content-Type
+        """
+        data = self.input_bytes(stream.read(), charset)
+        if isinstance(data, list):
+            for record in data:
+                yield record
+        elif data is not None:
+            yield data
+
+
+# The registered representations by mimetype
+representations = {}
+
+# The mimetypes responses are negotiated between, in order of preference, unless
+# the app sets ``WINDOW_DRESSING_REPRESENTATIONS``
+DEFAULT_PREFERENCES = ('application/json',)
+
+
+def register_representation(representation, mimetypes=None):
+    """
+    Registers a representation instance for its content type and any other
+    mimetypes it goes by, so that it can be negotiated with the Accept header.
+
+    :param representation: The :class:`ResourceRepresentation` instance
+    :param mimetypes: (optional) The mimetypes to register it for. Defaults to
+        its ``content_type``.
+    """
+    for mimetype in mimetypes or (representation.content_type,):
+        representations[mimetype.lower()] = representation
+    _candidates.clear()
+
+
+def get_representation(content_type):
+    """
+    Returns the representation registered for a Content-Type header value,
+    ignoring its parameters (e.g. ``charset``), or None if there is none.
+    """
+    mimetype = parse_options_header(content_type)[0]
+    return representations.get(mimetype.lower())
+
+
+def negotiate_representation(accept_mimetypes):
+    """
+    Picks the representation a response is sent in, by the client's Accept
+    header and the app's ``WINDOW_DRESSING_REPRESENTATIONS`` preference order
+    (a list of registered mimetypes, JSON only by default). Falls back to the
+    most preferred representation if the client accepts none of them.
+
+    :param accept_mimetypes: The request's parsed Accept header
+    """
+    preferences = tuple(current_app.config.get('WINDOW_DRESSING_REPRESENTATIONS',
+                                               DEFAULT_PREFERENCES))
+    candidates = _candidates.get(preferences)
+    if candidates is None:
+        candidates = _candidates[preferences] = _expand_preferences(preferences)
+    mimetype = accept_mimetypes.best_match(candidates) or candidates[0]
+    return representations[mimetype]
+
+
+_candidates = {}
+
+
+def _expand_preferences(preferences):
+    """
+    Returns the preferred mimetypes, each followed by the other mimetypes its
+    representation is registered for (e.g. ``application/x-msgpack``).
+    """
+    candidates = []
+    for preference in preferences:
+        preference = preference.lower()
+        try:
+            representation = representations[preference]
+        except KeyError:
+            raise ValueError('No representation is registered for {0}'.format(preference))
+        candidates.append(preference)
+        candidates.extend(mimetype for mimetype, registered in representations.items()
+                          if registered is representation and mimetype != preference)
+    return candidates
+
+
+def _register_defaults():
+    from .json_representation import JsonResource
+    from .msgpack_representation import MsgpackResource
+    from .cbor_representation import CborResource
+    from .ndjson_representation import NdjsonResource
+    from .csv_representation import CsvResource
+
+    register_representation(JsonResource())
+    register_representation(NdjsonResource(), NdjsonResource.mimetypes)
+    register_representation(CsvResource(), CsvResource.mimetypes)
+    for representation in (MsgpackResource, CborResource):
+        try:
+            representation = representation()
+        except ImportError:
+            continue
+        register_representation(representation, representation.mimetypes)
+
+
+_register_defaults()
@@ -0,0 +1,34 @@
+from __future__ import absolute_import
+from flask import make_response
+
+from . import ResourceRepresentation
+from .json_backends import _default
+
+
+def _encode_default(encoder, value):
+    encoder.encode(_default(value))
+
+
+class CborResource(ResourceRepresentation):
+    """
+    Serializes responses to and deserializes requests from CBOR. Needs the
+    ``cbor2`` package. Decimal values are written as CBOR decimal fractions.
+    """
+    content_type = 'application/cbor'
+    mimetypes = ('application/cbor',)
+
+    def __init__(self):
+        import cbor2
+        self.cbor2 = cbor2
+
+    def output(self, data, code, headers=None):
+        response = make_response(self.cbor2.dumps(data, default=_encode_default), code)
+        self.add_headers(response, headers)
+
+        return self.compress(response)
+
+    def input(self, data):
+        try:
+            return self.cbor2.loads(data)
+        except self.cbor2.CBORDecodeError as e:
+            raise ValueError(e)
@@ -0,0 +1,154 @@
+from __future__ import absolute_import
+import csv
+import io
+import json
+
+import six
+from flask import Response, stream_with_context
+
+from . import ResourceRepresentation
+from .json_backends import _default
+
+_SCALARS = six.string_types + six.integer_types + (float, bool, type(None))
+
+
+def schema_columns(fields, prefix=()):
+    """
+    Returns the ``(header, path)`` columns of a fields dict in schema order.
+    Nested dicts and ``Nested`` fields are flattened into dotted headers
+    (``owner.name``), the path is the tuple of keys leading to the value in a
+    marshaled record.
+    """
+    columns = []
+    for key, field in fields.items():
+        path = prefix + (key,)
+        nested = field if isinstance(field, dict) else None
+        if nested is None and not isinstance(field, type):
+            nested = getattr(field, 'nested', None)
+        if nested is not None:
+            columns.extend(schema_columns(nested, path))
+        else:
+            columns.append(('.'.join(six.text_type(k) for k in path), path))
+    return columns
+
+
+def record_columns(record, prefix=()):
+    """
+    Returns the columns of a marshaled record, for when there is no schema.
+    """
+    columns = []
+    for key, value in record.items():
+        path = prefix + (key,)
+        if isinstance(value, dict):
+            columns.extend(record_columns(value, path))
+        else:
+            columns.append(('.'.join(six.text_type(k) for k in path), path))
+    return columns
+
+
+def format_cell(value):
+    """
+    Formats a marshaled value as a CSV cell. None is an empty cell and
+    booleans are written as in JSON. A list of plain values is written comma
+    separated, other lists and dicts are written as JSON.
+    """
+    if value is None:
+        return ''
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if isinstance(value, (list, tuple)):
+        if all(isinstance(item, _SCALARS) and not isinstance(item, (list, tuple))
+               for item in value):
+            return ','.join(format_cell(item) for item in value)
+        return json.dumps(value, default=_default)
+    if isinstance(value, dict):
+        return json.dumps(value, default=_default)
+    return six.text_type(value)
+
+
+class CsvResource(ResourceRepresentation):
+    """
+    Writes records as CSV with a header row. The columns follow the order of
+    the fields, with ``Nested`` fields flattened into dotted headers. Rows are
+    written as the records are produced and sent in chunks of roughly
+    ``chunk_size`` characters, so streamed responses are never held in memory.
+    """
+    content_type = 'text/csv; charset=utf-8'
+    mimetypes = ('text/csv',)
+
+    def __init__(self, chunk_size=64 * 1024, dialect='excel'):
+        """
+        :param chunk_size: (optional) The number of characters to buffer before a
+            chunk is sent.
+        :param dialect: (optional, default:excel) The ``csv`` dialect rows are written in
+        """
+        self.chunk_size = chunk_size
+        self.dialect = dialect
+
+    def output(self, data, code, headers=None):
+        return self.output_marshalled(data, code, headers)
+
+    def output_marshalled(self, data, code, headers=None, fields=None):
+        if isinstance(data, dict):
+            data = [data]
+        response = Response(stream_with_context(self.iter_chunks(data, fields)), code)
+        self.add_headers(response, headers)
+
+        return self.compress(response)
+
+    def iter_chunks(self, records, fields=None):
+        """
+        Yields the CSV of the records in chunks of bytes.
+
+        :param records: An iterable of marshaled records
+        :param fields: (optional) The fields the records were marshaled with. Without
+            them the columns are taken from the first record.
+        """
+        buffer = six.StringIO()
+        writer = csv.writer(buffer, self.dialect)
+        records = iter(records)
+        columns = None
+        if fields is not None:
+            columns = schema_columns(fields)
+        else:
+            first = next(records, None)
+            if first is not None:
+                columns = record_columns(first)
+                records = _chain_first(first, records)
+        if columns is None:
+            return
+
+        writer.writerow([header for header, path in columns])
+        paths = [path for header, path in columns]
+        for record in records:
+            row = []
+            for path in paths:
+                value = record
+                for key in path:
+                    value = value.get(key) if isinstance(value, dict) else None
+                row.append(format_cell(value))
+            writer.writerow(row)
+            if buffer.tell() >= self.chunk_size:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode('utf-8')
+
+    def input(self, data):
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        try:
+            return list(csv.DictReader(io.StringIO(data), dialect=self.dialect))
+        except csv.Error as e:
+            raise ValueError(e)
+
+    def input_bytes(self, data, charset=None):
+        return self.input(data.decode(charset or 'utf-8'))
+
+
+def _chain_first(first, records):
+    yield first
+    for record in records:
+        yield record
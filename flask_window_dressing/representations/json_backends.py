@@ -0,0 +1,181 @@
+from __future__ import absolute_import
+import datetime
+import decimal
+import json
+
+import six
+from flask import current_app
+
+try:
+    #noinspection PyUnresolvedReferences
+    from collections import OrderedDict
+except ImportError:
+    from ..utils.ordereddict import OrderedDict
+
+
+def _default(obj):
+    """
+    Serializes the values our fields can emit that JSON has no type for.
+    """
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return six.text_type(obj)
+    raise TypeError('{0!r} is not JSON serializable'.format(obj))
+
+
+class JsonBackend(object):
+    """
+    A JSON library used by :class:`JsonResource` to serialize and deserialize
+    data. Backends can serialize ``datetime`` and ``Decimal`` values as well as
+    any dict subclass (``OrderedDict``).
+    """
+    name = None
+
+    # The separator between the items of a serialized array, used when arrays
+    # are written a piece at a time.
+    item_separator = b','
+
+    # True if Decimal values are written out as JSON numbers rather than strings
+    native_decimal = False
+
+    def dumps(self, data, indent=None, sort_keys=False):
+        """
+        Serializes data to JSON. Returns bytes.
+
+        :param data: The data to serialize
+        :param indent: (optional) Pretty print with this indent
+        :param sort_keys: (optional, default:False) Sort the keys of objects
+        """
+        raise NotImplementedError
+
+    def loads(self, data):
+        """
+        Deserializes a JSON document given as bytes or text.
+        """
+        raise NotImplementedError
+
+
+class StdlibJsonBackend(JsonBackend):
+    name = 'json'
+    item_separator = b', '
+
+    def dumps(self, data, indent=None, sort_keys=False):
+        return json.dumps(data, indent=indent, sort_keys=sort_keys,
+                          default=_default).encode('utf-8')
+
+    def loads(self, data):
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+
+class OrjsonBackend(JsonBackend):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self.orjson = orjson
+
+    def dumps(self, data, indent=None, sort_keys=False):
+        option = self.orjson.OPT_NON_STR_KEYS
+        if indent:
+            # orjson only supports an indent of two spaces
+            option |= self.orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= self.orjson.OPT_SORT_KEYS
+        return self.orjson.dumps(data, default=_default, option=option)
+
+    def loads(self, data):
+        return self.orjson.loads(data)
+
+
+def _decimals_to_text(data):
+    """
+    Returns the data with the Decimal values in it (in dicts, lists and tuples)
+    replaced by their text.
+    """
+    cls = type(data)
+    if isinstance(data, dict):
+        items = [(key, _decimals_to_text(value)) for key, value in data.items()]
+        return dict(items) if cls is dict else OrderedDict(items)
+    if cls is list or cls is tuple:
+        return [_decimals_to_text(value) for value in data]
+    if cls is decimal.Decimal:
+        return six.text_type(data)
+    return data
+
+
+class UjsonBackend(JsonBackend):
+    # ujson writes Decimal values out as floats without ever calling ``default``,
+    # losing precision, so they are turned into strings before dumping.
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self.ujson = ujson
+
+    def dumps(self, data, indent=None, sort_keys=False):
+        return self.ujson.dumps(_decimals_to_text(data), indent=indent or 0, sort_keys=sort_keys,
+                                escape_forward_slashes=False,
+                                default=_default).encode('utf-8')
+
+    def loads(self, data):
+        return self.ujson.loads(data)
+
+
+class RapidjsonBackend(JsonBackend):
+    name = 'rapidjson'
+    native_decimal = True
+
+    def __init__(self):
+        import rapidjson
+        self.rapidjson = rapidjson
+
+    def dumps(self, data, indent=None, sort_keys=False):
+        return self.rapidjson.dumps(data, indent=indent, sort_keys=sort_keys,
+                                    datetime_mode=self.rapidjson.DM_ISO8601,
+                                    number_mode=self.rapidjson.NM_DECIMAL | self.rapidjson.NM_NATIVE,
+                                    default=_default).encode('utf-8')
+
+    def loads(self, data):
+        return self.rapidjson.loads(data)
+
+
+json_backends = OrderedDict()
+
+
+def register_json_backend(backend):
+    """
+    Registers a :class:`JsonBackend` instance under its name, so that it can
+    be selected with the ``WINDOW_DRESSING_JSON_BACKEND`` config value.
+    """
+    json_backends[backend.name] = backend
+
+
+register_json_backend(StdlibJsonBackend())
+for _backend in (OrjsonBackend, RapidjsonBackend, UjsonBackend):
+    try:
+        register_json_backend(_backend())
+    except ImportError:
+        pass
+
+# The order in which 'auto' picks a backend, fastest first
+AUTO_BACKENDS = ('orjson', 'rapidjson', 'ujson', 'json')
+
+
+def get_json_backend(name=None):
+    """
+    Returns the registered JSON backend with the given name. If no name is
+    given the ``WINDOW_DRESSING_JSON_BACKEND`` config value of the current app
+    is used, which defaults to the standard library's ``json``. The name
+    ``auto`` picks the fastest backend that is installed.
+    """
+    if name is None:
+        name = current_app.config.get('WINDOW_DRESSING_JSON_BACKEND', 'json')
+    if name == 'auto':
+        name = next(n for n in AUTO_BACKENDS if n in json_backends)
+    try:
+        return json_backends[name]
+    except KeyError:
+        raise ValueError('No JSON backend named {0} is installed'.format(name))
@@ -1,16 +1,29 @@
 from __future__ import absolute_import
-from flask import make_response, current_app
-from json import dumps, loads
+from flask import Response, make_response, current_app, stream_with_context
+from werkzeug.exceptions import BadRequest
 
 from . import ResourceRepresentation
+from .json_backends import get_json_backend
+from ..utils.json_stream import JsonArrayReader
 
 
 class JsonResource(ResourceRepresentation):
     content_type = 'application/json'
 
+    def __init__(self, backend=None):
+        """
+        :param backend: (optional) The name of the JSON backend to use, see
+            :func:`get_json_backend`. Defaults to the app's
+            ``WINDOW_DRESSING_JSON_BACKEND`` config value.
+        """
+        self.backend = backend
+
+    def get_backend(self):
+        return get_json_backend(self.backend)
+
     def output(self, data, code, headers=None):
-        # This dictionary contains any kwargs that are to be passed to the json.dumps
-        # function, used below.
+        # This dictionary contains any kwargs that are to be passed to the backend's
+        # dumps function, used below.
         settings = {}
 
         # If we're in debug mode, and the indent is not set, we set it to a
@@ -23,25 +36,85 @@ class JsonResource(ResourceRepresentation):
 
         # We also add a trailing newline to the dumped JSON if the indent value is
         # set - this makes using `curl` on the command line much nicer.
-        dumped = dumps(data, **local_settings)
+        dumped = self.get_backend().dumps(data, **local_settings)
         if 'indent' in local_settings:
-            dumped += '\n'
+            dumped += b'\n'
+
+        return self.output_dumped(dumped, code, headers)
 
+    def output_dumped(self, dumped, code, headers=None):
+        """
+        Builds the response for data that has already been serialized.
+        """
         response = make_response(dumped, code)
-        if headers:
-            headers.extend({'Content-Type': self.content_type})
-        else:
-            headers = {'Content-Type': self.content_type}
-        response.headers.extend(headers)
+        self.add_headers(response, headers)
 
-        return response
+        return self.compress(response)
 
 
     def input(self, data):
-        loaded = loads(data)
+        loaded = self.get_backend().loads(data)
         
         return loaded
 
+    def input_bytes(self, data, charset=None):
+        # The backends read UTF-8 bytes, which JSON bodies are nearly always sent in
+        if charset and charset.lower() not in ('utf-8', 'utf8'):
+            try:
+                data = data.decode(charset)
+            except (LookupError, UnicodeDecodeError) as e:
+                raise BadRequest('The body can not be decoded as {0}: {1}'.format(charset, e))
+        return self.input(data)
+
+    def input_stream(self, stream, charset=None):
+        # The items of an array are parsed one at a time, with the standard library
+        return iter(JsonArrayReader(stream, charset))
+
+
+class StreamingJsonResource(JsonResource):
+    """
+    Streams an iterable of records as a JSON array. Records are encoded one at a
+    time as the iterable is consumed and sent out in chunks of roughly
+    ``chunk_size`` bytes, so the whole body is never held in memory.
+    """
+    def __init__(self, chunk_size=64 * 1024, backend=None):
+        """
+        :param chunk_size: (optional) The number of bytes to buffer before a chunk
+            is sent.
+        :param backend: (optional) The name of the JSON backend to use.
+        """
+        super(StreamingJsonResource, self).__init__(backend)
+        self.chunk_size = chunk_size
+
+    def output(self, data, code, headers=None):
+        backend = self.get_backend()
+        response = Response(stream_with_context(self.iter_chunks(data, backend)), code)
+        self.add_headers(response, headers)
+
+        return self.compress(response)
+
+    def iter_chunks(self, records, backend):
+        """
+        Yields the JSON array of records in chunks. The output is the same as
+        dumping the list of records with :class:`JsonResource`.
+        """
+        dumps = backend.dumps
+        chunk = [b'[']
+        size = 1
+        separator = b''
+        for record in records:
+            dumped = dumps(record)
+            chunk.append(separator)
+            chunk.append(dumped)
+            separator = backend.item_separator
+            size += len(dumped) + len(separator)
+            if size >= self.chunk_size:
+                yield b''.join(chunk)
+                chunk = []
+                size = 0
+        chunk.append(b']')
+        yield b''.join(chunk)
+
 
 class HtmlResource(ResourceRepresentation):
     content_type = 'text/html'
@@ -52,16 +125,12 @@ class HtmlResource(ResourceRepresentation):
             # Output as JSON, because marshaled stuff won't work with
             # make_response. This is used so that we can view the json response
             # with a normal browser request
-            response = HtmlResource().output(data, code, headers)
+            response = JsonResource().output(data, code, headers)
         else:
             response = make_response(data, code)
-            if headers:
-                headers.extend({'Content-Type': self.content_type})
-            else:
-                headers = {'Content-Type': self.content_type}
-            response.headers.extend(headers)
+            self.add_headers(response, headers)
 
-        return response
+        return self.compress(response)
 
     def input(self, data):
         return data
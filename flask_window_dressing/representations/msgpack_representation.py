@@ -0,0 +1,27 @@
+from __future__ import absolute_import
+from flask import make_response
+
+from . import ResourceRepresentation
+from .json_backends import _default
+
+
+class MsgpackResource(ResourceRepresentation):
+    """
+    Serializes responses to and deserializes requests from MessagePack. Needs
+    the ``msgpack`` package.
+    """
+    content_type = 'application/msgpack'
+    mimetypes = ('application/msgpack', 'application/x-msgpack')
+
+    def __init__(self):
+        import msgpack
+        self.msgpack = msgpack
+
+    def output(self, data, code, headers=None):
+        response = make_response(self.msgpack.packb(data, default=_default, use_bin_type=True), code)
+        self.add_headers(response, headers)
+
+        return self.compress(response)
+
+    def input(self, data):
+        return self.msgpack.unpackb(data, raw=False)
@@ -0,0 +1,68 @@
+from __future__ import absolute_import
+from flask import Response, stream_with_context
+
+from . import ResourceRepresentation
+from .json_backends import get_json_backend
+from ..utils.json_stream import iter_ndjson
+
+
+class NdjsonResource(ResourceRepresentation):
+    """
+    Newline delimited JSON, one record per line. Records are encoded as they
+    are produced and sent in chunks of roughly ``chunk_size`` bytes, so
+    streamed responses are never held in memory.
+    """
+    content_type = 'application/x-ndjson'
+    mimetypes = ('application/x-ndjson', 'application/ndjson')
+
+    def __init__(self, chunk_size=64 * 1024, backend=None):
+        """
+        :param chunk_size: (optional) The number of bytes to buffer before a chunk
+            is sent.
+        :param backend: (optional) The name of the JSON backend to use, see
+            :func:`get_json_backend`.
+        """
+        self.chunk_size = chunk_size
+        self.backend = backend
+
+    def get_backend(self):
+        return get_json_backend(self.backend)
+
+    def output(self, data, code, headers=None):
+        if isinstance(data, dict):
+            data = [data]
+        backend = self.get_backend()
+        response = Response(stream_with_context(self.iter_chunks(data, backend)), code)
+        self.add_headers(response, headers)
+
+        return self.compress(response)
+
+    def iter_chunks(self, records, backend):
+        """
+        Yields the records, one JSON document per line, in chunks of bytes.
+        """
+        dumps = backend.dumps
+        chunk = []
+        size = 0
+        for record in records:
+            dumped = dumps(record)
+            chunk.append(dumped)
+            chunk.append(b'\n')
+            size += len(dumped) + 1
+            if size >= self.chunk_size:
+                yield b''.join(chunk)
+                chunk = []
+                size = 0
+        yield b''.join(chunk)
+
+    def input(self, data):
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        loads = self.get_backend().loads
+        return [loads(line) for line in data.splitlines() if line.strip()]
+
+    def input_bytes(self, data, charset=None):
+        return self.input(data.decode(charset or 'utf-8'))
+
+    def input_stream(self, stream, charset=None):
+        return iter_ndjson(stream, charset, self.get_backend().loads)
@@ -1,5 +1,9 @@
 from functools import wraps
 
+import six
+from flask import Response, request
+from werkzeug.http import generate_etag, is_resource_modified
+
 
 def add_response_headers(headers={}):
     """
@@ -24,4 +28,54 @@ def nocache(func):
     @add_response_headers({'Cache-Control': 'no-cache=true, private=true, no-store, must-revalidate'})
     def wrapper(*args, **kwargs):
         return func(*args, **kwargs)
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+def make_etag(data, variant=None):
+    """
+    Returns a strong ETag for a serialized payload (bytes) or for a version key
+    of any other type, which is converted to text first.
+
+    :param data: The payload or version key
+    :param variant: (optional) What else the bytes sent depend on, e.g. the content
+        type and coding of the representation, so that every representation of a
+        resource gets its own ETag.
+    """
+    if not isinstance(data, bytes):
+        data = six.text_type(data).encode('utf-8')
+    if variant:
+        data += b'\0' + six.text_type(variant).encode('utf-8')
+    return generate_etag(data)
+
+
+def is_not_modified(etag=None, last_modified=None):
+    """
+    Checks the conditional headers of the current request (If-None-Match and
+    If-Modified-Since) against the given ETag and last modification date.
+    Only GET and HEAD requests can be answered with a 304.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if etag is None and last_modified is None:
+        return False
+    return not is_resource_modified(request.environ, etag=etag, last_modified=last_modified)
+
+
+def add_cache_headers(response, etag=None, last_modified=None, cache_control=None):
+    """
+    Adds the ETag, Last-Modified and Cache-Control headers of a caching policy
+    to a response.
+    """
+    if etag is not None:
+        response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    if cache_control is not None:
+        response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def not_modified_response(etag=None, last_modified=None, cache_control=None):
+    """
+    Returns an empty 304 Not Modified response carrying the caching headers.
+    """
+    return add_cache_headers(Response(status=304), etag, last_modified, cache_control)
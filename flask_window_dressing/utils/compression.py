@@ -0,0 +1,186 @@
+import zlib
+
+from flask import current_app, has_request_context, request
+
+try:
+    #noinspection PyUnresolvedReferences
+    from collections import OrderedDict
+except ImportError:
+    from .ordereddict import OrderedDict
+
+# Bodies shorter than this many bytes aren't worth compressing, unless the app
+# sets ``WINDOW_DRESSING_COMPRESS_MIN_SIZE``
+DEFAULT_MIN_SIZE = 500
+
+# The order in which encodings the client accepts equally are picked, unless
+# the app sets ``WINDOW_DRESSING_COMPRESS_ENCODINGS``
+DEFAULT_ENCODINGS = ('br', 'zstd', 'gzip', 'deflate')
+
+
+class Codec(object):
+    """
+    A content encoding responses can be compressed with.
+    """
+    name = None
+
+    def compressor(self):
+        """
+        Returns an object with ``compress(data)`` and ``flush()`` methods that
+        compresses a body a chunk at a time.
+        """
+        raise NotImplementedError
+
+    def compress(self, data):
+        compressor = self.compressor()
+        return compressor.compress(data) + compressor.flush()
+
+
+class GzipCodec(Codec):
+    # zlib writes a gzip header without a timestamp, so the same body always
+    # compresses to the same bytes (and the same ETag).
+    name = 'gzip'
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compressor(self):
+        return zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+class DeflateCodec(Codec):
+    # HTTP's deflate is the zlib format, not raw deflate
+    name = 'deflate'
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compressor(self):
+        return zlib.compressobj(self.level)
+
+
+class _BrotliCompressor(object):
+    def __init__(self, compressor):
+        self.compressor = compressor
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.finish()
+
+
+class BrotliCodec(Codec):
+    name = 'br'
+
+    def __init__(self, quality=4):
+        import brotli
+        self.brotli = brotli
+        self.quality = quality
+
+    def compressor(self):
+        return _BrotliCompressor(self.brotli.Compressor(quality=self.quality))
+
+
+class ZstdCodec(Codec):
+    name = 'zstd'
+
+    def __init__(self, level=3):
+        import zstandard
+        self.compressor_factory = zstandard.ZstdCompressor(level=level)
+
+    def compressor(self):
+        return self.compressor_factory.compressobj()
+
+
+codecs = OrderedDict()
+
+
+def register_codec(codec):
+    """
+    Registers a :class:`Codec` instance under its encoding name.
+    """
+    codecs[codec.name] = codec
+
+
+register_codec(GzipCodec())
+register_codec(DeflateCodec())
+for _codec in (BrotliCodec, ZstdCodec):
+    try:
+        register_codec(_codec())
+    except ImportError:
+        pass
+
+
+def compression_enabled():
+    """
+    Returns True if the current app has the ``WINDOW_DRESSING_COMPRESS`` config
+    value set.
+    """
+    return has_request_context() and bool(current_app.config.get('WINDOW_DRESSING_COMPRESS'))
+
+
+def choose_encoding():
+    """
+    Returns the name of the encoding the current request's response should be
+    compressed with, by the client's Accept-Encoding header and the app's
+    ``WINDOW_DRESSING_COMPRESS_ENCODINGS`` order, or None if the response should
+    not be compressed.
+    """
+    if not compression_enabled():
+        return None
+    preferences = current_app.config.get('WINDOW_DRESSING_COMPRESS_ENCODINGS', DEFAULT_ENCODINGS)
+    candidates = [name for name in preferences if name in codecs]
+    return request.accept_encodings.best_match(candidates)
+
+
+def compress_response(response, encoding=None):
+    """
+    Compresses a successful response with the encoding picked by
+    :func:`choose_encoding`. Bodies shorter than ``WINDOW_DRESSING_COMPRESS_MIN_SIZE``
+    bytes are sent as is, streamed responses are compressed a chunk at a time.
+    Responses that already have a Content-Encoding are left alone, so this can
+    be registered as an ``after_request`` function for responses that don't go
+    through a representation as well.
+
+    A strong ETag is made weak, since it no longer matches the bytes sent.
+
+    :param response: The response to compress
+    :param encoding: (optional) The encoding to use instead of negotiating one
+    """
+    if not compression_enabled():
+        return response
+    response.vary.add('Accept-Encoding')
+    if not 200 <= response.status_code < 300 or response.status_code == 204 \
+            or 'Content-Encoding' in response.headers or request.method == 'HEAD':
+        return response
+    if encoding is None:
+        encoding = choose_encoding()
+    if encoding is None:
+        return response
+    codec = codecs[encoding]
+
+    if response.is_streamed:
+        response.response = _compress_chunks(codec.compressor(), response.response)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        min_size = current_app.config.get('WINDOW_DRESSING_COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE)
+        if len(data) < min_size:
+            return response
+        response.set_data(codec.compress(data))
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag is not None and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def _compress_chunks(compressor, chunks):
+    for chunk in chunks:
+        if not isinstance(chunk, bytes):
+            chunk = chunk.encode('utf-8')
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,250 @@
+import codecs
+import json
+import re
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+_WHITESPACE = ' \t\n\r'
+# What can follow a number or literal in an array
+_SCALAR_END = re.compile(r'[ \t\n\r,\]]')
+# The characters that matter for finding the end of an object, array or string
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+# What ends a token inside an object or array
+_TOKEN_END = re.compile(r'[ \t\n\r,:"\[\]{}]')
+
+
+class BoundedReader(object):
+    """
+    Wraps a stream and raises ``RequestEntityTooLarge`` once more than
+    ``max_size`` bytes have been read from it.
+    """
+    def __init__(self, stream, max_size=None):
+        self.stream = stream
+        self.max_size = max_size
+        self.size = 0
+
+    def _count(self, data):
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            raise RequestEntityTooLarge()
+        return data
+
+    def read(self, size=-1):
+        return self._count(self.stream.read(size))
+
+    def readline(self, size=-1):
+        return self._count(self.stream.readline(size))
+
+
+class JsonArrayReader(object):
+    """
+    Iterates over the items of a JSON array read incrementally from a stream of
+    bytes, so only one item (and a chunk of the stream) is held at a time. A
+    body that isn't an array is loaded as a whole and yielded as one item.
+
+    The end of an item is found by scanning only the newly read text for
+    brackets and strings, so every item is parsed once, however many reads it
+    spans. Reads grow geometrically while an item is incomplete.
+
+    :exception ValueError: If the body isn't valid JSON
+    """
+    def __init__(self, stream, charset='utf-8', chunk_size=64 * 1024, decoder=None):
+        """
+        :param stream: The file-like object to read bytes from
+        :param charset: (optional, default:utf-8) The charset of the body
+        :param chunk_size: (optional) The number of bytes read at a time
+        :param decoder: (optional) The ``json.JSONDecoder`` to parse items with
+        """
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decode = codecs.getincrementaldecoder(charset or 'utf-8')().decode
+        self.raw_decode = (decoder or json.JSONDecoder()).raw_decode
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size=None):
+        """
+        Reads the next chunk into the buffer, dropping what has been consumed.
+
+        :param size: (optional) The number of bytes to read, ``chunk_size`` by default
+        """
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        chunk = self.stream.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            self.buffer += self.decode(b'', True)
+        else:
+            self.buffer += self.decode(chunk)
+
+    def fill_more(self):
+        # Reading at least as much as is buffered keeps the copying of a large
+        # item's text linear in its size
+        self.fill(max(self.chunk_size, len(self.buffer) - self.pos))
+
+    def next_char(self):
+        """
+        Skips whitespace and returns the next character, or '' at the end.
+        """
+        while True:
+            buffer = self.buffer
+            pos = self.pos
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if self.eof:
+                return ''
+            self.fill()
+
+    def item_length(self):
+        """
+        Reads until the item at the current position is complete and returns
+        its length. For numbers and literals (whose end is only known once what
+        follows is read) it returns the length up to the next delimiter.
+        """
+        char = self.buffer[self.pos]
+        if char not in '{["':
+            while True:
+                match = _SCALAR_END.search(self.buffer, self.pos)
+                if match is not None:
+                    return match.start() - self.pos
+                if self.eof:
+                    return len(self.buffer) - self.pos
+                self.fill_more()
+
+        # Offsets are relative to the item, since fills move it to the start of
+        # the buffer
+        offset = 0
+        depth = 0
+        in_string = False
+        check_at = self.chunk_size
+        while True:
+            buffer = self.buffer
+            i = self.pos + offset
+            while True:
+                if in_string:
+                    match = _STRING_SPECIAL.search(buffer, i)
+                    if match is None:
+                        i = len(buffer)
+                        break
+                    if match.group() == '\\':
+                        if match.end() >= len(buffer):
+                            # The escaped character hasn't been read yet
+                            i = match.start()
+                            break
+                        i = match.end() + 1
+                        continue
+                    i = match.end()
+                    in_string = False
+                    if depth == 0:
+                        return i - self.pos
+                else:
+                    match = _STRUCTURE.search(buffer, i)
+                    if match is None:
+                        i = len(buffer)
+                        break
+                    i = match.end()
+                    char = match.group()
+                    if char == '"':
+                        in_string = True
+                    elif char in '{[':
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if depth == 0:
+                            return i - self.pos
+            offset = i - self.pos
+            if self.eof:
+                raise ValueError('Unexpected end of the JSON array')
+            if offset >= check_at:
+                # Checked as often as the item doubles in size, which keeps the
+                # parsing linear as well
+                check_at *= 2
+                self.check_partial(in_string)
+            self.fill_more()
+
+    def check_partial(self, in_string):
+        """
+        Raises a ValueError if the incomplete item at the current position is
+        invalid already, so a malformed item is rejected without reading the
+        rest of the body.
+
+        :param in_string: True if the text read so far ends inside a string
+        """
+        if in_string:
+            # Unterminated strings are reported at their start
+            return
+        try:
+            self.raw_decode(self.buffer, self.pos)
+        except ValueError as e:
+            pos = getattr(e, 'pos', None)
+            # An error at the end of what has been read (e.g. "tru" of "true")
+            # can be an item that continues in the next chunk
+            if pos is not None and _TOKEN_END.search(self.buffer, pos):
+                raise
+
+    def next_item(self):
+        if not self.next_char():
+            raise ValueError('Unexpected end of the JSON array')
+        # Reading the item can move it in the buffer
+        length = self.item_length()
+        end = self.pos + length
+        item, decoded_end = self.raw_decode(self.buffer, self.pos)
+        if decoded_end != end:
+            raise ValueError('Invalid JSON array item at {0!r}'.format(self.buffer[decoded_end:end][:20]))
+        self.pos = end
+        return item
+
+    def __iter__(self):
+        char = self.next_char()
+        if char != '[':
+            chunks = [self.buffer[self.pos:]]
+            while not self.eof:
+                self.buffer = ''
+                self.pos = 0
+                self.fill()
+                chunks.append(self.buffer)
+            text = ''.join(chunks)
+            if not text.strip():
+                return
+            yield json.loads(text)
+            return
+
+        self.pos += 1
+        if self.next_char() == ']':
+            return
+        while True:
+            yield self.next_item()
+            char = self.next_char()
+            self.pos += 1
+            if char == ']':
+                break
+            if char != ',':
+                raise ValueError('Expected , or ] in JSON array, got {0!r}'.format(char))
+        if self.next_char():
+            raise ValueError('Extra data after the JSON array')
+
+
+def iter_ndjson(stream, charset='utf-8', loads=json.loads):
+    """
+    Iterates over the records of a newline delimited JSON body read line by line
+    from a stream of bytes. Blank lines are skipped.
+
+    :param stream: The file-like object to read bytes from
+    :param charset: (optional, default:utf-8) The charset of the body
+    :param loads: (optional) The function that parses a line
+    :exception ValueError: If a line isn't valid JSON
+    """
+    charset = charset or 'utf-8'
+    while True:
+        line = stream.readline()
+        if not line:
+            return
+        line = line.decode(charset).strip()
+        if line:
+            yield loads(line)
@@ -0,0 +1,106 @@
+import threading
+from contextlib import contextmanager
+
+_state = threading.local()
+
+
+class MarshalMemo(object):
+    """
+    Remembers the nested objects marshaled during one marshal call, by the
+    identity of the object and of the schema, so an object shared by many
+    records (e.g. the author of thousands of posts) is marshaled once and its
+    marshaled record is reused wherever it appears.
+
+    The memoized objects are kept alive until the call returns, so their ids
+    can't be reused by other objects in the meantime. Only use it with data that
+    doesn't change while it is marshaled, and with nested schemas whose output
+    doesn't depend on ``full_data``. The reused records are the same objects,
+    so they must not be modified after marshaling either.
+    """
+    def __init__(self):
+        self.records = {}
+        self.encoded = {}
+        self.hits = 0
+
+    def marshal(self, value, full_data, fields):
+        """
+        Returns the marshaled record of a nested value, marshaling it the first
+        time it is seen.
+
+        :param value: The nested object
+        :param full_data: The full data in the response
+        :param fields: The nested fields dict (or compiled schema)
+        """
+        key = (id(value), id(getattr(fields, 'fields', fields)))
+        entry = self.records.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[1]
+        from .. import marshal
+        record = marshal(value, full_data, fields)
+        self.records[key] = (value, record)
+        return record
+
+    def batch(self, values, full_data, compiled):
+        """
+        Returns the marshaled records of a column of nested values. Each distinct
+        value that hasn't been seen yet is marshaled once, in one batch.
+
+        :param values: The nested objects
+        :param full_data: The full data in the response
+        :param compiled: The nested :class:`CompiledFields`
+        """
+        records = self.records
+        schema = id(compiled.fields)
+        keys = [(id(value), schema) for value in values]
+        missing = []
+        pending = set()
+        for key, value in zip(keys, values):
+            if key not in records and key not in pending:
+                pending.add(key)
+                missing.append(value)
+        self.hits += len(values) - len(missing)
+        if missing:
+            for value, record in zip(missing, compiled.batch(missing, full_data)):
+                records[(id(value), schema)] = (value, record)
+        return [records[key][1] for key in keys]
+
+    def encode(self, value, full_data, encoder):
+        """
+        Returns the JSON text of a nested value, encoding it the first time it
+        is seen, see :class:`encoder.SchemaEncoder`.
+        """
+        key = (id(value), id(encoder))
+        entry = self.encoded.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[1]
+        text = encoder.encode_data(value, full_data)
+        self.encoded[key] = (value, text)
+        return text
+
+
+def current_memo():
+    """
+    Returns the :class:`MarshalMemo` of the marshal call running in this thread,
+    or None if it isn't memoized.
+    """
+    return getattr(_state, 'memo', None)
+
+
+@contextmanager
+def memoize():
+    """
+    Memoizes nested objects for the duration of the block, see
+    :class:`MarshalMemo`. Yields the memo. Blocks nested in a memoized block
+    share the outer memo.
+    """
+    memo = current_memo()
+    if memo is not None:
+        yield memo
+        return
+    memo = _state.memo = MarshalMemo()
+    try:
+        yield memo
+    finally:
+        _state.memo = None
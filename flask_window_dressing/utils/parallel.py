@@ -0,0 +1,204 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+# Lists shorter than this are marshaled in the calling process
+DEFAULT_THRESHOLD = 50000
+
+# The number of records a worker marshals per task
+DEFAULT_CHUNK_SIZE = 10000
+
+# The schema each worker process compiled in its initializer
+_worker = {}
+
+
+def _init_worker(fields, going_in, container, batch):
+    from .. import compile_fields
+    _worker['schema'] = compile_fields(fields, going_in, container)
+    _worker['batch'] = batch
+
+
+def _marshal_chunk(chunk):
+    schema = _worker['schema']
+    if _worker['batch']:
+        return schema.batch(chunk, chunk)
+    return schema(chunk, chunk)
+
+
+def _dump_chunk(chunk, backend_name):
+    from ..representations.json_backends import get_json_backend
+    backend = get_json_backend(backend_name)
+    dumps = backend.dumps
+    return backend.item_separator.join([dumps(record) for record in _marshal_chunk(chunk)])
+
+
+class ParallelMarshaler(object):
+    """
+    Marshals very large lists in a pool of worker processes. The list is cut
+    into chunks that the workers marshal with their own compiled copy of the
+    schema, which is shipped to every worker once when the pool starts.
+    Workers can serialize their chunks to JSON as well, so that the calling
+    process only joins bytes.
+
+    The records of the list and the fields (including their ``default`` and
+    ``validate`` functions) have to be picklable, unless workers are forked.
+    Fields see the chunk they are marshaled in as ``full_data``, not the whole
+    list.
+
+    Marshalers can be shared by threads. A marshaler that is retired shuts its
+    pool down once the calls using it have returned.
+    """
+    def __init__(self, fields, going_in=False, batch=False, workers=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, threshold=DEFAULT_THRESHOLD, serialize=False,
+                 mp_context=None):
+        """
+        :param fields: The fields dict (or compiled schema) to marshal with
+        :param going_in: (optional, default:False) If True incoming data is marshaled.
+        :param batch: (optional, default:False) If True workers marshal their chunks one
+            field at a time, see :meth:`CompiledFields.batch`.
+        :param workers: (optional) The number of worker processes. Defaults to the
+            number of CPUs.
+        :param chunk_size: (optional, default:10000) The number of records per task.
+        :param threshold: (optional, default:50000) Lists with fewer records are
+            marshaled in the calling process.
+        :param serialize: (optional, default:False) If True, :class:`marshal_with`
+            has the workers serialize their chunks to JSON.
+        :param mp_context: (optional) The multiprocessing context workers are
+            started with.
+        """
+        from .. import CompiledFields
+        container = None
+        if isinstance(fields, CompiledFields):
+            fields, going_in, container = fields.fields, fields.going_in, fields.container
+        self.fields = fields
+        self.going_in = going_in
+        self.container = container
+        self.batch = batch
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.threshold = threshold
+        self.serialize = serialize
+        self.mp_context = mp_context
+        self.executor = None
+        self.pid = None
+        self.lock = threading.RLock()
+        self.users = 0
+        self.retired = False
+
+    def accepts(self, data):
+        """
+        Returns True if the data is a list long enough to be marshaled in parallel.
+        """
+        return isinstance(data, (list, tuple)) and len(data) >= self.threshold
+
+    def get_executor(self):
+        with self.lock:
+            # A pool can't be shared with processes forked after it was started
+            if self.executor is None or self.pid != os.getpid():
+                kwargs = {}
+                if self.mp_context is not None:
+                    kwargs['mp_context'] = self.mp_context
+                self.executor = ProcessPoolExecutor(
+                    self.workers, initializer=_init_worker,
+                    initargs=(self.fields, self.going_in, self.container, self.batch), **kwargs)
+                self.pid = os.getpid()
+            return self.executor
+
+    @contextmanager
+    def using_executor(self):
+        """
+        Yields the pool, which :meth:`retire` doesn't shut down until the block
+        exits.
+        """
+        with self.lock:
+            executor = self.get_executor()
+            self.users += 1
+        try:
+            yield executor
+        finally:
+            with self.lock:
+                self.users -= 1
+                if self.retired and not self.users:
+                    self.shutdown(False)
+
+    def chunks(self, data):
+        size = self.chunk_size
+        return [data[i:i + size] for i in range(0, len(data), size)]
+
+    def serial(self, data):
+        from .. import compile_fields
+        schema = compile_fields(self.fields, self.going_in, self.container)
+        if self.batch and not self.going_in:
+            return schema.batch(data, data)
+        return schema(data, data)
+
+    def marshal(self, data):
+        """
+        Marshals a list of records, in the workers if it is at least ``threshold``
+        records long.
+        """
+        if not self.accepts(data):
+            return self.serial(data)
+        marshalled = []
+        with self.using_executor() as executor:
+            for chunk in executor.map(_marshal_chunk, self.chunks(data)):
+                marshalled.extend(chunk)
+        return marshalled
+
+    def dumps(self, data, backend):
+        """
+        Marshals a list of records and serializes it to a JSON array, which is
+        returned as bytes. The output is the same as dumping the marshaled list
+        with the backend.
+
+        :param data: The list of records
+        :param backend: The :class:`JsonBackend` to serialize with
+        """
+        if not self.accepts(data):
+            return backend.dumps(self.serial(data))
+        chunks = self.chunks(data)
+        with self.using_executor() as executor:
+            dumped = backend.item_separator.join(
+                executor.map(_dump_chunk, chunks, [backend.name] * len(chunks)))
+        return b'[' + dumped + b']'
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait)
+
+    def retire(self):
+        """
+        Shuts the pool down, once no call is using it any more.
+        """
+        with self.lock:
+            self.retired = True
+            if not self.users:
+                self.shutdown(False)
+
+
+# The marshalers ``marshal(..., parallel=True)`` shares, by fields dict
+MAX_PARALLEL_MARSHALERS = 16
+
+_marshalers = {}
+_marshalers_lock = threading.Lock()
+
+
+def get_parallel_marshaler(fields, going_in=False, batch=False):
+    """
+    Returns the shared :class:`ParallelMarshaler` with default settings for a
+    fields dict. Only a few are kept, since each holds a pool of processes.
+    """
+    key = (id(fields), going_in, batch)
+    with _marshalers_lock:
+        marshaler = _marshalers.get(key)
+        if marshaler is None or marshaler.fields is not getattr(fields, 'fields', fields):
+            if marshaler is not None:
+                marshaler.retire()
+            marshaler = ParallelMarshaler(fields, going_in, batch)
+            if len(_marshalers) >= MAX_PARALLEL_MARSHALERS:
+                _marshalers.pop(next(iter(_marshalers))).retire()
+            _marshalers[key] = marshaler
+        return marshaler
@@ -0,0 +1,139 @@
+import threading
+import timeit
+
+from flask import current_app, has_app_context
+
+# The most precise wall clock timer available
+timer = timeit.default_timer
+
+
+class MarshalStats(object):
+    """
+    Collects call counts, cumulative time and exception counts of profiled
+    schemas and of each of their fields.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.schemas = {}
+            self.fields = {}
+
+    @staticmethod
+    def _add(entry, elapsed, exception):
+        entry['calls'] += 1
+        entry['time'] += elapsed
+        if exception is not None:
+            name = type(exception).__name__
+            entry['exceptions'][name] = entry['exceptions'].get(name, 0) + 1
+
+    @staticmethod
+    def _new_entry():
+        return {'calls': 0, 'time': 0.0, 'exceptions': {}}
+
+    def add_schema(self, schema, elapsed, exception=None):
+        """
+        Records one call of a schema.
+
+        :param schema: The name the schema is profiled under
+        :param elapsed: The seconds the call took
+        :param exception: (optional) The exception the call raised
+        """
+        with self.lock:
+            entry = self.schemas.get(schema)
+            if entry is None:
+                entry = self.schemas[schema] = self._new_entry()
+            self._add(entry, elapsed, exception)
+
+    def add_field(self, schema, key, elapsed, exception=None):
+        """
+        Records one call of a field of a schema.
+
+        :param schema: The name the schema is profiled under
+        :param key: The field's key
+        :param elapsed: The seconds the call took
+        :param exception: (optional) The exception the call raised
+        """
+        with self.lock:
+            fields = self.fields.get(schema)
+            if fields is None:
+                fields = self.fields[schema] = {}
+            entry = fields.get(key)
+            if entry is None:
+                entry = fields[key] = self._new_entry()
+            self._add(entry, elapsed, exception)
+
+    def snapshot(self):
+        """
+        Returns a copy of the stats as ``{'schemas': {schema: entry}, 'fields':
+        {schema: {key: entry}}}``, where every entry has the ``calls``, the
+        cumulative ``time`` in seconds and the ``exceptions`` by class name.
+        """
+        def copy(entry):
+            return dict(entry, exceptions=dict(entry['exceptions']))
+
+        with self.lock:
+            return {
+                'schemas': dict((schema, copy(entry)) for schema, entry in self.schemas.items()),
+                'fields': dict((schema, dict((key, copy(entry)) for key, entry in fields.items()))
+                               for schema, fields in self.fields.items()),
+            }
+
+
+stats = MarshalStats()
+
+
+def get_stats():
+    """
+    Returns the stats collected for profiled schemas, see :meth:`MarshalStats.snapshot`.
+    """
+    return stats.snapshot()
+
+
+def reset_stats():
+    stats.reset()
+
+
+def profiling_enabled():
+    """
+    Returns True if the current app has the ``WINDOW_DRESSING_PROFILE`` config
+    value set.
+    """
+    return has_app_context() and bool(current_app.config.get('WINDOW_DRESSING_PROFILE'))
+
+
+def server_timing_enabled():
+    """
+    Returns True if the current app has the ``WINDOW_DRESSING_SERVER_TIMING``
+    config value set, in which case profiled views send a Server-Timing header.
+    """
+    return has_app_context() and bool(current_app.config.get('WINDOW_DRESSING_SERVER_TIMING'))
+
+
+def server_timing(name, elapsed):
+    """
+    Formats a Server-Timing header metric.
+
+    :param name: The name of the metric
+    :param elapsed: The duration in seconds
+    """
+    return '{0};dur={1:.3f}'.format(name, elapsed * 1000)
+
+
+def timed_field(schema, key, fn):
+    """
+    Wraps a field's ``output``/``input`` (or ``output_column``) function so that
+    every call is recorded in the stats.
+    """
+    def timed(*args):
+        start = timer()
+        try:
+            value = fn(*args)
+        except Exception as e:
+            stats.add_field(schema, key, timer() - start, e)
+            raise
+        stats.add_field(schema, key, timer() - start)
+        return value
+    return timed
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import six
+from flask import Response, request
+
+try:
+    #noinspection PyUnresolvedReferences
+    from collections import OrderedDict
+except ImportError:
+    from .ordereddict import OrderedDict
+
+# Atomically replaces an existing file as well, on Python 3
+_replace = getattr(os, 'replace', os.rename)
+
+
+class CacheStore(object):
+    """
+    The interface of the stores backing a :class:`ResponseCache`. Keys are
+    text, values are ``(body, status, headers)`` entries, with the body as bytes
+    and the headers as a list of pairs, and every value expires after its timeout.
+    """
+    def get(self, key):
+        """
+        Returns the value stored for the key, or None if there is none or it
+        has expired.
+        """
+        raise NotImplementedError
+
+    def set(self, key, value, timeout):
+        """
+        Stores a value for the given number of seconds.
+        """
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryStore(CacheStore):
+    """
+    An in-process store that evicts the least recently used entry once it holds
+    ``max_entries`` values.
+    """
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                return None
+            # Re-inserting moves the entry to the most recently used end
+            self.entries[key] = entry
+            return value
+
+    def set(self, key, value, timeout):
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = (time.time() + timeout, value)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class FileStore(CacheStore):
+    """
+    A store that keeps one file per entry in a local directory, so that it is
+    shared by all the worker processes of a server (e.g. gunicorn workers) on
+    the same machine. Files are replaced atomically and reads refresh a file's
+    modification time. Every ``prune_interval`` seconds a write removes the least
+    recently used files above ``max_entries``, so the directory can briefly hold
+    more files than that.
+
+    Entries are stored as a line of JSON (the expiry time, status and headers)
+    followed by the raw body, so reading a file never runs code. The directory
+    is created readable by its owner only. Anyone who can write to it can still
+    change the responses that are served, so it should not be shared with other
+    users.
+    """
+    suffix = '.cache'
+
+    def __init__(self, path, max_entries=4096, prune_interval=60):
+        """
+        :param path: The directory the files are kept in
+        :param max_entries: (optional, default:4096) The number of files kept
+        :param prune_interval: (optional, default:60) The minimum number of seconds
+            between two prunes of the directory by a process
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self.pruned_at = 0
+        if not os.path.isdir(path):
+            os.makedirs(path, 0o700)
+
+    def filename(self, key):
+        digest = hashlib.sha1(six.text_type(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.path, digest + self.suffix)
+
+    def get(self, key):
+        filename = self.filename(key)
+        try:
+            with open(filename, 'rb') as f:
+                expires, status, headers = json.loads(f.readline().decode('utf-8'))
+                body = f.read()
+        except (IOError, OSError, ValueError, TypeError):
+            return None
+        if expires < time.time():
+            self.delete(key)
+            return None
+        try:
+            os.utime(filename, None)
+        except OSError:
+            pass
+        return body, status, [tuple(header) for header in headers]
+
+    def set(self, key, value, timeout):
+        body, status, headers = value
+        meta = json.dumps([time.time() + timeout, status, list(headers)])
+        fd, tmp = tempfile.mkstemp(dir=self.path)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(meta.encode('utf-8') + b'\n')
+                f.write(body)
+            _replace(tmp, self.filename(key))
+        except (IOError, OSError):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        now = time.time()
+        if now - self.pruned_at >= self.prune_interval:
+            self.pruned_at = now
+            self.prune()
+
+    def prune(self):
+        """
+        Removes the least recently used files above ``max_entries``.
+        """
+        filenames = [os.path.join(self.path, name) for name in os.listdir(self.path)
+                     if name.endswith(self.suffix)]
+        if len(filenames) <= self.max_entries:
+            return
+        by_age = []
+        for filename in filenames:
+            try:
+                by_age.append((os.path.getmtime(filename), filename))
+            except OSError:
+                pass
+        by_age.sort()
+        for mtime, filename in by_age[:len(by_age) - self.max_entries]:
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+
+    def delete(self, key):
+        try:
+            os.remove(self.filename(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.path):
+            if name.endswith(self.suffix):
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+
+
+class ResponseCache(object):
+    """
+    Caches serialized responses of ``marshal_with`` views. Responses are keyed by
+    endpoint, view arguments, query parameters and representation and are
+    stored as the serialized body, status and headers, so a hit skips the view,
+    marshaling and serialization. Keeps hit and miss counters.
+    """
+    def __init__(self, store=None, timeout=60):
+        """
+        :param store: (optional) The :class:`CacheStore` entries are kept in.
+            Defaults to a :class:`MemoryStore`.
+        :param timeout: (optional, default:60) The number of seconds a response
+            is cached for.
+        """
+        self.store = store if store is not None else MemoryStore()
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def make_key(self, representation, encoding=None):
+        """
+        Builds the cache key of the current request.
+
+        :param representation: The content type of the response representation
+        :param encoding: (optional) The content encoding the response is compressed
+            with, so that compressed bodies are cached as they are sent.
+        """
+        view_args = sorted((request.view_args or {}).items())
+        query = sorted(request.args.items(multi=True))
+        return u'{0}|{1!r}|{2!r}|{3}|{4}'.format(request.endpoint, view_args, query,
+                                                  representation, encoding or '')
+
+    def get(self, key):
+        """
+        Returns the cached response for the key, or None on a miss.
+        """
+        entry = self.store.get(key)
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            return None
+        body, status, headers = entry
+        return Response(body, status, headers)
+
+    def set(self, key, response):
+        """
+        Caches a (non streamed) response under the key.
+        """
+        entry = (response.get_data(), response.status_code, list(response.headers.items()))
+        self.store.set(key, entry, self.timeout)
+
+    @property
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,100 @@
+import copy
+
+
+def parse_selection(selection):
+    """
+    Parses a comma separated list of (dotted) field names, like
+    ``id,owner.name,owner.address.city``, into a tree of dicts. A name maps to
+    an empty dict if the whole field was selected.
+    """
+    tree = {}
+    for name in selection.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        node = tree
+        parts = name.split('.')
+        for part in parts[:-1]:
+            child = node.setdefault(part, {})
+            if child is None:
+                # The whole field was selected already
+                break
+            node = child
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+def _prune_field(field, include, exclude):
+    """
+    Applies a sub selection to a nested dict, Nested field or List of Nested
+    fields. Other fields can't be pruned and are returned as is.
+    """
+    if isinstance(field, dict):
+        return prune_fields(field, include, exclude)
+    if hasattr(field, 'nested') and not isinstance(field, type):
+        pruned = copy.copy(field)
+        pruned.nested = prune_fields(field.nested, include, exclude)
+        return pruned
+    container = getattr(field, 'container', None)
+    if container is not None and hasattr(container, 'nested'):
+        pruned = copy.copy(field)
+        pruned.container = _prune_field(container, include, exclude)
+        return pruned
+    return field
+
+
+def prune_fields(fields, include=None, exclude=None):
+    """
+    Returns a copy of a fields dict that only holds the selected fields.
+
+    :param fields: The fields dict to prune
+    :param include: (optional) A tree from :func:`parse_selection` of the fields to
+        keep. All fields are kept if it is None.
+    :param exclude: (optional) A tree from :func:`parse_selection` of the fields to
+        drop.
+    """
+    pruned = type(fields)()
+    for key, field in fields.items():
+        sub_include = sub_exclude = None
+        if include is not None:
+            if key not in include:
+                continue
+            sub_include = include[key]
+        if exclude is not None and key in exclude:
+            sub_exclude = exclude[key]
+            if sub_exclude is None:
+                continue
+        if sub_include is not None or sub_exclude is not None:
+            field = _prune_field(field, sub_include, sub_exclude)
+        pruned[key] = field
+    return pruned
+
+
+# Selections come from clients, so only this many pruned schemas are cached
+MAX_SELECTIONS = 256
+
+_selections = {}
+
+
+def select_fields(fields, include=None, exclude=None):
+    """
+    Returns the fields dict pruned to the ``include`` and ``exclude`` selection
+    strings (see :func:`parse_selection`). Pruned schemas are cached per fields
+    dict and selection, so the same selection gets the same (compiled) schema.
+    """
+    if not include and not exclude:
+        return fields
+
+    key = (id(fields), include, exclude)
+    cached = _selections.get(key)
+    if cached is not None and cached[0] is fields:
+        return cached[1]
+
+    pruned = prune_fields(fields,
+                          parse_selection(include) if include else None,
+                          parse_selection(exclude) if exclude else None)
+    if len(_selections) >= MAX_SELECTIONS:
+        _selections.pop(next(iter(_selections)))
+    _selections[key] = (fields, pruned)
+    return pruned
@@ -0,0 +1,154 @@
+import asyncio
+import threading
+
+import pytest
+
+from flask_window_dressing import fields, marshal_with, validate_params
+from flask_window_dressing.async_support import ResolvedObject, resolve
+
+pytest.importorskip('asgiref')
+
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+async def load(value):
+    await asyncio.sleep(0)
+    return value
+
+
+author_fields = {'name': fields.String}
+post_fields = {
+    'id': fields.Integer,
+    'title': fields.String,
+    'author': fields.Nested(author_fields),
+    'author_name': fields.String(attribute='author.name'),
+}
+
+
+def test_async_view_is_marshaled(app, client):
+    @app.route('/')
+    @marshal_with({'id': fields.Integer})
+    async def view():
+        await asyncio.sleep(0)
+        return {'id': '1', 'other': 2}
+
+    assert client.get('/').get_json() == {'id': 1}
+
+
+def test_async_view_keeps_code_and_headers(app, client):
+    @app.route('/')
+    @marshal_with({'id': fields.Integer})
+    async def view():
+        return {'id': 1}, 201, {'X-Thing': 'a'}
+
+    response = client.get('/')
+    assert response.status_code == 201
+    assert response.headers['X-Thing'] == 'a'
+
+
+def test_async_validate_params(app, client):
+    @app.route('/')
+    @validate_params({'page': fields.Integer})
+    async def view(page=None):
+        return {'page': page}
+
+    assert client.get('/?page=3').get_json() == {'page': 3}
+
+
+def test_awaitable_values_are_resolved(app, client):
+    @app.route('/')
+    @marshal_with(post_fields, await_values=True)
+    async def view():
+        return [
+            {'id': 1, 'title': load('a'), 'author': load({'name': load('x')})},
+            Obj(id=2, title='b', author=Obj(name=load('y'))),
+        ]
+
+    assert client.get('/').get_json() == [
+        {'id': 1, 'title': 'a', 'author': {'name': 'x'}, 'author_name': 'x'},
+        {'id': 2, 'title': 'b', 'author': {'name': 'y'}, 'author_name': 'y'},
+    ]
+
+
+def test_resolve_awaits_concurrently_and_copies():
+    started = []
+
+    async def slow(value):
+        started.append(value)
+        await asyncio.sleep(0.05)
+        return value
+
+    data = [{'id': i, 'title': slow(str(i)), 'author': None} for i in range(20)]
+    originals = [dict(d) for d in data]
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        begin = loop.time()
+        resolved = await resolve(data, post_fields)
+        return resolved, loop.time() - begin
+
+    resolved, elapsed = asyncio.run(run())
+    assert [d['title'] for d in resolved] == [str(i) for i in range(20)]
+    assert elapsed < 0.5
+    assert [d['title'] for d in data] == [d['title'] for d in originals]
+
+
+def test_resolve_wraps_objects():
+    obj = Obj(id=1, title=load('a'), author=None, extra='e')
+    resolved = asyncio.run(resolve(obj, post_fields))
+    assert isinstance(resolved, ResolvedObject)
+    assert resolved.title == 'a' and resolved.extra == 'e'
+    assert not isinstance(obj.title, str)
+    obj.title.close()
+
+
+def test_resolve_skips_fields_that_are_not_present():
+    loads = []
+
+    class Post(object):
+        def __init__(self, author_id):
+            self.author_id = author_id
+
+        @property
+        def author(self):
+            loads.append(self.author_id)
+            return load({'name': 'x'})
+
+    gated = {'author': fields.Nested(author_fields, allow_null=True, present='author_id')}
+    resolved = asyncio.run(resolve([Post(None), Post(1)], gated))
+    assert loads == [1]
+    assert resolved[1].author == {'name': 'x'}
+
+
+def test_large_lists_are_marshaled_in_a_thread(app, client):
+    app.config['WINDOW_DRESSING_ASYNC_OFFLOAD_SIZE'] = 2
+    threads = []
+
+    class Field(fields.Raw):
+        def format(self, value):
+            threads.append(threading.current_thread())
+            return value
+
+    @app.route('/<int:n>')
+    @marshal_with({'id': Field})
+    async def view(n):
+        return [{'id': i} for i in range(n)]
+
+    assert client.get('/1').get_json() == [{'id': 0}]
+    view_thread = threads.pop()
+    assert client.get('/3').get_json() == [{'id': 0}, {'id': 1}, {'id': 2}]
+    assert all(thread is not view_thread for thread in threads)
+
+
+def test_offloading_can_be_disabled(app, client):
+    app.config['WINDOW_DRESSING_ASYNC_OFFLOAD_SIZE'] = None
+
+    @app.route('/')
+    @marshal_with({'id': fields.Integer})
+    async def view():
+        return [{'id': i} for i in range(3)]
+
+    assert client.get('/').get_json() == [{'id': 0}, {'id': 1}, {'id': 2}]
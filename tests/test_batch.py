@@ -0,0 +1,63 @@
+import pytest
+
+from flask_window_dressing import fields, marshal
+
+
+class Obj(object):
+    def __init__(self, i):
+        self.i = i
+        self.name = 'n{0}'.format(i)
+        self.price = i * 1.5
+        self.flag = i % 2
+        self.owner = {'name': 'o{0}'.format(i)} if i % 3 else None
+
+
+schema = {
+    'i': fields.Integer,
+    'name': fields.String,
+    'price': fields.Float,
+    'p2': fields.Fixed(2, attribute='price'),
+    'flag': fields.Boolean,
+    'owner': fields.Nested({'name': fields.String}, allow_null=True),
+    'own2': fields.Nested({'name': fields.String}, attribute='owner'),
+    'sub': {'i': fields.Raw, 'fs': fields.FormattedString('{name}-{i}')},
+    'tags': fields.List(fields.Integer, default=[]),
+}
+
+
+def test_batch_matches_row_by_row():
+    rows = [Obj(i) for i in range(7)]
+    assert marshal(rows, rows, schema, batch=True) == marshal(rows, rows, schema)
+
+
+def test_empty_list():
+    assert marshal([], [], schema, batch=True) == []
+
+
+def test_batch_of_a_single_object_marshals_it():
+    row = Obj(1)
+    assert marshal(row, row, schema, batch=True) == marshal(row, row, schema)
+
+
+def test_pandas_frame():
+    pd = pytest.importorskip('pandas')
+    frame = pd.DataFrame({'i': [0, 1, 2], 'name': ['a', 'b', 'c'], 'price': [1.0, 2.5, 3.0],
+                          'flag': [True, False, True]})
+    flat = {'i': fields.Integer, 'name': fields.String, 'price': fields.Fixed(1),
+            'flag': fields.Boolean}
+    assert marshal(frame, frame, flat, batch=True) == [
+        {'i': 0, 'name': 'a', 'price': '1.0', 'flag': True},
+        {'i': 1, 'name': 'b', 'price': '2.5', 'flag': False},
+        {'i': 2, 'name': 'c', 'price': '3.0', 'flag': True},
+    ]
+
+
+def test_namedtuple_rows_are_records():
+    from collections import namedtuple
+    Row = namedtuple('Row', ['i', 'name'])
+    flat = {'i': fields.Integer, 'name': fields.String}
+    rows = [Row(1, 'a'), Row(2, 'b')]
+    expected = [{'i': 1, 'name': 'a'}, {'i': 2, 'name': 'b'}]
+    assert marshal(rows, rows, flat, batch=True) == expected
+    assert marshal(rows, rows, flat) == expected
+    assert marshal(rows[0], rows, flat) == expected[0]
@@ -0,0 +1,28 @@
+"""
+Runs every benchmark once, so that the suite keeps working as the code changes.
+"""
+import os
+
+import pytest
+
+pytest.importorskip('pyperf')
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'benchmarks')
+
+
+class OnceRunner(object):
+    def __init__(self):
+        self.names = []
+
+    def bench_func(self, name, func, *args):
+        assert name not in self.names
+        self.names.append(name)
+        func(*args)
+
+
+@pytest.mark.parametrize('module', ['bench_marshal', 'bench_fields', 'bench_requests'])
+def test_benchmarks_run(module, monkeypatch):
+    monkeypatch.syspath_prepend(BENCHMARKS)
+    runner = OnceRunner()
+    __import__(module).add_benchmarks(runner)
+    assert runner.names
@@ -0,0 +1,116 @@
+import gc
+
+from flask_window_dressing import CompiledFields, compile_fields, fields, marshal
+
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+schema = {
+    'id': fields.Integer,
+    'name': fields.String(attribute='title'),
+    'owner': {
+        'id': fields.Integer(attribute='owner_id'),
+    },
+}
+
+
+def test_compiled_schema_is_cached():
+    assert compile_fields(schema) is compile_fields(schema)
+    assert compile_fields(schema, going_in=True) is not compile_fields(schema)
+
+
+def test_compiled_schema_is_passed_through():
+    compiled = compile_fields(schema)
+    assert compile_fields(compiled) is compiled
+
+
+def test_marshal_object_and_list():
+    obj = Obj(id='1', title='one', owner_id=2)
+    assert marshal(obj, obj, schema) == {'id': 1, 'name': 'one', 'owner': {'id': 2}}
+    assert marshal([obj, obj], None, schema) == [{'id': 1, 'name': 'one', 'owner': {'id': 2}}] * 2
+
+
+def test_added_field_is_picked_up():
+    schema = {'a': fields.Integer}
+    data = {'a': 1, 'b': 2}
+    assert marshal(data, data, schema) == {'a': 1}
+    schema['b'] = fields.Integer
+    assert marshal(data, data, schema) == {'a': 1, 'b': 2}
+    del schema['a']
+    assert marshal(data, data, schema) == {'b': 2}
+
+
+def test_replaced_field_is_picked_up():
+    schema = {'a': fields.Integer}
+    data = {'a': '1'}
+    assert marshal(data, data, schema) == {'a': 1}
+    schema['a'] = fields.String
+    assert marshal(data, data, schema) == {'a': '1'}
+
+
+def test_changed_nested_dict_is_picked_up():
+    nested = {'x': fields.Integer}
+    schema = {'n': nested}
+    data = {'x': 1, 'y': 2}
+    assert marshal(data, data, schema) == {'n': {'x': 1}}
+    nested['y'] = fields.Integer
+    assert marshal(data, data, schema) == {'n': {'x': 1, 'y': 2}}
+
+
+def test_changed_nested_field_dict_is_picked_up():
+    nested = {'x': fields.Integer}
+    schema = {'n': fields.Nested(nested), 'ns': fields.List(fields.Nested(nested))}
+    data = {'n': {'x': 1, 'y': 2}, 'ns': [{'x': 3, 'y': 4}]}
+    assert marshal(data, data, schema) == {'n': {'x': 1}, 'ns': [{'x': 3}]}
+    nested['y'] = fields.Integer
+    assert marshal(data, data, schema) == {'n': {'x': 1, 'y': 2}, 'ns': [{'x': 3, 'y': 4}]}
+
+
+def test_nested_schema_is_not_looked_up_per_row(monkeypatch):
+    schema = {'n': fields.Nested({'x': fields.Integer})}
+    data = [{'n': {'x': i}} for i in range(5)]
+    marshal(data, data, schema)
+    calls = []
+    compile = fields.compile_fields
+    monkeypatch.setattr(fields, 'compile_fields',
+                        lambda *args: calls.append(args) or compile(*args))
+    assert marshal(data, data, schema) == [{'n': {'x': i}} for i in range(5)]
+    assert calls == []
+
+
+def test_dict_nesting_itself():
+    tree = {'name': fields.String}
+    tree['children'] = fields.List(fields.Nested(tree))
+    data = {'name': 'a', 'children': [{'name': 'b', 'children': []}]}
+    assert marshal(data, data, tree) == data
+
+
+def test_changed_dict_is_picked_up_by_marshal_with(app, client):
+    from flask_window_dressing import marshal_with
+    schema = {'a': fields.Integer}
+
+    @app.route('/')
+    @marshal_with(schema)
+    def view():
+        return {'a': 1, 'b': 2}
+
+    assert client.get('/').get_json() == {'a': 1}
+    schema['b'] = fields.Integer
+    assert client.get('/').get_json() == {'a': 1, 'b': 2}
+
+
+def test_new_dict_with_reused_id_is_compiled():
+    compiled = compile_fields({'a': fields.Integer})
+    gc.collect()
+    other = {'b': fields.Integer}
+    assert isinstance(compile_fields(other), CompiledFields)
+    assert compile_fields(other)({'a': 1, 'b': 2}, None) == {'b': 2}
+    assert compiled({'a': 1, 'b': 2}, None) == {'a': 1}
+
+
+def test_going_in_uses_attribute_as_key():
+    incoming = {'name': fields.String(attribute='title')}
+    assert marshal({'name': 'x'}, None, incoming, True) == {'title': 'x'}
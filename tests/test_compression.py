@@ -0,0 +1,143 @@
+import gzip
+import json
+import zlib
+
+import pytest
+
+from flask_window_dressing import fields, marshal_with
+from flask_window_dressing.utils.compression import codecs, compress_response
+from flask_window_dressing.utils.response_cache import ResponseCache
+
+schema = {'id': fields.Integer, 'name': fields.String}
+records = [{'id': i, 'name': 'record {0}'.format(i)} for i in range(100)]
+
+
+def decompress(encoding, data):
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'deflate':
+        return zlib.decompress(data)
+    if encoding == 'br':
+        return pytest.importorskip('brotli').decompress(data)
+    zstandard = pytest.importorskip('zstandard')
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache()
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def app(app, cache, calls):
+    app.config['WINDOW_DRESSING_COMPRESS'] = True
+
+    @app.route('/plain')
+    @marshal_with(schema)
+    def plain():
+        return records
+
+    @app.route('/small')
+    @marshal_with(schema)
+    def small():
+        return records[0]
+
+    @app.route('/stream')
+    @marshal_with(schema, stream=True)
+    def stream():
+        return iter(records)
+
+    @app.route('/cached')
+    @marshal_with(schema, cache=cache)
+    def cached():
+        calls.append(1)
+        return records
+
+    @app.route('/csv')
+    @marshal_with(schema)
+    def csv():
+        return records
+
+    return app
+
+
+@pytest.mark.parametrize('encoding', list(codecs))
+def test_plain_json_response_is_compressed(client, encoding):
+    response = client.get('/plain', headers={'Accept-Encoding': encoding})
+    assert response.headers['Content-Encoding'] == encoding
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(decompress(encoding, response.data)) == records
+
+
+def test_preferred_encoding_wins(client):
+    response = client.get('/plain', headers={'Accept-Encoding': 'gzip;q=0.5, deflate'})
+    assert response.headers['Content-Encoding'] == 'deflate'
+
+
+def test_identity(client):
+    response = client.get('/plain', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json() == records
+
+
+def test_small_bodies_are_not_compressed(client):
+    response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json() == records[0]
+
+
+def test_disabled(app, client):
+    app.config['WINDOW_DRESSING_COMPRESS'] = False
+    response = client.get('/plain', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json() == records
+
+
+def test_streamed_response_is_compressed(client):
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert json.loads(gzip.decompress(response.data)) == records
+
+
+def test_other_representations_are_compressed(app, client):
+    app.config['WINDOW_DRESSING_REPRESENTATIONS'] = ['application/json', 'text/csv']
+    response = client.get('/csv', headers={'Accept': 'text/csv', 'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data).startswith(b'id,name\r\n0,record 0\r\n')
+
+
+def test_plain_flask_responses_are_compressed_after_request(app, client):
+    @app.route('/flask')
+    def flask_view():
+        return {'records': records}
+
+    app.after_request(compress_response)
+    response = client.get('/flask', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data)) == {'records': records}
+
+
+def test_cache_keeps_compressed_bodies(client, cache, calls):
+    first = client.get('/cached', headers={'Accept-Encoding': 'gzip'})
+    second = client.get('/cached', headers={'Accept-Encoding': 'gzip'})
+    assert second.headers['Content-Encoding'] == 'gzip'
+    assert second.data == first.data
+    plain = client.get('/cached', headers={'Accept-Encoding': 'identity'})
+    assert plain.get_json() == records
+    assert len(calls) == 2
+    assert cache.stats == {'hits': 1, 'misses': 2}
+
+
+def test_head_response_is_not_cached_as_compressed(client, calls):
+    head = client.head('/cached', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in head.headers
+    response = client.get('/cached', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data)) == records
+    assert len(calls) == 2
@@ -0,0 +1,133 @@
+import datetime
+
+import pytest
+
+from flask_window_dressing import fields, marshal_with
+
+schema = {'id': fields.Integer, 'name': fields.String}
+MODIFIED = datetime.datetime(2013, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def app(app, calls):
+    @app.route('/etag')
+    @marshal_with(schema, etag=True)
+    def etag():
+        calls.append('etag')
+        return {'id': 1, 'name': 'one'}
+
+    @app.route('/version')
+    @marshal_with(schema, version=lambda: 7, last_modified=lambda: MODIFIED,
+                  cache_control='max-age=60')
+    def version():
+        calls.append('version')
+        return {'id': 1, 'name': 'one'}
+
+    return app
+
+
+def test_etag_is_sent(client):
+    response = client.get('/etag')
+    assert response.status_code == 200
+    etag, weak = response.get_etag()
+    assert etag and not weak
+
+
+def test_matching_etag_is_not_modified(client):
+    etag = client.get('/etag').headers['ETag']
+    response = client.get('/etag', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+
+def test_other_etag_is_sent_again(client):
+    response = client.get('/etag', headers={'If-None-Match': '"other"'})
+    assert response.status_code == 200
+    assert response.get_json() == {'id': 1, 'name': 'one'}
+
+
+def test_version_skips_the_view(client, calls):
+    response = client.get('/version')
+    assert response.headers['Cache-Control'] == 'max-age=60'
+    assert response.last_modified == MODIFIED
+    response = client.get('/version', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+    assert response.headers['Cache-Control'] == 'max-age=60'
+    assert calls == ['version']
+
+
+def test_last_modified_is_not_modified(client, calls):
+    response = client.get('/version', headers={'If-Modified-Since': 'Tue, 01 Jan 2013 00:00:00 GMT'})
+    assert response.status_code == 304
+    assert calls == []
+
+
+def test_post_is_never_not_modified(app, client):
+    @app.route('/post', methods=['POST'])
+    @marshal_with(schema, version=lambda: 7)
+    def post():
+        return {'id': 1, 'name': 'one'}
+
+    etag = client.post('/post').headers['ETag']
+    assert client.post('/post', headers={'If-None-Match': etag}).status_code == 200
+
+
+@pytest.mark.parametrize('path', ['/etag', '/version'])
+def test_representations_have_their_own_etags(app, client, path):
+    msgpack = pytest.importorskip('msgpack')
+    app.config['WINDOW_DRESSING_REPRESENTATIONS'] = ['application/json', 'application/msgpack']
+    json_response = client.get(path, headers={'Accept': 'application/json'})
+    msgpack_response = client.get(path, headers={'Accept': 'application/msgpack'})
+    assert msgpack_response.mimetype == 'application/msgpack'
+    assert msgpack.unpackb(msgpack_response.data) == {'id': 1, 'name': 'one'}
+    assert json_response.headers['ETag'] != msgpack_response.headers['ETag']
+    assert 'Accept' in json_response.headers['Vary']
+    response = client.get(path, headers={'Accept': 'application/msgpack',
+                                         'If-None-Match': json_response.headers['ETag']})
+    assert response.status_code == 200
+    assert response.data == msgpack_response.data
+
+
+@pytest.mark.parametrize('path', ['/etag', '/version'])
+def test_content_codings_have_their_own_etags(app, client, path):
+    app.config['WINDOW_DRESSING_COMPRESS'] = True
+    app.config['WINDOW_DRESSING_COMPRESS_MIN_SIZE'] = 0
+    plain = client.get(path, headers={'Accept-Encoding': 'identity'})
+    gzipped = client.get(path, headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert plain.headers['ETag'] != gzipped.headers['ETag']
+    response = client.get(path, headers={'Accept-Encoding': 'gzip',
+                                         'If-None-Match': gzipped.headers['ETag']})
+    assert response.status_code == 304
+
+
+def test_errors_get_no_etag(app, client):
+    @app.route('/missing')
+    @marshal_with(schema, etag=True)
+    def missing():
+        return {'id': 0}, 404
+
+    response = client.get('/missing')
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
+
+
+def test_etag_follows_the_data(app, client):
+    data = {'id': 1, 'name': 'one'}
+
+    @app.route('/changing')
+    @marshal_with(schema, etag=True)
+    def changing():
+        return data
+
+    etag = client.get('/changing').headers['ETag']
+    data['name'] = 'two'
+    response = client.get('/changing', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
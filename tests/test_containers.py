@@ -0,0 +1,45 @@
+from collections import OrderedDict
+
+import pytest
+
+from flask_window_dressing import (DEFAULT_CONTAINER, DICT, ORDERED_DICT, PAIRS, RECORD,
+                                   compile_fields, fields, marshal)
+
+schema = OrderedDict([('a', fields.Integer), ('b-c', fields.String),
+                      ('sub', {'x': fields.Raw(attribute='a')})])
+rows = [{'a': i, 'b-c': 'q'} for i in range(3)]
+
+
+@pytest.mark.parametrize('container', [DICT, ORDERED_DICT, PAIRS, RECORD])
+def test_batch_matches_row_by_row(container):
+    compiled = compile_fields(schema, container=container)
+    assert compiled.batch(rows, rows) == compiled(rows, rows)
+
+
+def test_outbound_default_is_a_plain_dict():
+    assert DEFAULT_CONTAINER == DICT
+    record = marshal(rows[0], rows[0], schema)
+    assert type(record) is dict and type(record['sub']) is dict
+    assert list(record) == ['a', 'b-c', 'sub']
+
+
+def test_ordered_dict():
+    record = compile_fields(schema, container=ORDERED_DICT)(rows[0], rows[0])
+    assert isinstance(record, OrderedDict)
+    assert isinstance(record['sub'], OrderedDict)
+
+
+def test_record_renames_invalid_identifiers():
+    record = compile_fields(schema, container=RECORD)(rows[0], rows[0])
+    assert record[0] == 0 and record[1] == 'q'
+    assert record.sub.x == 0
+
+
+def test_incoming_records_are_dicts():
+    assert type(marshal(rows[0], rows[0], schema, True)) is dict
+
+
+def test_empty_schema():
+    assert marshal(rows[0], None, {}) == {}
+    assert compile_fields({}).batch(rows, rows) == [{}, {}, {}]
+    assert compile_fields({}, container=RECORD).batch(rows, rows) == [(), (), ()]
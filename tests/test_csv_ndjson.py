@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+from collections import OrderedDict
+
+import pytest
+
+from flask_window_dressing import fields, marshal_with
+from flask_window_dressing.representations.csv_representation import CsvResource, format_cell
+from flask_window_dressing.representations.ndjson_representation import NdjsonResource
+
+schema = OrderedDict([
+    ('id', fields.Integer),
+    ('name', fields.String),
+    ('owner', fields.Nested(OrderedDict([('id', fields.Integer), ('name', fields.String)]),
+                            allow_null=True)),
+    ('meta', OrderedDict([('active', fields.Boolean)])),
+    ('tags', fields.List(fields.String)),
+])
+
+rows = [
+    {'id': 1, 'name': u'Zoë, "Z"', 'owner': {'id': 9, 'name': 'o'}, 'active': True,
+     'tags': ['a', 'b']},
+    {'id': 2, 'name': 'plain', 'owner': None, 'active': False, 'tags': None},
+]
+
+
+def read_csv(response):
+    return list(csv.reader(io.StringIO(response.get_data().decode('utf-8'))))
+
+
+@pytest.fixture
+def app(app):
+    app.config['WINDOW_DRESSING_REPRESENTATIONS'] = ['application/json', 'text/csv',
+                                                     'application/x-ndjson']
+
+    @app.route('/')
+    @marshal_with(schema)
+    def view():
+        return rows
+
+    @app.route('/stream/<kind>')
+    def stream(kind):
+        if kind == 'csv':
+            representation = CsvResource(chunk_size=1)
+        else:
+            representation = NdjsonResource(chunk_size=1)
+
+        @marshal_with(schema, stream=representation)
+        def records():
+            for row in rows:
+                yield row
+        return records()
+
+    return app
+
+
+@pytest.mark.parametrize('value,cell', [
+    (None, ''), (True, 'true'), (False, 'false'), (1.5, '1.5'), (u'ü', u'ü'),
+    (['a', 1, None], 'a,1,'), ([{'a': 1}], '[{"a": 1}]'), ({'a': [1]}, '{"a": [1]}'),
+])
+def test_format_cell(value, cell):
+    assert format_cell(value) == cell
+
+
+def test_csv_columns_follow_the_schema(client):
+    response = client.get('/', headers={'Accept': 'text/csv'})
+    assert response.mimetype == 'text/csv'
+    assert read_csv(response) == [
+        ['id', 'name', 'owner.id', 'owner.name', 'meta.active', 'tags'],
+        ['1', u'Zoë, "Z"', '9', 'o', 'true', 'a,b'],
+        ['2', 'plain', '', '', 'false', ''],
+    ]
+
+
+def test_ndjson_lines(client):
+    response = client.get('/', headers={'Accept': 'application/x-ndjson'})
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data().split(b'\n')
+    assert lines[-1] == b''
+    assert [json.loads(line) for line in lines[:-1]] == client.get('/').get_json()
+
+
+def test_json_is_preferred(client):
+    assert client.get('/', headers={'Accept': '*/*'}).mimetype == 'application/json'
+    assert client.get('/', headers={'Accept': 'text/csv;q=0.5, application/json'}).mimetype == \
+        'application/json'
+
+
+@pytest.mark.parametrize('kind', ['csv', 'ndjson'])
+def test_streamed_output_matches(client, kind):
+    accept = 'text/csv' if kind == 'csv' else 'application/x-ndjson'
+    response = client.get('/stream/' + kind)
+    assert response.is_streamed
+    assert response.get_data() == client.get('/', headers={'Accept': accept}).get_data()
+
+
+def test_csv_without_schema_uses_first_record():
+    chunks = CsvResource().iter_chunks(iter([{'a': 1, 'b': {'c': 2}}, {'a': 3}]))
+    assert b''.join(chunks) == b'a,b.c\r\n1,2\r\n3,\r\n'
+    assert list(CsvResource().iter_chunks(iter([]))) == []
+
+
+def test_csv_is_sent_in_chunks():
+    chunks = list(CsvResource(chunk_size=4).iter_chunks([{'a': 'xxxx'}] * 3))
+    assert len(chunks) > 1
+
+
+def test_ndjson_input(app):
+    with app.app_context():
+        assert NdjsonResource().input(b'{"a": 1}\n\n{"a": 2}\n') == [{'a': 1}, {'a': 2}]
@@ -0,0 +1,63 @@
+import datetime
+
+import pytest
+import pytz
+from dateutil import parser
+
+from flask_window_dressing import fields, marshal
+
+
+@pytest.mark.parametrize('value', [
+    '2013-01-01T12:30:15+00:00',
+    '2013-01-01T12:30:15Z',
+    '2013-01-01T12:30:15.123456-05:00',
+    '2013-01-01T12:30:15+05:30',
+    'Jan 1 2013 12:30 UTC',
+])
+def test_input_matches_dateutil(value):
+    parsed = fields.DateTime().input('v', {'v': value})
+    expected = parser.parse(value).astimezone(pytz.utc)
+    assert parsed == expected
+    assert parsed.tzinfo is pytz.utc
+
+
+def test_input_format_hint():
+    field = fields.DateTime(input_format='%d/%m/%Y %H:%M')
+    assert field.input('v', {'v': '02/01/2013 10:00'}) == \
+        datetime.datetime(2013, 1, 2, 10, 0, tzinfo=pytz.utc)
+
+
+def test_parsed_values_are_memoized():
+    field = fields.DateTime(cache_size=2)
+    first = field.input('v', {'v': '2013-01-01T00:00:00Z'})
+    assert field.input('v', {'v': '2013-01-01T00:00:00Z'}) is first
+    for day in range(2, 6):
+        field.input('v', {'v': '2013-01-0{0}T00:00:00Z'.format(day)})
+    assert len(field._parsed) <= 2
+
+
+def test_memo_can_be_disabled():
+    field = fields.DateTime(cache_size=0)
+    field.input('v', {'v': '2013-01-01T00:00:00Z'})
+    assert not field._parsed
+
+
+def test_none_passes_through():
+    assert fields.DateTime().input('v', {'v': None}) is None
+
+
+def test_invalid_value():
+    with pytest.raises(ValueError):
+        fields.DateTime().input('v', {'v': 'not a date'})
+
+
+def test_lists_are_parsed_in_bulk():
+    schema = {'ts': fields.List(fields.DateTime),
+              'c': fields.CommaSeparatedList(fields.DateTime)}
+    data = {'ts': ['2013-01-01T00:00:00Z', '2014-01-01T00:00:00+01:00'],
+            'c': '2013-01-01T00:00:00Z,2014-01-01T00:00:00Z'}
+    result = marshal(data, None, schema, True)
+    assert result['ts'] == [datetime.datetime(2013, 1, 1, tzinfo=pytz.utc),
+                            datetime.datetime(2013, 12, 31, 23, tzinfo=pytz.utc)]
+    assert result['c'] == [datetime.datetime(2013, 1, 1, tzinfo=pytz.utc),
+                           datetime.datetime(2014, 1, 1, tzinfo=pytz.utc)]
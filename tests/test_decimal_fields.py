@@ -0,0 +1,56 @@
+import decimal
+import json
+
+import pytest
+
+from flask_window_dressing import fields, marshal
+from flask_window_dressing.fields import MarshallingException
+from flask_window_dressing.representations.json_backends import json_backends
+
+big = decimal.Decimal('12345678901234567.89')
+
+
+def test_fixed_rounds_half_even():
+    field = fields.Fixed(decimals=1)
+    assert field.format('0.25') == '0.2'
+    assert field.format(0.35) == '0.3'
+    assert field.format(decimal.Decimal('0.45')) == '0.4'
+    assert field.format(3) == '3.0'
+
+
+def test_fixed_rejects_non_finite_values():
+    field = fields.Fixed()
+    for value in (float('nan'), float('inf'), 'nan', '-Infinity'):
+        with pytest.raises(MarshallingException):
+            field.format(value)
+
+
+def test_fixed_column_matches_format():
+    field = fields.Fixed(decimals=2)
+    values = [1, 2.5, '3.333', decimal.Decimal('4.005')]
+    assert field.format_column(values) == [field.format(value) for value in values]
+
+
+def test_as_number_returns_decimals():
+    assert fields.Fixed(2, as_number=True).format('1.005') == decimal.Decimal('1.00')
+    assert fields.Arbitrary(as_number=True).format(big) is big
+    assert fields.Arbitrary().format(big) == '12345678901234567.89'
+
+
+@pytest.mark.parametrize('name', list(json_backends))
+def test_backends_keep_decimal_precision(name):
+    backend = json_backends[name]
+    schema = {'price': fields.Fixed(2, as_number=True), 'list': fields.List(fields.Arbitrary(as_number=True))}
+    data = marshal({'price': big, 'list': [big]}, None, schema)
+    loaded = json.loads(backend.dumps(data).decode('utf-8'), parse_float=decimal.Decimal)
+    if backend.native_decimal:
+        assert loaded == {'price': big, 'list': [big]}
+    else:
+        assert loaded == {'price': str(big), 'list': [str(big)]}
+
+
+def test_comma_separated_list_of_numbers():
+    schema = {'prices': fields.CommaSeparatedList(fields.Fixed(1, as_number=True)),
+              'ids': fields.CommaSeparatedList(fields.Integer)}
+    data = {'prices': ['1.25', 2], 'ids': ['1', 2]}
+    assert marshal(data, data, schema) == {'prices': '1.2,2.0', 'ids': '1,2'}
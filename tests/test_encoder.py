@@ -0,0 +1,117 @@
+import datetime
+import decimal
+from collections import OrderedDict
+
+import pytest
+
+from flask_window_dressing import fields, marshal, marshal_with
+from flask_window_dressing.encoder import SchemaEncoder, compile_encoder, encode_value
+from flask_window_dressing.representations.json_backends import get_json_backend
+
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class Shout(fields.Raw):
+    def format(self, value):
+        return value.upper() + u'!'
+
+
+author_fields = OrderedDict([
+    ('id', fields.Integer),
+    ('name', fields.String),
+])
+
+schema = OrderedDict([
+    ('id', fields.Integer),
+    ('title', fields.String(attribute='name')),
+    ('shout', Shout(attribute='name')),
+    ('score', fields.Float),
+    ('price', fields.Fixed(decimals=2)),
+    ('active', fields.Boolean),
+    ('created', fields.DateTime),
+    ('tags', fields.List(fields.String)),
+    ('author', fields.Nested(author_fields, allow_null=True)),
+    ('editors', fields.List(fields.Nested(author_fields))),
+    ('meta', {'views': fields.Integer, 'label': fields.FormattedString(u'#{id}')}),
+    ('raw', fields.Raw),
+])
+
+alice = Obj(id=1, name=u'Alïce "A"')
+data = [
+    {'id': 1, 'name': u'ünïcode   "quoted"', 'score': 1.5, 'price': decimal.Decimal('3.14159'),
+     'active': True, 'created': datetime.datetime(2020, 1, 2, 3, 4, 5), 'tags': ['a', u'b\n'],
+     'author': alice, 'editors': [alice, None, {'id': '2', 'name': 'Bob'}], 'views': '7',
+     'raw': {'nested': [1, 2.5, None]}},
+    Obj(id='2', name='plain', score=float('inf'), price=None, active=0, created=None,
+        tags=None, author=None, editors=None, views=None, raw=None),
+    {'id': 3, 'name': '', 'score': float('nan'), 'price': 1, 'active': None,
+     'created': datetime.datetime(2021, 5, 6), 'tags': [], 'author': {'id': 2, 'name': None},
+     'editors': [], 'views': 0, 'raw': [u'x']},
+]
+
+
+def stdlib_dumps(value):
+    return get_json_backend('json').dumps(value)
+
+
+@pytest.mark.parametrize('value', [
+    u'ü"\\', 'x', None, True, False, 0, -3, 2 ** 70, 0.1, 1e300, float('inf'), float('-inf'),
+    float('nan'), [1, u'a', None], {'a': [1.5]}, {1: 2},
+])
+def test_encode_value_matches_json_dumps(value):
+    assert encode_value(value) == stdlib_dumps(value).decode('utf-8')
+
+
+def test_list_is_byte_identical():
+    assert compile_encoder(schema).encode(data) == stdlib_dumps(marshal(data, data, schema))
+
+
+def test_object_is_byte_identical():
+    for item in data:
+        assert compile_encoder(schema).encode(item) == stdlib_dumps(marshal(item, item, schema))
+
+
+def test_empty_schema_and_list():
+    assert compile_encoder({}).encode({'a': 1}) == stdlib_dumps(marshal({'a': 1}, None, {}))
+    assert compile_encoder(schema).encode([]) == b'[]'
+
+
+def test_memoized_encoding_is_byte_identical():
+    posts = [{'id': i, 'name': 'p', 'author': alice, 'editors': [alice, alice]} for i in range(5)]
+    assert compile_encoder(schema).encode(posts, memo=True) == \
+        stdlib_dumps(marshal(posts, posts, schema))
+
+
+def test_encoders_are_shared_and_follow_changes():
+    fields_dict = {'a': fields.Integer}
+    encoder = compile_encoder(fields_dict)
+    assert compile_encoder(fields_dict) is encoder
+    fields_dict['b'] = fields.Integer
+    assert compile_encoder(fields_dict) is not encoder
+    assert compile_encoder(fields_dict).encode({'a': 1, 'b': 2}) == \
+        stdlib_dumps(marshal({'a': 1, 'b': 2}, None, fields_dict))
+
+
+def test_prefetching_schema_is_not_fused():
+    prefetched = {
+        'id': fields.Integer,
+        'n': fields.Integer(prefetch=lambda rows: [len(rows)] * len(rows)),
+    }
+    encoder = SchemaEncoder(prefetched)
+    assert not encoder.fused
+    rows = [{'id': 1}, {'id': 2}]
+    assert encoder.encode(rows) == stdlib_dumps(marshal(rows, rows, prefetched, batch=True))
+
+
+def test_marshal_with_fused(app, client):
+    @app.route('/')
+    @marshal_with(schema, fused=True)
+    def view():
+        return data
+
+    response = client.get('/')
+    assert response.data == stdlib_dumps(marshal(data, data, schema))
+    assert response.mimetype == 'application/json'
@@ -0,0 +1,59 @@
+import pytest
+
+from flask_window_dressing import fields
+from flask_window_dressing.fields import MarshallingException
+
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+data = {'name': u'Zoë', 'email': 'z@example.com', 'n': 3.14159, 'owner': {'id': 7}}
+
+
+@pytest.mark.parametrize('src', [
+    u'{name} <{email}>',
+    u'{{literal}} {name}',
+    u'{n:.2f}|{n:>10}|{name!r}|{name!s}',
+    u'no fields',
+    u'',
+])
+def test_matches_str_format(src):
+    assert fields.FormattedString(src).output('k', data, None) == src.format(**data)
+
+
+def test_reads_attributes():
+    obj = Obj(**data)
+    assert fields.FormattedString(u'{name} <{email}>').output('k', obj, None) == u'Zoë <z@example.com>'
+
+
+def test_dotted_names_are_followed():
+    assert fields.FormattedString(u'owner {owner.id}').output('k', data, None) == u'owner 7'
+
+
+@pytest.mark.parametrize('src', [u'{owner[id]}', u'{n:{width}}', u'{name!a}'])
+def test_other_fields_fall_back_to_str_format(src):
+    field = fields.FormattedString(src)
+    assert field.segments is None
+    values = dict(data, width=6)
+    assert field.output('k', values, None) == src.format(**values)
+
+
+def test_missing_key_raises():
+    with pytest.raises(KeyError):
+        fields.FormattedString(u'{missing}').output('k', data, None)
+
+
+def test_positional_field_raises():
+    with pytest.raises(MarshallingException):
+        fields.FormattedString(u'{0}').output('k', data, None)
+
+
+def test_marshallable_object():
+    class Marshallable(object):
+        def __marshallable__(self):
+            return data
+
+    assert fields.FormattedString(u'{name} <{email}>').output('k', Marshallable(), None) == \
+        u'Zoë <z@example.com>'
@@ -0,0 +1,44 @@
+from flask_window_dressing import fields, marshal
+from flask_window_dressing.fields import get_value, make_accessor
+
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def test_dotted_path_through_objects_and_dicts():
+    obj = Obj(owner=Obj(address={'city': 'Zurich'}))
+    assert get_value('owner.address.city', obj) == 'Zurich'
+    assert make_accessor('owner.address.city')(obj) == 'Zurich'
+
+
+def test_missing_keys_return_the_default():
+    obj = Obj(owner=Obj())
+    assert get_value('owner.nope.city', obj, 'default') == 'default'
+    assert get_value('nope', {}, 'default') == 'default'
+    assert get_value('x', 'a string') is None
+
+
+def test_int_keys_index_sequences():
+    assert get_value(1, [5, 6]) == 6
+
+
+def test_falsy_values_are_kept():
+    obj = Obj(count=0, name='', flag=False)
+    assert [get_value(key, obj, 'default') for key in ('count', 'name', 'flag')] == [0, '', False]
+
+
+def test_field_attribute_paths():
+    obj = Obj(owner=Obj(address={'city': 'Zurich'}))
+    schema = {'city': fields.String(attribute='owner.address.city'),
+              'missing': fields.Raw(attribute='missing', default=4)}
+    assert marshal(obj, obj, schema) == {'city': 'Zurich', 'missing': 4}
+
+
+def test_changed_attribute_is_picked_up():
+    obj = Obj(owner='owner', other='other')
+    field = fields.Raw(attribute='owner')
+    assert field.get_output_value('x', obj) == 'owner'
+    field.attribute = 'other'
+    assert field.get_output_value('x', obj) == 'other'
@@ -0,0 +1,66 @@
+import datetime
+import decimal
+import json
+from collections import OrderedDict
+
+import pytest
+
+from flask_window_dressing.representations.json_backends import get_json_backend, json_backends
+from flask_window_dressing.representations.json_representation import (JsonResource,
+                                                                       StreamingJsonResource)
+
+data = OrderedDict([('b', 1), ('a', datetime.datetime(2020, 1, 2, 3, 4, 5)),
+                    ('p', decimal.Decimal('1.50')), ('u', '/x/y'), ('t', u'é')])
+expected = {'b': 1, 'a': '2020-01-02T03:04:05', 'u': '/x/y', 't': u'é'}
+
+
+@pytest.fixture(params=list(json_backends))
+def backend(request, app):
+    app.config['WINDOW_DRESSING_JSON_BACKEND'] = request.param
+    return request.param
+
+
+def test_output(app, backend):
+    with app.test_request_context():
+        response = JsonResource().output(data, 200)
+    assert response.mimetype == 'application/json'
+    loaded = json.loads(response.data, parse_float=decimal.Decimal)
+    # Keys keep their order
+    assert list(loaded) == list(data)
+    # Written as a number by backends with native Decimal support, as text by others
+    assert decimal.Decimal(loaded.pop('p')) == data['p']
+    assert loaded == expected
+
+
+def test_round_trip(app, backend):
+    with app.test_request_context():
+        resource = JsonResource()
+        assert resource.input(b'{"a": [1, 2.5, null, "\\u00e9"]}') == {'a': [1, 2.5, None, u'é']}
+
+
+def test_streamed_output_matches(app, backend):
+    records = [{'i': i, 's': 'x'} for i in range(10)]
+    with app.test_request_context():
+        buffered = JsonResource().output(records, 200).data
+        streamed = b''.join(StreamingJsonResource(chunk_size=10).output(records, 200).response)
+    assert streamed == buffered
+
+
+def test_auto_picks_an_installed_backend(app):
+    app.config['WINDOW_DRESSING_JSON_BACKEND'] = 'auto'
+    with app.app_context():
+        assert get_json_backend().name in json_backends
+
+
+def test_unknown_backend(app):
+    app.config['WINDOW_DRESSING_JSON_BACKEND'] = 'nope'
+    with app.app_context():
+        with pytest.raises(ValueError):
+            get_json_backend()
+
+
+def test_debug_output_is_indented(app):
+    app.debug = True
+    with app.test_request_context():
+        response = JsonResource('json').output({'b': 1, 'a': 2}, 200)
+    assert response.data == b'{\n    "a": 2,\n    "b": 1\n}\n'
@@ -0,0 +1,136 @@
+import io
+import json
+
+import pytest
+from werkzeug.test import EnvironBuilder
+
+from flask_window_dressing import fields, marshal_with
+from flask_window_dressing.utils.json_stream import BoundedReader, JsonArrayReader, iter_ndjson
+
+documents = [
+    [],
+    [1, 22, 333],
+    [{'a': u'é ,]} "quoted" \\', 'b': [1, {'c': None}]}, 12345678901234567890, -1.5e10,
+     'x', True, None, [[]], {}],
+    {'k': 1},
+    5,
+]
+
+
+class CountingReader(io.BytesIO):
+    def __init__(self, data):
+        super(CountingReader, self).__init__(data)
+        self.size = 0
+
+    def read(self, size=-1):
+        data = super(CountingReader, self).read(size)
+        self.size += len(data)
+        return data
+
+
+def read(data, chunk_size=64 * 1024):
+    return list(JsonArrayReader(io.BytesIO(data), chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize('document', documents)
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64 * 1024])
+@pytest.mark.parametrize('indent', [None, 2])
+def test_items_match_json_loads(document, chunk_size, indent):
+    data = b'  ' + json.dumps(document, indent=indent, ensure_ascii=False).encode('utf-8') + b'\n'
+    expected = document if isinstance(document, list) else [document]
+    assert read(data, chunk_size) == expected
+
+
+def test_empty_body():
+    assert read(b'') == []
+    assert read(b'  \n') == []
+
+
+@pytest.mark.parametrize('data', [b'[1,', b'[1 2]', b'[1]x', b'[{"a":}]', b'[1x]', b'[tru]',
+                                  b'[{"a": 1]]', b'["abc', b'[{"a": [1, 2}]'])
+@pytest.mark.parametrize('chunk_size', [1, 3, 64 * 1024])
+def test_malformed_bodies(data, chunk_size):
+    with pytest.raises(ValueError):
+        read(data, chunk_size)
+
+
+def test_malformed_item_is_rejected_early():
+    stream = CountingReader(b'[{"a": x' + b' ' * (8 * 1024 * 1024) + b'}]')
+    with pytest.raises(ValueError):
+        list(JsonArrayReader(stream))
+    assert stream.size < 1024 * 1024
+
+
+def test_large_item_is_read_in_growing_chunks():
+    item = {'values': list(range(200000))}
+    stream = CountingReader(json.dumps([item]).encode('utf-8'))
+    reads = []
+    read = stream.read
+    stream.read = lambda size=-1: reads.append(size) or read(size)
+    assert list(JsonArrayReader(stream, chunk_size=1024)) == [item]
+    assert len(reads) < 20
+
+
+def test_ndjson_lines():
+    stream = io.BytesIO(b'{"id": 1}\n\n{"id": 2}\r\n')
+    assert list(iter_ndjson(stream)) == [{'id': 1}, {'id': 2}]
+
+
+def test_bounded_reader():
+    reader = BoundedReader(io.BytesIO(b'0123456789'), max_size=5)
+    assert reader.read(5) == b'01234'
+    from werkzeug.exceptions import RequestEntityTooLarge
+    with pytest.raises(RequestEntityTooLarge):
+        reader.read(1)
+
+
+@pytest.fixture
+def app(app):
+    @app.route('/', methods=['POST'])
+    @marshal_with({'id': fields.Integer}, stream_input=True)
+    def view(fields=None):
+        if fields is None:
+            return {'id': -1}
+        return {'id': sum(record['id'] for record in fields)}
+
+    return app
+
+
+def test_streamed_json_array(client):
+    body = json.dumps([{'id': str(i), 'extra': 'x'} for i in range(1000)])
+    response = client.post('/', data=body, content_type='application/json')
+    assert response.get_json() == {'id': sum(range(1000))}
+
+
+def test_streamed_object(client):
+    response = client.post('/', data=b'{"id": 7}', content_type='application/json')
+    assert response.get_json() == {'id': 7}
+
+
+def test_streamed_ndjson(client):
+    body = '\n'.join(json.dumps({'id': i}) for i in range(10)) + '\n\n'
+    response = client.post('/', data=body, content_type='application/x-ndjson')
+    assert response.get_json() == {'id': 45}
+
+
+@pytest.mark.parametrize('body, content_type', [
+    (b'[1,', 'application/json'),
+    (b'[{"id": x}]', 'application/json'),
+    (b'{"id": 1}\n{', 'application/x-ndjson'),
+    (b'{"id": 1}', 'application/json; charset=bogus'),
+    (b'{"id": 1}\n', 'application/x-ndjson; charset=bogus'),
+])
+def test_streamed_malformed_body(client, body, content_type):
+    assert client.post('/', data=body, content_type=content_type).status_code == 400
+
+
+def test_streamed_body_too_large(app, client):
+    app.config['WINDOW_DRESSING_MAX_BODY_SIZE'] = 100
+    body = json.dumps([{'id': i} for i in range(100)]).encode('utf-8')
+    assert client.post('/', data=body, content_type='application/json').status_code == 413
+    # A chunked body, whose length is unknown up front
+    environ = EnvironBuilder('/', method='POST', input_stream=io.BytesIO(body),
+                             content_type='application/json').get_environ()
+    del environ['CONTENT_LENGTH']
+    environ['wsgi.input_terminated'] = True
+    assert client.open(environ).status_code == 413
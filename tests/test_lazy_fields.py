@@ -0,0 +1,82 @@
+from flask_window_dressing import compile_fields, fields, marshal
+
+
+class Post(object):
+    def __init__(self, i, loads):
+        self.i = i
+        self.author_id = i % 2 or None
+        self.loads = loads
+
+    @property
+    def author(self):
+        self.loads.append(self.i)
+        return {'name': 'a{0}'.format(self.i)}
+
+
+def test_present_skips_the_attribute():
+    loads = []
+    schema = {'author': fields.Nested({'name': fields.String}, allow_null=True,
+                                      present='author_id')}
+    posts = [Post(i, loads) for i in range(4)]
+    assert marshal(posts, posts, schema) == [
+        {'author': None}, {'author': {'name': 'a1'}}, {'author': None}, {'author': {'name': 'a3'}}]
+    assert loads == [1, 3]
+
+
+def test_prefetch_loads_a_whole_list_once():
+    calls = []
+
+    def load_authors(posts):
+        calls.append(len(posts))
+        return [{'name': 'b{0}'.format(post.i)} for post in posts]
+
+    loads = []
+    schema = {'i': fields.Integer,
+              'author': fields.Nested({'name': fields.String}, prefetch=load_authors)}
+    posts = [Post(i, loads) for i in range(5)]
+    assert marshal(posts, posts, schema) == \
+        [{'i': i, 'author': {'name': 'b{0}'.format(i)}} for i in range(5)]
+    assert calls == [5]
+    assert loads == []
+    assert marshal(posts[1], None, schema) == {'i': 1, 'author': {'name': 'b1'}}
+
+
+def test_prefetch_inside_nested_schemas_is_batched():
+    calls = []
+
+    def load_authors(posts):
+        calls.append(len(posts))
+        return [{'name': 'b{0}'.format(post.i)} for post in posts]
+
+    loads = []
+    post_fields = {'i': fields.Integer,
+                   'author': fields.Nested({'name': fields.String}, prefetch=load_authors)}
+    schema = {'post': fields.Nested(post_fields), 'posts': fields.List(fields.Nested(post_fields))}
+    feeds = [{'post': Post(i, loads), 'posts': [Post(i, loads), Post(i + 1, loads)]}
+             for i in range(5)]
+    assert marshal(feeds, feeds, schema) == [
+        {'post': {'i': i, 'author': {'name': 'b{0}'.format(i)}},
+         'posts': [{'i': i, 'author': {'name': 'b{0}'.format(i)}},
+                   {'i': i + 1, 'author': {'name': 'b{0}'.format(i + 1)}}]}
+        for i in range(5)]
+    assert sorted(calls) == [5, 10]
+    assert loads == []
+
+    del calls[:]
+    feed = feeds[0]
+    assert marshal(feed, feed, {'posts': schema['posts']})['posts'][1]['author'] == {'name': 'b1'}
+    assert calls == [2]
+
+
+def test_cheap_fields_are_evaluated_first_in_schema_order():
+    order = []
+
+    class Tracked(fields.Raw):
+        def output(self, key, obj, full_data):
+            order.append(key)
+            return key
+
+    compiled = compile_fields({'a': Tracked(cost=9), 'b': Tracked(), 'c': Tracked(cost=3)})
+    record = compiled({}, None)
+    assert order == ['b', 'c', 'a']
+    assert list(record) == ['a', 'b', 'c']
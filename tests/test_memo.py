@@ -0,0 +1,115 @@
+from flask_window_dressing import fields, marshal, marshal_with
+from flask_window_dressing.utils.memo import current_memo, memoize
+
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class Counted(fields.Raw):
+    def __init__(self, calls, **kwargs):
+        super(Counted, self).__init__(**kwargs)
+        self.calls = calls
+
+    def format(self, value):
+        self.calls.append(value)
+        return value
+
+
+def make_schema(calls):
+    author_fields = {'id': fields.Integer, 'name': Counted(calls)}
+    return {
+        'id': fields.Integer,
+        'author': fields.Nested(author_fields, allow_null=True),
+        'editors': fields.List(fields.Nested(author_fields)),
+    }
+
+
+authors = [Obj(id=i, name='a%d' % i) for i in range(3)]
+posts = [Obj(id=i, author=authors[i % 3], editors=[authors[0], authors[1]]) for i in range(30)]
+posts[5].author = None
+
+
+def test_memoized_output_is_equal():
+    calls = []
+    schema = make_schema(calls)
+    plain = marshal(posts, posts, schema)
+    plain_calls = len(calls)
+    del calls[:]
+    assert marshal(posts, posts, schema, memo=True) == plain
+    assert len(calls) == 3 < plain_calls
+
+
+def test_records_of_shared_objects_are_shared():
+    schema = make_schema([])
+    marshalled = marshal(posts, posts, schema, memo=True)
+    assert marshalled[0]['author'] is marshalled[3]['author']
+    assert marshalled[0]['author'] is marshalled[1]['editors'][0]
+    plain = marshal(posts, posts, schema)
+    assert plain[0]['author'] is not plain[3]['author']
+
+
+def test_batch_memoized_output_is_equal():
+    calls = []
+    schema = make_schema(calls)
+    plain = marshal(posts, posts, schema, batch=True)
+    del calls[:]
+    marshalled = marshal(posts, posts, schema, batch=True, memo=True)
+    assert marshalled == plain
+    assert len(calls) == 3
+    assert marshalled[0]['author'] is marshalled[3]['author']
+
+
+def test_memo_is_dropped_afterwards():
+    marshal(posts, posts, make_schema([]), memo=True)
+    assert current_memo() is None
+
+
+def test_nested_blocks_share_the_memo():
+    with memoize() as outer:
+        with memoize() as inner:
+            assert inner is outer is current_memo()
+        assert current_memo() is outer
+    assert current_memo() is None
+
+
+def test_memo_is_dropped_on_error():
+    try:
+        with memoize():
+            raise ValueError()
+    except ValueError:
+        pass
+    assert current_memo() is None
+
+
+def test_memo_counts_hits():
+    with memoize() as memo:
+        marshal(posts, posts, make_schema([]))
+    assert memo.hits == 30 * 3 - 1 - 3
+
+
+def test_incoming_data_is_not_memoized():
+    schema = {'author': fields.Nested({'id': fields.Integer})}
+    author = {'id': '1'}
+    data = marshal([{'author': author}] * 2, None, schema, going_in=True, memo=True)
+    assert data == [{'author': {'id': 1}}] * 2
+    assert data[0]['author'] is not data[1]['author']
+
+
+def test_marshal_with_memo(app, client):
+    calls = []
+    schema = make_schema(calls)
+
+    @app.route('/<int:fused>')
+    def view(fused):
+        @marshal_with(schema, memo=True, fused=bool(fused))
+        def records():
+            return posts
+        return records()
+
+    expected = marshal(posts, posts, make_schema([]))
+    for fused in (0, 1):
+        del calls[:]
+        assert client.get('/%d' % fused).get_json() == expected
+        assert len(calls) == 3
@@ -0,0 +1,113 @@
+import json
+import multiprocessing
+import sys
+
+import pytest
+
+from flask_window_dressing import compile_fields, fields, marshal, marshal_with
+from flask_window_dressing.representations.json_backends import get_json_backend
+from flask_window_dressing.utils.parallel import ParallelMarshaler
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='workers are forked')
+
+schema = {
+    'id': fields.Integer,
+    'name': fields.String,
+    'owner': fields.Nested({'id': fields.Integer}, allow_null=True),
+}
+data = [{'id': str(i), 'name': 'n%d' % i, 'owner': {'id': i} if i % 2 else None}
+        for i in range(25)]
+
+
+@pytest.fixture
+def marshaler():
+    marshaler = ParallelMarshaler(schema, workers=2, chunk_size=4, threshold=10,
+                                  mp_context=multiprocessing.get_context('fork'))
+    yield marshaler
+    marshaler.shutdown()
+
+
+def test_short_lists_are_marshaled_serially(marshaler):
+    assert marshaler.marshal(data[:9]) == marshal(data[:9], data[:9], schema)
+    assert marshaler.executor is None
+
+
+def test_marshal_matches_serial(marshaler):
+    assert marshaler.marshal(data) == marshal(data, data, schema)
+    assert marshaler.executor is not None
+
+
+def test_batch_marshal_matches_serial():
+    marshaler = ParallelMarshaler(schema, batch=True, workers=2, chunk_size=4, threshold=10,
+                                  mp_context=multiprocessing.get_context('fork'))
+    try:
+        assert marshaler.marshal(data) == marshal(data, data, schema)
+    finally:
+        marshaler.shutdown()
+
+
+def test_compiled_schema_is_accepted():
+    marshaler = ParallelMarshaler(compile_fields(schema), threshold=10**6)
+    assert marshaler.fields is schema
+    assert marshaler.marshal(data) == marshal(data, data, schema)
+
+
+@pytest.mark.parametrize('name', ['json', 'ujson', 'orjson', 'rapidjson'])
+def test_dumps_matches_backend(marshaler, name):
+    pytest.importorskip(name)
+    backend = get_json_backend(name)
+    assert marshaler.dumps(data, backend) == backend.dumps(marshal(data, data, schema))
+
+
+def test_marshal_with_parallel(app, client):
+    marshaler = ParallelMarshaler(schema, workers=2, chunk_size=4, threshold=10, serialize=True,
+                                  mp_context=multiprocessing.get_context('fork'))
+
+    @app.route('/<int:n>')
+    @marshal_with(schema, parallel=marshaler, etag=True)
+    def view(n):
+        return data[:n]
+
+    try:
+        for n in (5, 25):
+            response = client.get('/%d' % n)
+            assert json.loads(response.data) == marshal(data[:n], data[:n], schema)
+            assert response.headers['ETag']
+        assert marshaler.executor is not None
+    finally:
+        marshaler.shutdown()
+
+
+def test_serialize_without_conditional_headers(app, client, monkeypatch):
+    marshaler = ParallelMarshaler(schema, workers=2, chunk_size=4, threshold=10, serialize=True,
+                                  mp_context=multiprocessing.get_context('fork'))
+    dumped = []
+    dumps = marshaler.dumps
+    monkeypatch.setattr(marshaler, 'dumps', lambda *args: dumped.append(args) or dumps(*args))
+
+    @app.route('/<int:n>')
+    @marshal_with(schema, parallel=marshaler)
+    def view(n):
+        return data[:n]
+
+    try:
+        for n in (5, 25):
+            response = client.get('/%d' % n)
+            assert json.loads(response.data) == marshal(data[:n], data[:n], schema)
+        assert len(dumped) == 1
+    finally:
+        marshaler.shutdown()
+
+
+def test_evicted_marshaler_in_use_is_shut_down_after_use(monkeypatch):
+    from flask_window_dressing.utils import parallel
+    monkeypatch.setattr(parallel, '_marshalers', {})
+    monkeypatch.setattr(parallel, 'MAX_PARALLEL_MARSHALERS', 1)
+    other = {'id': fields.Integer}
+    marshaler = parallel.get_parallel_marshaler(schema)
+    assert parallel.get_parallel_marshaler(schema) is marshaler
+    with marshaler.using_executor() as executor:
+        assert parallel.get_parallel_marshaler(other) is not marshaler
+        assert marshaler.executor is executor
+    assert marshaler.executor is None
+    parallel.get_parallel_marshaler(other).retire()
@@ -0,0 +1,81 @@
+import pytest
+
+from flask_window_dressing import compile_fields, fields, marshal, marshal_with
+from flask_window_dressing.fields import MarshallingException
+from flask_window_dressing.utils.profiling import get_stats, reset_stats
+
+owner_fields = {'id': fields.Integer, 'name': fields.String}
+schema = {
+    'id': fields.Integer,
+    'owner': fields.Nested(owner_fields),
+    'tags': fields.List(fields.Nested({'name': fields.String})),
+    'meta': {'size': fields.Integer},
+}
+data = {'id': 1, 'owner': {'id': 2, 'name': 'o'}, 'tags': [{'name': 'a'}, {'name': 'b'}],
+        'size': 3}
+expected = {'id': 1, 'owner': {'id': 2, 'name': 'o'}, 'tags': [{'name': 'a'}, {'name': 'b'}],
+            'meta': {'size': 3}}
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    reset_stats()
+    yield
+    reset_stats()
+
+
+def test_unprofiled_schema_records_nothing():
+    assert marshal(data, data, schema) == expected
+    assert get_stats() == {'schemas': {}, 'fields': {}}
+
+
+def test_profiled_schema_matches_plain_output():
+    assert compile_fields(schema, profile='s')(data, data) == expected
+    assert compile_fields(schema, profile='s').batch([data], [data]) == [expected]
+
+
+def test_nested_schemas_are_profiled():
+    compile_fields(schema, profile='s')(data, data)
+    stats = get_stats()
+    assert stats['schemas']['s']['calls'] == 1
+    assert stats['schemas']['s.owner']['calls'] == 1
+    # The tags are marshaled in one batch
+    assert stats['schemas']['s.tags']['calls'] == 1
+    assert stats['schemas']['s.meta']['calls'] == 1
+    assert stats['fields']['s.owner']['name']['calls'] == 1
+    assert stats['fields']['s']['owner']['calls'] == 1
+
+
+def test_profiling_does_not_change_the_fields():
+    compile_fields(schema, profile='s')(data, data)
+    assert isinstance(schema['owner'].nested, dict)
+    marshal(data, data, schema)
+    assert 'owner_fields' not in get_stats()['schemas']
+
+
+def test_exceptions_are_counted():
+    broken = {'id': fields.Integer}
+    with pytest.raises(MarshallingException):
+        compile_fields(broken, profile='b')({'id': 'x'}, None)
+    stats = get_stats()
+    assert stats['schemas']['b']['exceptions'] == {'MarshallingException': 1}
+    assert stats['fields']['b']['id']['exceptions'] == {'MarshallingException': 1}
+
+
+def test_view_schemas_are_recorded_apart(app, client):
+    app.config['WINDOW_DRESSING_PROFILE'] = True
+    app.config['WINDOW_DRESSING_SERVER_TIMING'] = True
+
+    @app.route('/', methods=['POST'])
+    @marshal_with({'id': fields.Integer})
+    def view(fields):
+        return fields
+
+    response = client.post('/', json={'id': '1'})
+    assert response.get_json() == {'id': 1}
+    assert response.headers['Server-Timing'].startswith('marshal;dur=')
+    schemas = get_stats()['schemas']
+    name = '{0}.view'.format(__name__)
+    assert schemas[name + '.in']['calls'] == 1
+    assert schemas[name + '.out']['calls'] == 1
+    assert name not in schemas
@@ -0,0 +1,92 @@
+import pytest
+
+from flask_window_dressing import fields, marshal_with
+
+schema = {'id': fields.Integer, 'name': fields.String}
+
+
+@pytest.fixture
+def app(app):
+    @app.route('/', methods=['POST'])
+    @marshal_with(schema)
+    def view(fields=None):
+        return fields if fields is not None else {'id': 0, 'name': 'none'}
+
+    return app
+
+
+def test_json_body(client):
+    response = client.post('/', data=b'{"id": "1", "name": "one"}',
+                           content_type='application/json')
+    assert response.get_json() == {'id': 1, 'name': 'one'}
+
+
+def test_body_without_content_type_is_json(client):
+    response = client.post('/', data=b'{"id": 2}', content_type='')
+    assert response.get_json() == {'id': 2, 'name': None}
+
+
+def test_charset(client):
+    body = u'{"id": 1, "name": "été"}'.encode('latin-1')
+    response = client.post('/', data=body, content_type='application/json; charset=latin-1')
+    assert response.get_json() == {'id': 1, 'name': u'été'}
+
+
+@pytest.mark.parametrize('body, content_type', [
+    (b'{"id": ', 'application/json'),
+    (b'[1, 2', 'application/json'),
+    (b'{"id": 1}', 'application/json; charset=no-such-charset'),
+    (b'{"name": "\xff"}', 'application/json; charset=utf-8'),
+    (b'{"id": 1}\n{', 'application/x-ndjson'),
+])
+def test_malformed_body_is_a_bad_request(client, body, content_type):
+    assert client.post('/', data=body, content_type=content_type).status_code == 400
+
+
+def test_unsupported_content_type(client):
+    assert client.post('/', data=b'<id>1</id>', content_type='application/xml').status_code == 415
+
+
+def test_empty_body(client):
+    response = client.post('/', data=b'', content_type='application/json')
+    assert response.get_json() == {'id': 0, 'name': 'none'}
+
+
+def test_form_body_is_left_to_flask(client):
+    response = client.post('/', data={'id': '1'})
+    assert response.get_json() == {'id': 0, 'name': 'none'}
+
+
+def test_body_too_large(app, client):
+    app.config['WINDOW_DRESSING_MAX_BODY_SIZE'] = 10
+    response = client.post('/', data=b'{"id": 1, "name": "long enough"}',
+                           content_type='application/json')
+    assert response.status_code == 413
+
+
+def test_msgpack_body(client):
+    msgpack = pytest.importorskip('msgpack')
+    response = client.post('/', data=msgpack.packb({'id': '3', 'name': 'three'}),
+                           content_type='application/msgpack')
+    assert response.get_json() == {'id': 3, 'name': 'three'}
+    response = client.post('/', data=b'\xc1', content_type='application/msgpack')
+    assert response.status_code == 400
+
+
+def test_cbor_body(client):
+    cbor2 = pytest.importorskip('cbor2')
+    response = client.post('/', data=cbor2.dumps({'id': 4, 'name': 'four'}),
+                           content_type='application/cbor')
+    assert response.get_json() == {'id': 4, 'name': 'four'}
+    response = client.post('/', data=b'\xff\xff', content_type='application/cbor')
+    assert response.status_code == 400
+
+
+def test_csv_body(app, client):
+    @app.route('/many', methods=['POST'])
+    @marshal_with(schema)
+    def many(fields):
+        return fields
+
+    response = client.post('/many', data=b'id,name\r\n1,one\r\n2,two\r\n', content_type='text/csv')
+    assert response.get_json() == [{'id': 1, 'name': 'one'}, {'id': 2, 'name': 'two'}]
@@ -0,0 +1,112 @@
+import os
+import threading
+
+import pytest
+
+from flask_window_dressing import fields, marshal_with
+from flask_window_dressing.utils.response_cache import FileStore, MemoryStore, ResponseCache
+
+schema = {'id': fields.Integer}
+entry = (b'{"id": 1}', 200, [('Content-Type', 'application/json'), ('X-Thing', 'a')])
+
+
+@pytest.fixture(params=['memory', 'file'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryStore()
+    return FileStore(str(tmp_path / 'cache'))
+
+
+def test_store_round_trip(store):
+    assert store.get('a') is None
+    store.set('a', entry, 60)
+    body, status, headers = store.get('a')
+    assert (body, status, list(headers)) == entry
+    store.delete('a')
+    assert store.get('a') is None
+
+
+def test_store_expiry(store):
+    store.set('a', entry, -1)
+    assert store.get('a') is None
+
+
+def test_store_clear(store):
+    store.set('a', entry, 60)
+    store.set('b', entry, 60)
+    store.clear()
+    assert store.get('a') is None and store.get('b') is None
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemoryStore(max_entries=2)
+    store.set('a', entry, 60)
+    store.set('b', entry, 60)
+    store.get('a')
+    store.set('c', entry, 60)
+    assert store.get('b') is None
+    assert store.get('a') is not None and store.get('c') is not None
+
+
+def test_file_store_files_are_not_pickles(tmp_path):
+    store = FileStore(str(tmp_path / 'cache'))
+    store.set('a', entry, 60)
+    with open(store.filename('a'), 'rb') as f:
+        meta, body = f.read().split(b'\n', 1)
+    assert body == entry[0]
+    assert meta.startswith(b'[')
+
+
+def test_file_store_ignores_garbage(tmp_path):
+    store = FileStore(str(tmp_path / 'cache'))
+    with open(store.filename('a'), 'wb') as f:
+        f.write(b'\x80\x04garbage')
+    assert store.get('a') is None
+
+
+def test_file_store_directory_is_private(tmp_path):
+    path = str(tmp_path / 'cache')
+    FileStore(path)
+    assert os.stat(path).st_mode & 0o077 == 0
+
+
+def test_file_store_prunes_on_an_interval(tmp_path):
+    store = FileStore(str(tmp_path / 'cache'), max_entries=2, prune_interval=3600)
+    for key in 'abcd':
+        store.set(key, entry, 60)
+    # Only the first write pruned
+    assert len(os.listdir(store.path)) == 4
+    store.prune()
+    assert len(os.listdir(store.path)) == 2
+
+
+def test_stats_are_thread_safe():
+    cache = ResponseCache()
+
+    def miss():
+        for i in range(1000):
+            cache.get('missing')
+
+    threads = [threading.Thread(target=miss) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats == {'hits': 0, 'misses': 8000}
+
+
+def test_cached_view_is_called_once(app, client, tmp_path):
+    calls = []
+    cache = ResponseCache(FileStore(str(tmp_path / 'cache')))
+
+    @app.route('/<int:id>')
+    @marshal_with(schema, cache=cache)
+    def view(id):
+        calls.append(id)
+        return {'id': id}
+
+    assert client.get('/1').get_json() == {'id': 1}
+    assert client.get('/1').get_json() == {'id': 1}
+    assert client.get('/2').get_json() == {'id': 2}
+    assert calls == [1, 2]
+    assert cache.stats == {'hits': 1, 'misses': 2}
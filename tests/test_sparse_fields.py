@@ -0,0 +1,65 @@
+import pytest
+
+from flask_window_dressing import fields, marshal_with
+from flask_window_dressing.utils.sparse_fields import parse_selection, select_fields
+
+
+class Boom(fields.Raw):
+    def output(self, key, obj, full_data):
+        raise AssertionError('{0} was evaluated'.format(key))
+
+
+schema = {
+    'id': fields.Integer,
+    'name': fields.String,
+    'boom': Boom(),
+    'owner': fields.Nested({'name': fields.String, 'city': fields.String, 'boom': Boom()}),
+    'items': fields.List(fields.Nested({'a': fields.Raw, 'b': fields.Raw})),
+    'meta': {'x': fields.Raw, 'y': fields.Raw},
+}
+data = {'id': 1, 'name': 'n', 'owner': {'name': 'o', 'city': 'c'}, 'items': [{'a': 1, 'b': 2}],
+        'x': 3, 'y': 4}
+
+
+def test_parse_selection():
+    assert parse_selection('a,b.c,b.d,e.f.g,a.x') == \
+        {'a': None, 'b': {'c': None, 'd': None}, 'e': {'f': {'g': None}}}
+
+
+def test_selected_schemas_are_shared():
+    assert select_fields(schema, 'id,owner.name') is select_fields(schema, 'id,owner.name')
+
+
+def test_no_selection_is_the_schema():
+    assert select_fields(schema) is schema
+
+
+@pytest.fixture
+def app(app):
+    @app.route('/')
+    @marshal_with(schema, sparse=True)
+    def view():
+        return data
+
+    return app
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('fields=id,owner.name', {'id': 1, 'owner': {'name': 'o'}}),
+    ('fields=id,items.b,meta.y', {'id': 1, 'items': [{'b': 2}], 'meta': {'y': 4}}),
+    ('exclude=boom,owner.boom,items.a,meta',
+     {'id': 1, 'name': 'n', 'owner': {'name': 'o', 'city': 'c'}, 'items': [{'b': 2}]}),
+    ('fields=owner&exclude=owner.boom', {'owner': {'name': 'o', 'city': 'c'}}),
+    ('fields=id,unknown', {'id': 1}),
+])
+def test_sparse_responses(client, query, expected):
+    assert client.get('/?' + query).get_json() == expected
+
+
+def test_selection_is_ignored_without_sparse(app, client):
+    @app.route('/full')
+    @marshal_with({'id': fields.Integer, 'name': fields.String})
+    def full():
+        return data
+
+    assert client.get('/full?fields=id').get_json() == {'id': 1, 'name': 'n'}
@@ -0,0 +1,48 @@
+import json
+
+from flask_window_dressing import fields, marshal_with
+from flask_window_dressing.representations.json_representation import StreamingJsonResource
+
+schema = {'i': fields.Integer, 's': fields.String}
+
+
+def test_streamed_array_matches_records(app, client):
+    @app.route('/')
+    @marshal_with(schema, stream=StreamingJsonResource(chunk_size=20))
+    def view():
+        return ({'i': i, 's': 'x'} for i in range(5)), 201, {'X-A': '1'}
+
+    response = client.get('/')
+    assert response.status_code == 201
+    assert response.headers['X-A'] == '1'
+    assert response.is_streamed
+    assert json.loads(response.data) == [{'i': i, 's': 'x'} for i in range(5)]
+
+
+def test_empty_stream(app, client):
+    @app.route('/')
+    @marshal_with(schema, stream=True)
+    def view():
+        return iter([])
+
+    assert json.loads(client.get('/').data) == []
+
+
+def test_records_are_marshaled_lazily(app, client):
+    pulled = []
+
+    def records():
+        for i in range(3):
+            pulled.append(i)
+            yield {'i': i}
+
+    @app.route('/')
+    @marshal_with(schema, stream=StreamingJsonResource(chunk_size=1))
+    def view():
+        return records()
+
+    response = client.get('/', buffered=False)
+    # Starting the stream marshals at most the first record
+    assert len(pulled) <= 1
+    assert json.loads(b''.join(response.response)) == [{'i': i, 's': None} for i in range(3)]
+    assert pulled == [0, 1, 2]
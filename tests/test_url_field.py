@@ -0,0 +1,72 @@
+import pytest
+from flask import url_for
+from werkzeug.routing import BuildError
+
+from flask_window_dressing import fields
+
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+@pytest.fixture
+def app(app):
+    @app.route('/u/<int:id>/<path:p>')
+    def u(id, p):
+        pass
+
+    @app.route('/v/<name>', defaults={'x': 1})
+    def v(name, x):
+        pass
+
+    return app
+
+
+objs = [Obj(id=i, p=u'a b/ü;x', other=3) for i in range(3)]
+
+
+@pytest.mark.parametrize('root', ['', '/app/'])
+def test_cached_paths_match_built_paths(app, root):
+    field = fields.Url('u')
+    with app.test_request_context('/', base_url='http://localhost' + root):
+        for obj in objs + objs:
+            assert field.output('k', obj, None) == field.build_url(obj.__dict__)
+            assert url_for('u', id=obj.id, p=obj.p).startswith(field.output('k', obj, None))
+
+
+def test_script_roots_are_cached_apart(app):
+    field = fields.Url('u')
+    with app.test_request_context('/', base_url='http://localhost/one/'):
+        one = field.output('k', objs[0], None)
+    with app.test_request_context('/', base_url='http://localhost/two/'):
+        two = field.output('k', objs[0], None)
+    assert one.startswith('/one/') and two.startswith('/two/')
+
+
+def test_endpoint_with_defaults_uses_url_for(app):
+    with app.test_request_context('/'):
+        assert fields.Url('v').output('k', {'name': 'q'}, None) == url_for('v', name='q')
+
+
+def test_missing_argument(app):
+    with app.test_request_context('/'):
+        with pytest.raises(BuildError):
+            fields.Url('u').output('k', {'id': 1}, None)
+
+
+def test_cache_is_bounded(app):
+    field = fields.Url('u', cache_size=2)
+    with app.test_request_context('/'):
+        for obj in objs:
+            field.output('k', obj, None)
+    assert len(field._rules[app][2]) == 2
+
+
+def test_marshallable_object(app):
+    class Marshallable(object):
+        def __marshallable__(self):
+            return {'id': 4, 'p': 'q'}
+
+    with app.test_request_context('/'):
+        assert fields.Url('u').output('k', Marshallable(), None) == '/u/4/q'